@@ -0,0 +1,57 @@
+"""
+Index build and matching rate of `NetblockMatcher`, with a binary search
+per address and, when NumPy is installed, vectorized over arrays.
+
+    python benchmarks/matcher_bench.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import Inetnum, NetblockMatcher  # noqa: E402
+from ipnetblocks.columnar import numpy  # noqa: E402
+from payloads import inetnum_record  # noqa: E402
+
+
+def run(count: int = 100000, lookups: int = 200000,
+        bulk_lookups: int = 10000000) -> dict:
+    inetnums = [Inetnum(inetnum_record(i)) for i in range(count)]
+    # nest every /24 in a /16
+    inetnums += [Inetnum(inetnum_record(i << 8)) for i in range(count >> 8)]
+    for inetnum in inetnums[count:]:
+        inetnum.inetnum_last = inetnum.inetnum_first + 0xffff
+
+    started = time.perf_counter()
+    matcher = NetblockMatcher(inetnums)
+    build_seconds = time.perf_counter() - started
+
+    generator = random.Random(1)
+    span = (count + 256) << 8
+    addresses = [0x01000000 + generator.randrange(span)
+                 for _ in range(lookups)]
+    started = time.perf_counter()
+    matcher.match_ipv4(addresses)
+    result = {'count': len(inetnums), 'build_seconds': build_seconds,
+              'matches_per_second': lookups / (time.perf_counter() - started)}
+
+    if numpy is not None:
+        values = numpy.random.default_rng(1).integers(
+            0x01000000, 0x01000000 + span, bulk_lookups, numpy.uint32)
+        started = time.perf_counter()
+        matcher.match_ipv4(values)
+        result['numpy_matches_per_second'] = \
+            bulk_lookups / (time.perf_counter() - started)
+    return result
+
+
+if __name__ == '__main__':
+    result = run()
+    print('{count} ranges indexed in {build:.2f} s, {rate:.0f} matches/s'
+          .format(count=result['count'], build=result['build_seconds'],
+                  rate=result['matches_per_second']))
+    if 'numpy_matches_per_second' in result:
+        print('NumPy: {:.0f} matches/s'.format(
+            result['numpy_matches_per_second']))
@@ -0,0 +1,55 @@
+"""
+Resident memory of parsed `Inetnum` objects.
+
+    python benchmarks/models_memory_bench.py
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import Inetnum, Interner  # noqa: E402
+from payloads import inetnum_record  # noqa: E402
+
+
+def _traced_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return after - before
+
+
+def run(count: int = 10000) -> dict:
+    records = [inetnum_record(i) for i in range(count)]
+    size = _traced_bytes(lambda: [Inetnum(record) for record in records])
+
+    # Records decoded one by one, as from separate responses, hold their
+    # own copies of the repeated strings once the documents are released
+    documents = [json.dumps(record) for record in records]
+    decoded = _traced_bytes(
+        lambda: [Inetnum(json.loads(document)) for document in documents])
+    interner = Interner()
+    interned = _traced_bytes(
+        lambda: [Inetnum(json.loads(document), interner)
+                 for document in documents])
+    return {'count': count, 'bytes': size,
+            'bytes_per_inetnum': size / count,
+            'decoded_bytes_per_inetnum': decoded / count,
+            'interned_bytes_per_inetnum': interned / count}
+
+
+if __name__ == '__main__':
+    result = run()
+    print('{count} Inetnum: {mb:.1f} MiB, {per:.0f} bytes per Inetnum'.format(
+        count=result['count'], mb=result['bytes'] / 2 ** 20,
+        per=result['bytes_per_inetnum']))
+    print('Decoded one by one: {:.0f} bytes per Inetnum, {:.0f} interned'
+          .format(result['decoded_bytes_per_inetnum'],
+                  result['interned_bytes_per_inetnum']))
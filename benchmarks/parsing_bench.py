@@ -0,0 +1,39 @@
+"""
+Time to build a `Response` from a decoded limit=1000 payload, and to
+parse the raw body the way `Client.get` does.
+
+    python benchmarks/parsing_bench.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import Client, Response  # noqa: E402
+from payloads import response_json, response_payload  # noqa: E402
+
+
+def run(count: int = 1000, repeat: int = 5) -> dict:
+    payload = response_payload(count)
+    seconds = min(timeit.repeat(lambda: Response(payload), number=1,
+                                repeat=repeat))
+
+    body = response_json(count).encode('utf-8')
+    client = Client('at_' + 'a' * 29)
+    raw_seconds = min(timeit.repeat(lambda: client._parse_raw_result(body),
+                                    number=1, repeat=repeat))
+    client.close()
+    return {'count': count, 'seconds': seconds,
+            'us_per_inetnum': seconds / count * 1e6,
+            'parse_raw_result_seconds': raw_seconds}
+
+
+if __name__ == '__main__':
+    result = run()
+    print('Response({count} inetnums): {ms:.1f} ms, '
+          '{us:.1f} us per Inetnum'.format(count=result['count'],
+                                           ms=result['seconds'] * 1e3,
+                                           us=result['us_per_inetnum']))
+    print('_parse_raw_result({count} inetnums): {ms:.1f} ms'.format(
+        count=result['count'], ms=result['parse_raw_result_seconds'] * 1e3))
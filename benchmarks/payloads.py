@@ -0,0 +1,100 @@
+"""
+Synthetic API payloads modeled on real IP Netblocks responses.
+"""
+from json import dumps
+
+_IPV4_MAPPED_PREFIX = 0xffff << 32
+
+_REMARKS = [
+    "---------------",
+    "All abuse reporting can be done via",
+    "abuse@example.net",
+    "---------------",
+]
+
+_ADDRESS = [
+    "PO Box 3646",
+    "South Brisbane, QLD 4101",
+    "Australia",
+]
+
+
+def _contact(handle: str, role: str) -> dict:
+    return {
+        "id": handle,
+        "role": role,
+        "email": "helpdesk@apnic.net",
+        "phone": "+61-7-3858-3188",
+        "country": "AU",
+        "city": "",
+        "address": list(_ADDRESS),
+    }
+
+
+def inetnum_record(i: int) -> dict:
+    """
+    Record of the i-th /24 network starting at 1.0.0.0.
+    """
+    first = _IPV4_MAPPED_PREFIX | (0x01000000 + (i << 8))
+    last = first + 255
+    a, b, c = (first >> 24) & 0xff, (first >> 16) & 0xff, (first >> 8) & 0xff
+    return {
+        "inetnum": "{0}.{1}.{2}.0 - {0}.{1}.{2}.255".format(a, b, c),
+        "inetnumFirst": first,
+        "inetnumLast": last,
+        "inetnumFirstString": str(first),
+        "inetnumLastString": str(last),
+        "as": {
+            "asn": 13335 + i % 50,
+            "name": "Cloudflare",
+            "type": "Content",
+            "route": "{}.{}.{}.0/24".format(a, b, c),
+            "domain": "https://www.cloudflare.com"
+        },
+        "netname": "NET-{}".format(i),
+        "nethandle": "",
+        "description": [
+            "APNIC and Cloudflare DNS Resolver project",
+            "Routed globally by AS13335/Cloudflare",
+        ],
+        "modified": "2020-07-{:02d}T13:10:57Z".format(1 + i % 28),
+        "country": "AU",
+        "city": "",
+        "address": [],
+        "abuseContact": [_contact("AA1412-AP", "ABUSE APNICRANDNETAU")],
+        "adminContact": [_contact("AR302-AP", "APNIC RESEARCH")],
+        "techContact": [_contact("AR302-AP", "APNIC RESEARCH")],
+        "org": {
+            "org": "ORG-ARAD1-AP",
+            "name": "APNIC Research and Development",
+            "email": "helpdesk@apnic.net",
+            "phone": "+61-7-38583100",
+            "country": "AU",
+            "city": "",
+            "postalCode": "",
+            "address": ["6 Cordelia St"]
+        },
+        "mntBy": [{"mntner": "APNIC-HM",
+                   "email": "helpdesk@apnic.net\nnetops@apnic.net"}],
+        "mntDomains": [],
+        "mntLower": [],
+        "mntRoutes": [{"mntner": "MAINT-AU-APNIC-GM85-AP",
+                       "email": "ggm@apnic.net"}],
+        "remarks": list(_REMARKS),
+        "source": "APNIC"
+    }
+
+
+def response_payload(count: int = 1000, search: str = "1.0.0.1") -> dict:
+    return {
+        "search": search,
+        "result": {
+            "count": count,
+            "limit": count,
+            "inetnums": [inetnum_record(i) for i in range(count)],
+        }
+    }
+
+
+def response_json(count: int = 1000, search: str = "1.0.0.1") -> str:
+    return dumps(response_payload(count, search))
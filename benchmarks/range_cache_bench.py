@@ -0,0 +1,72 @@
+"""
+Fill and lookup rates of a `RangeCache` filled up to its size bound, so
+that the cost of an `add` stays flat as the cache grows.
+
+    python benchmarks/range_cache_bench.py
+"""
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import Inetnum, RangeCache  # noqa: E402
+from payloads import inetnum_record  # noqa: E402
+
+
+def run(count: int = 100000, lookups: int = 100000) -> dict:
+    # every lookup returns a /24 and its enclosing /16
+    batches = []
+    for i in range(count + count // 10):
+        leaf = Inetnum(inetnum_record(i))
+        parent = Inetnum(inetnum_record(i >> 8 << 8))
+        parent.inetnum_last = parent.inetnum_first + 0xffff
+        batches.append(([leaf, parent], leaf.inetnum_first))
+
+    cache = RangeCache(max_size=count)
+    # as timeit does, keep collections of the records out of the timings
+    gc.collect()
+    gc.disable()
+    try:
+        return _timed(cache, batches, count, lookups)
+    finally:
+        gc.enable()
+
+
+def _timed(cache: RangeCache, batches: list, count: int,
+           lookups: int) -> dict:
+    started = time.perf_counter()
+    for inetnums, address in batches[:count // 10]:
+        cache.add(inetnums, address)
+    first_tenth = time.perf_counter() - started
+    for inetnums, address in batches[count // 10:count]:
+        cache.add(inetnums, address)
+    started = time.perf_counter()
+    # the cache is full, every add evicts
+    for inetnums, address in batches[count:]:
+        cache.add(inetnums, address)
+    full = time.perf_counter() - started
+
+    generator = random.Random(1)
+    addresses = [batches[generator.randrange(count, len(batches))][1] + 7
+                 for _ in range(lookups)]
+    started = time.perf_counter()
+    for address in addresses:
+        cache.lookup(address)
+    elapsed = time.perf_counter() - started
+
+    return {'count': count,
+            'empty_adds_per_second': (count // 10) / first_tenth,
+            'full_adds_per_second': (len(batches) - count) / full,
+            'lookups_per_second': lookups / elapsed}
+
+
+if __name__ == '__main__':
+    result = run()
+    print('RangeCache of {count} ranges: {empty:.0f} adds/s when empty, '
+          '{full:.0f} adds/s when full, {rate:.0f} lookups/s'.format(
+              count=result['count'], empty=result['empty_adds_per_second'],
+              full=result['full_adds_per_second'],
+              rate=result['lookups_per_second']))
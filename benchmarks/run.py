@@ -0,0 +1,132 @@
+"""
+Runs every benchmark and prints the results as JSON, so that they can
+be compared across versions.
+
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --compare baseline.json
+
+With `--compare`, every metric is printed next to the baseline and the
+exit status is 1 if any of them got worse by more than `--threshold`.
+Metrics named `*_per_second` are better when higher, the other timings
+and sizes when lower. Metrics listed in the `REFERENCE_METRICS` of a
+benchmark module time code outside of the library and are not compared.
+
+The stub server of the transport benchmark shares the interpreter with
+the client, so its figures are only comparable on the same machine.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import decoder  # noqa: E402
+from ipnetblocks.version import VERSION  # noqa: E402
+import matcher_bench  # noqa: E402
+import models_memory_bench  # noqa: E402
+import parsing_bench  # noqa: E402
+import range_cache_bench  # noqa: E402
+import snapshot_bench  # noqa: E402
+import transport_bench  # noqa: E402
+import validation_bench  # noqa: E402
+
+BENCHMARKS = {
+    'validation': (validation_bench, {'number': 10000}),
+    'parsing': (parsing_bench, {'count': 100}),
+    'models_memory': (models_memory_bench, {'count': 1000}),
+    'range_cache': (range_cache_bench, {'count': 10000, 'lookups': 10000}),
+    'snapshot': (snapshot_bench, {'count': 10000, 'lookups': 10000}),
+    'matcher': (matcher_bench, {'count': 10000, 'lookups': 10000,
+                                'bulk_lookups': 100000}),
+    'transport': (transport_bench, {'count': 100, 'lookups': 10,
+                                    'bulk_lookups': 100}),
+}
+
+# Benchmark parameters, not measurements
+_PARAMETERS = ('count', 'bulk_count')
+
+
+def run(names: list, quick: bool = False) -> dict:
+    results = {}
+    for name in names:
+        module, quick_kwargs = BENCHMARKS[name]
+        results[name] = module.run(**(quick_kwargs if quick else {}))
+    return {
+        'meta': {
+            'version': VERSION,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'json_decoder': decoder.available_decoders()[0],
+            'quick': quick,
+            'date': datetime.datetime.utcnow().isoformat() + 'Z',
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    :return: list of (metric, baseline, current, change, regressed)
+        tuples, `change` being the relative change of the value
+    """
+    rows = []
+    for name, metrics in current['results'].items():
+        old_metrics = baseline['results'].get(name, {})
+        references = getattr(BENCHMARKS[name][0], 'REFERENCE_METRICS', ())
+        for key, value in metrics.items():
+            old = old_metrics.get(key)
+            if key in _PARAMETERS or key in references or not old or \
+                    not isinstance(value, (int, float)):
+                continue
+            change = (value - old) / old
+            worse = -change if key.endswith('_per_second') else change
+            rows.append(('{}.{}'.format(name, key), old, value, change,
+                         worse > threshold))
+    return rows
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('names', nargs='*',
+                        help='benchmarks to run, all by default: '
+                             + ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true',
+                        help='smaller payloads and fewer iterations')
+    parser.add_argument('--output', help='write the JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='JSON file of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change counted as a regression, '
+                             'default: 0.1')
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: ' + ', '.join(sorted(unknown)))
+
+    current = run(args.names or list(BENCHMARKS), args.quick)
+    output = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    elif not args.compare:
+        print(output)
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as file:
+        baseline = json.load(file)
+    regressed = False
+    for metric, old, new, change, worse in compare(
+            baseline, current, args.threshold):
+        regressed = regressed or worse
+        print('{:<45} {:>14.6g} {:>14.6g} {:>+8.1%}{}'.format(
+            metric, old, new, change, '  REGRESSION' if worse else ''))
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
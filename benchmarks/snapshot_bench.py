@@ -0,0 +1,54 @@
+"""
+Startup and lookup cost of a memory-mapped `Snapshot`.
+
+    python benchmarks/snapshot_bench.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import Inetnum, Snapshot  # noqa: E402
+from payloads import inetnum_record  # noqa: E402
+
+
+def run(count: int = 100000, lookups: int = 100000) -> dict:
+    inetnums = [Inetnum(inetnum_record(i)) for i in range(count)]
+    generator = random.Random(1)
+    addresses = ['1.{}.{}.7'.format(generator.randrange(256),
+                                    generator.randrange(256))
+                 for _ in range(lookups)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'netblocks.snap')
+        started = time.perf_counter()
+        Snapshot.write(path, inetnums)
+        write_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        snapshot = Snapshot(path)
+        open_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for address in addresses:
+            snapshot.longest_match(address)
+        elapsed = time.perf_counter() - started
+        snapshot.close()
+        size = os.path.getsize(path)
+
+    return {'count': count, 'write_seconds': write_seconds,
+            'open_seconds': open_seconds, 'bytes': size,
+            'lookups_per_second': lookups / elapsed}
+
+
+if __name__ == '__main__':
+    result = run()
+    print('Snapshot of {count} ranges: {mb:.1f} MB written in {write:.2f} s, '
+          'opened in {open:.0f} us, {rate:.0f} lookups/s'.format(
+              count=result['count'], mb=result['bytes'] / 1e6,
+              write=result['write_seconds'],
+              open=result['open_seconds'] * 1e6,
+              rate=result['lookups_per_second']))
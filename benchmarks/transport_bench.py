@@ -0,0 +1,98 @@
+"""
+End-to-end lookup latency and bulk throughput against a local stub
+server, so that the network and the API itself are left out.
+
+    python benchmarks/transport_bench.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ipnetblocks import Client, AsyncClient  # noqa: E402
+from ipnetblocks.net import async_http  # noqa: E402
+from ipnetblocks.testing import StubServer  # noqa: E402
+from payloads import response_json  # noqa: E402
+
+_API_KEY = 'at_' + 'a' * 29
+
+
+def _addresses(count: int) -> list:
+    return ['10.{}.{}.1'.format(i >> 8 & 0xff, i & 0xff)
+            for i in range(count)]
+
+
+def _bench_get(url: str, lookups: int) -> float:
+    with Client(_API_KEY, base_url=url) as client:
+        client.get('1.0.0.1')
+        started = time.perf_counter()
+        for _ in range(lookups):
+            client.get('1.0.0.1')
+        return (time.perf_counter() - started) / lookups
+
+
+def _bench_get_many(url: str, lookups: int, max_workers: int) -> float:
+    with Client(_API_KEY, base_url=url, pool_maxsize=max_workers) as client:
+        started = time.perf_counter()
+        results = client.get_many(_addresses(lookups),
+                                  max_workers=max_workers)
+        elapsed = time.perf_counter() - started
+    assert len(results) == lookups
+    return lookups / elapsed
+
+
+def _bench_async_get_many(url: str, lookups: int, max_workers: int) -> float:
+    async def lookup():
+        async with AsyncClient(_API_KEY, base_url=url) as client:
+            started = time.perf_counter()
+            results = await client.get_many(_addresses(lookups),
+                                            max_workers=max_workers)
+            elapsed = time.perf_counter() - started
+        assert len(results) == lookups
+        return lookups / elapsed
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(lookup())
+    finally:
+        loop.close()
+
+
+def run(count: int = 1000, lookups: int = 20, bulk_count: int = 10,
+        bulk_lookups: int = 500, max_workers: int = 8) -> dict:
+    """
+    :param count: Netblocks per response of the single lookups.
+    :param lookups: Number of single lookups.
+    :param bulk_count: Netblocks per response of the bulk lookups.
+    :param bulk_lookups: Number of bulk lookups.
+    :param max_workers: Concurrency of the bulk lookups.
+    """
+    body = response_json(count).encode('utf-8')
+    with StubServer(lambda query: (200, body)) as server:
+        get_seconds = _bench_get(server.url, lookups)
+
+    body = response_json(bulk_count).encode('utf-8')
+    with StubServer(lambda query: (200, body)) as server:
+        results = {
+            'count': count,
+            'get_seconds': get_seconds,
+            'bulk_count': bulk_count,
+            'get_many_per_second': _bench_get_many(
+                server.url, bulk_lookups, max_workers),
+        }
+        if async_http.aiohttp is not None:
+            results['async_get_many_per_second'] = _bench_async_get_many(
+                server.url, bulk_lookups, max_workers)
+    return results
+
+
+if __name__ == '__main__':
+    result = run()
+    print('get({count} inetnums): {ms:.1f} ms'.format(
+        count=result['count'], ms=result['get_seconds'] * 1e3))
+    for key in ('get_many_per_second', 'async_get_many_per_second'):
+        if key in result:
+            print('{}({} inetnums): {:.0f} lookups/s'.format(
+                key[:-len('_per_second')], result['bulk_count'], result[key]))
@@ -0,0 +1,70 @@
+"""
+Microbenchmark of IP address validation.
+
+Compares the regular expressions `Client` used to validate addresses
+with the integer parser of `ipnetblocks.address`.
+
+    python benchmarks/validation_bench.py
+"""
+import re
+import timeit
+
+from ipnetblocks import Client
+
+_re_ipv4 = re.compile(
+    r'^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}'
+    + r'([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$'
+)
+_re_ipv6 = re.compile(
+    r'^\s*((([0-9A-Fa-f]{1,4}:){7}([0-9A-Fa-f]{1,4}|:))|(([0-9A-Fa-f]{1,4}:){6}'
+    + r'(:[0-9A-Fa-f]{1,4}|((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3})|:))|'
+    + r'(([0-9A-Fa-f]{1,4}:){5}(((:[0-9A-Fa-f]{1,4}){1,2})|:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+    + r'(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3})|:))|(([0-9A-Fa-f]{1,4}:){4}'
+    + r'(((:[0-9A-Fa-f]{1,4}){1,3})|((:[0-9A-Fa-f]{1,4})?:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+    + r'(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){3}(((:[0-9A-Fa-f]{1,4}){1,4})'
+    + r'|((:[0-9A-Fa-f]{1,4}){0,2}:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+    + r'(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){2}'
+    + r'(((:[0-9A-Fa-f]{1,4}){1,5})|((:[0-9A-Fa-f]{1,4}){0,3}:'
+    + r'((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))'
+    + r'|(([0-9A-Fa-f]{1,4}:){1}(((:[0-9A-Fa-f]{1,4}){1,6})|((:[0-9A-Fa-f]{1,4}){0,4}:'
+    + r'((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|'
+    + r'(:(((:[0-9A-Fa-f]{1,4}){1,7})|((:[0-9A-Fa-f]{1,4}){0,5}:'
+    + r'((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:)))(%.+)?\s*$'
+)
+
+ADDRESSES = {
+    'ipv4': '203.0.113.195',
+    'ipv6': '2001:db8:85a3::8a2e:370:7334',
+}
+# Timings of code the library no longer runs, left out of comparisons
+REFERENCE_METRICS = frozenset('{}.regex'.format(name) for name in ADDRESSES)
+
+
+def regex_validate(value, mask):
+    # The former Client._validate_ip_address followed by _validate_mask
+    if not (_re_ipv4.search(str(value)) or _re_ipv6.search(str(value))):
+        raise ValueError()
+    if mask is not None and not \
+            ((0 < mask <= 128 and _re_ipv6.search(value)) or
+             (0 < mask <= 32 and _re_ipv4.search(value))):
+        raise ValueError()
+
+
+def parser_validate(value, mask):
+    Client._validate_mask(mask, Client._validate_ip_address(value))
+
+
+def run(number: int = 100000) -> dict:
+    results = {}
+    for name, value in ADDRESSES.items():
+        for label, fn in [('regex', regex_validate),
+                          ('parser', parser_validate)]:
+            seconds = min(timeit.repeat(lambda: fn(value, 24), number=number,
+                                        repeat=5))
+            results['{}.{}'.format(name, label)] = seconds / number * 1e9
+    return results
+
+
+if __name__ == '__main__':
+    for key, ns in run().items():
+        print('{:<12} {:>8.0f} ns/call'.format(key, ns))
@@ -68,10 +68,24 @@ setup(
         'whois',
         'whoisxmlapi',
     ],
+    entry_points={
+        'console_scripts': [
+            'ip-netblocks = ipnetblocks.cli:main',
+        ]
+    },
     install_requires=[
         'requests',
     ],
     extras_require={
+        'async': [
+            'aiohttp',
+        ],
+        'fast': [
+            'orjson',
+        ],
+        'numpy': [
+            'numpy',
+        ],
         'dev': [
             'tox',
             'flake8',
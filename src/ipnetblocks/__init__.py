@@ -1,13 +1,34 @@
-__all__ = ['Client', 'ErrorMessage', 'IpNetblocksApiError', 'ApiAuthError',
-           'HttpApiError', 'EmptyApiKeyError', 'ParameterError',
-           'ResponseError', 'BadRequestError', 'UnparsableApiResponseError',
-           'ApiRequester', 'Response', 'Inetnum', 'AutonomousSystem', 'Org',
-           'Maintainer', 'Contact']
+__all__ = ['Client', 'AsyncClient', 'ErrorMessage', 'IpNetblocksApiError',
+           'ApiAuthError', 'HttpApiError', 'EmptyApiKeyError',
+           'ParameterError', 'ResponseError', 'BadRequestError',
+           'UnparsableApiResponseError', 'ApiRequester', 'AsyncApiRequester',
+           'Response', 'Inetnum', 'AutonomousSystem', 'Org', 'Maintainer',
+           'Contact', 'RangeCache', 'ResponseCache', 'MemoryCache',
+           'SqliteCache', 'IpAddress', 'RateLimiter', 'TooManyRequestsError',
+           'RetryPolicy', 'RetryBudget', 'HedgePolicy',
+           'CircuitBreaker', 'CircuitOpenError', 'Instrumentation',
+           'MetricsCollector', 'LookupPlan', 'Snapshot', 'InetnumColumns',
+           'NetblockMatcher', 'Interner']
 
+from .address import IpAddress
 from .client import Client
+from .async_client import AsyncClient
+from .cache import RangeCache, ResponseCache, MemoryCache, SqliteCache, \
+    Snapshot
 from .net.http import ApiRequester
+from .net.async_http import AsyncApiRequester
+from .net.ratelimit import RateLimiter
+from .net.retry import RetryPolicy, RetryBudget
+from .net.hedge import HedgePolicy
+from .net.circuit import CircuitBreaker
+from .instrumentation import Instrumentation, MetricsCollector
+from .planner import LookupPlan
+from .columnar import InetnumColumns
+from .matcher import NetblockMatcher
+from .models.interning import Interner
 from .models.response import ErrorMessage, Response, Inetnum, AutonomousSystem,\
     Org, Maintainer, Contact
 from .exceptions.error import IpNetblocksApiError, ParameterError, \
     EmptyApiKeyError, ResponseError, UnparsableApiResponseError, \
-    ApiAuthError, BadRequestError, HttpApiError
+    ApiAuthError, BadRequestError, HttpApiError, TooManyRequestsError, \
+    CircuitOpenError
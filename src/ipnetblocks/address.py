@@ -0,0 +1,92 @@
+from socket import inet_pton, inet_ntop, AF_INET, AF_INET6
+
+_IPV4_MAPPED_PREFIX = 0xffff << 32
+
+
+class IpAddress:
+    """
+    Parsed and normalized IPv4 or IPv6 address.
+
+    `value` is the integer value of the address within its own family,
+    `mapped` is its value in the IPv6 space used by
+    `Inetnum.inetnum_first`/`Inetnum.inetnum_last`, where IPv4 addresses
+    are mapped to ::ffff:a.b.c.d.
+    """
+    __slots__ = ('version', 'value', 'prefix', '_text')
+
+    def __init__(self, version: int, value: int, prefix: int = None,
+                 text: str = None):
+        self.version = version
+        self.value = value
+        if prefix is None:
+            prefix = 32 if version == 4 else 128
+        self.prefix = prefix
+        self._text = text
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "IpAddress('{}/{}')".format(self.text, self.prefix)
+
+    def __eq__(self, other):
+        return isinstance(other, IpAddress) and \
+            (self.version, self.value, self.prefix) == \
+            (other.version, other.value, other.prefix)
+
+    def __hash__(self):
+        return hash((self.version, self.value, self.prefix))
+
+    @property
+    def text(self) -> str:
+        """Canonical textual form of the address"""
+        if self._text is None:
+            if self.version == 4:
+                packed = self.value.to_bytes(4, 'big')
+                self._text = inet_ntop(AF_INET, packed)
+            else:
+                packed = self.value.to_bytes(16, 'big')
+                self._text = inet_ntop(AF_INET6, packed)
+        return self._text
+
+    @property
+    def max_prefix(self) -> int:
+        return 32 if self.version == 4 else 128
+
+    @property
+    def mapped(self) -> int:
+        if self.version == 4:
+            return _IPV4_MAPPED_PREFIX | self.value
+        return self.value
+
+    def with_prefix(self, prefix: int) -> 'IpAddress':
+        """
+        The same address with another prefix length.
+
+        :raises ValueError: prefix is out of range for the address family
+        """
+        if not 0 <= prefix <= self.max_prefix:
+            raise ValueError("Prefix out of range")
+        return IpAddress(self.version, self.value, prefix, self._text)
+
+
+def parse_ip_address(value: str) -> IpAddress:
+    """
+    Parse the textual form of an IPv4 or IPv6 address.
+
+    Leading zeros in IPv4 octets, surrounding whitespace and IPv6 zone
+    indices are rejected.
+
+    :raises ValueError: value is not a valid address
+    """
+    if not isinstance(value, str):
+        raise ValueError("Address should be a str")
+    try:
+        if ':' in value:
+            packed = inet_pton(AF_INET6, value)
+            return IpAddress(6, int.from_bytes(packed, 'big'))
+        packed = inet_pton(AF_INET, value)
+        # a valid dotted quad is already in its canonical form
+        return IpAddress(4, int.from_bytes(packed, 'big'), text=value)
+    except (OSError, ValueError):
+        raise ValueError("Invalid IP address")
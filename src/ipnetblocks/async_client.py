@@ -0,0 +1,294 @@
+import asyncio
+import time
+
+from .bulk import amap_bounded
+from .cache.response import ResponseCache
+from .client import Client
+from .net.async_http import AsyncApiRequester
+from .instrumentation import LookupTrace
+from .planner import LookupPlan
+from .singleflight import AsyncSingleFlight
+from .stream import aiter_array
+from .exceptions.error import UnparsableApiResponseError, CircuitOpenError
+from .models.response import Response, Inetnum, LazyInetnum
+
+
+class AsyncClient(Client):
+    """
+    asyncio flavour of `Client`.
+
+    Requests share validation, payload building and response parsing with
+    `Client`, but are sent through a non-blocking `AsyncApiRequester`,
+    so a single event loop can keep many lookups in flight. A client is
+    bound to the event loop of its first lookup, close it before using it
+    in another one.
+    """
+    _api_requester: AsyncApiRequester or None
+
+    def __init__(self, api_key: str, **kwargs):
+        """
+        :param api_key: str: Your API key.
+        :key base_url: str: (optional) API endpoint URL.
+        :key timeout: float: (optional) API call timeout in seconds
+        :key pool_maxsize: int: (optional) Max number of keep-alive
+            connections per host. Default: 100
+        :key max_concurrency: int: (optional) Max number of requests
+            in flight. Default: 100
+        :key rate_limit: float or RateLimiter: (optional) Max number of
+            requests per second. Default: None
+        :key retry: RetryPolicy or bool: (optional) Send failed requests
+            again. Default: None
+        :key hedge: HedgePolicy or float: (optional) Send a duplicate of
+            slow lookups. Default: None
+        :key circuit_breaker: CircuitBreaker or bool: (optional) Fail
+            lookups fast during upstream outages. Default: None
+        :key instrumentation: Instrumentation: (optional) Event hooks of
+            the lookups and API calls. Default: None
+
+        Also accepts the `range_cache`, `cache`, `coalesce`, `lazy`,
+        `interner`, `json_decoder` and `serve_stale` keys of `Client`.
+        """
+        super().__init__(api_key, **kwargs)
+
+    @staticmethod
+    def _create_api_requester(**kwargs) -> AsyncApiRequester:
+        return AsyncApiRequester(**kwargs)
+
+    @staticmethod
+    def _create_single_flight() -> AsyncSingleFlight:
+        return AsyncSingleFlight()
+
+    def __enter__(self):
+        raise TypeError("Use `async with` with AsyncClient")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close all pooled connections of the underlying `AsyncApiRequester`.
+        """
+        await self._api_requester.close()
+
+    async def get(self, ip: str = None,
+                  asn: int = None,
+                  org: str = None,
+                  mask: int = None,
+                  limit: int = 100) -> Response:
+        """
+        Get parsed API response as a `Response` instance.
+
+        Accepts the same parameters and raises the same errors
+        as `Client.get`.
+        """
+        with self._lookup() as trace:
+            ip = Client._validate_ip_address(ip)
+            address = self._range_cache_address(ip, asn, org, mask)
+            if address is not None:
+                cached = self._range_cache.lookup(address)
+                if cached is not None:
+                    trace.source = 'range_cache'
+                    self.last_result = Client._cached_response(
+                        ip, cached, limit)
+                    return self.last_result
+
+            response = await self._get_content(self._prepare_payload(
+                ip, asn, org, mask, limit, Client._PARSABLE_FORMAT), trace)
+            result = self._parse_raw_result(response, trace)
+
+            if address is not None and result.count <= len(result.inetnums):
+                self._range_cache.add(result.inetnums, address)
+            return result
+
+    async def get_raw(self, ip: str = None,
+                      asn: int = None,
+                      org: str = None,
+                      mask: int = None,
+                      limit: int = 100,
+                      output_format:
+                      str = Client._PARSABLE_FORMAT) -> str:
+        """
+        Get raw API response.
+
+        Accepts the same parameters and raises the same errors
+        as `Client.get_raw`.
+        """
+        response = await self._get_content(self._prepare_payload(
+            ip, asn, org, mask, limit, output_format))
+        return Client._decode_content(response)
+
+    async def _get_content(self, payload: dict,
+                           trace: LookupTrace = None) -> bytes or str:
+        started = time.perf_counter()
+        try:
+            if self._cache is None and self._single_flight is None:
+                return await self._api_requester.get_content(payload)
+
+            key = ResponseCache.make_key(payload)
+            if self._cache is not None:
+                response = await self._call_cache(self._cache.get, key)
+                if response is not None:
+                    if trace is not None:
+                        trace.source = 'cache'
+                    return response
+            if self._single_flight is None:
+                return await self._fetch(payload, key, trace)
+            return await self._single_flight.do(
+                key, lambda: self._fetch(payload, key, trace))
+        finally:
+            if trace is not None:
+                trace.add('fetch', time.perf_counter() - started)
+
+    async def _fetch(self, payload: dict, key: str,
+                     trace: LookupTrace = None) -> bytes:
+        try:
+            response = await self._api_requester.get_content(payload)
+        except CircuitOpenError:
+            stale = await self._call_cache(self._get_stale, key)
+            if stale is None:
+                raise
+            if trace is not None:
+                trace.source = 'stale'
+            return stale
+        if self._cache is not None:
+            await self._call_cache(self._cache.set, key, response)
+        return response
+
+    async def _call_cache(self, fn, *args):
+        # blocking backends would stall every lookup of the event loop
+        if self._cache is None or not self._cache.blocking:
+            return fn(*args)
+        return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+
+    async def get_by_asn(self, asn: int, limit: int = 100) -> Response:
+        """
+        Get parsed API response as a `Response` instance.
+
+        Accepts the same parameters and raises the same errors
+        as `Client.get_by_asn`.
+        """
+        with self._lookup() as trace:
+            response = await self._get_content(self._prepare_payload(
+                None, asn, None, None, limit, Client._PARSABLE_FORMAT), trace)
+            return self._parse_raw_result(response, trace)
+
+    async def get_by_org(self, org: str, limit: int = 100) -> Response:
+        """
+        Get parsed API response as a `Response` instance.
+
+        Accepts the same parameters and raises the same errors
+        as `Client.get_by_org`.
+        """
+        with self._lookup() as trace:
+            response = await self._get_content(self._prepare_payload(
+                None, None, org, None, limit, Client._PARSABLE_FORMAT), trace)
+            return self._parse_raw_result(response, trace)
+
+    def iter_inetnums(self, ip: str = None,
+                      asn: int = None,
+                      org: str = None,
+                      mask: int = None,
+                      limit: int = 100):
+        """
+        Stream the netblocks of a lookup.
+
+        Accepts the same parameters as `Client.iter_inetnums`.
+
+        :return: async iterator of `Inetnum`
+        """
+        payload = self._prepare_payload(
+            ip, asn, org, mask, limit, Client._PARSABLE_FORMAT)
+        return self._iter_inetnums(payload)
+
+    async def _iter_inetnums(self, payload: dict):
+        model = LazyInetnum if self._lazy else Inetnum
+        interner = self._stream_interner()
+        chunks = self._api_requester.iter_content(payload)
+        try:
+            async for values in aiter_array(chunks, Client._INETNUMS_PATH):
+                yield model(values, interner)
+            # read the rest of the body so the connection returns to the pool
+            async for _ in chunks:
+                pass
+        except ValueError as error:
+            raise UnparsableApiResponseError(
+                "Could not parse API response", error)
+        finally:
+            await chunks.aclose()
+
+    def iter_many(self, values,
+                  field: str = 'ip',
+                  mask: int = None,
+                  limit: int = 100,
+                  max_workers: int = None,
+                  ordered: bool = False):
+        """
+        Look up many search terms concurrently.
+
+        Accepts the same parameters as `Client.iter_many`. `max_workers`
+        defaults to the `max_concurrency` of the `AsyncApiRequester`.
+
+        :return: async iterator of (value, `Response` or raised exception)
+            tuples
+        """
+        lookup = self._bulk_lookup(self.get, field, mask, limit)
+        if max_workers is None:
+            max_workers = self._api_requester.max_concurrency
+        return amap_bounded(lookup, values,
+                            self._validate_max_workers(max_workers),
+                            ordered)
+
+    async def get_many(self, values,
+                       field: str = 'ip',
+                       mask: int = None,
+                       limit: int = 100,
+                       max_workers: int = None) -> list:
+        """
+        Look up many search terms concurrently.
+
+        Same as `iter_many`, but collects the results in input order.
+
+        :return: list of (value, `Response` or raised exception) tuples
+        """
+        return [result async for result in self.iter_many(
+            values, field=field, mask=mask, limit=limit,
+            max_workers=max_workers, ordered=True)]
+
+    async def get_many_grouped(self, values,
+                               limit: int = 100,
+                               max_workers: int = None,
+                               ipv4_prefix: int = 24,
+                               ipv6_prefix: int = 48) -> list:
+        """
+        Look up many IP addresses, one API call per network where they
+        are dense.
+
+        Accepts the same parameters as `Client.get_many_grouped`.
+        `max_workers` defaults to the `max_concurrency` of the
+        `AsyncApiRequester`.
+
+        :return: list of (value, `Response` or raised exception) tuples
+            in input order
+        """
+        Client._validate_limit(limit)
+        if max_workers is None:
+            max_workers = self._api_requester.max_concurrency
+        max_workers = self._validate_max_workers(max_workers)
+        plan = LookupPlan(values, ipv4_prefix, ipv6_prefix)
+        answers = {}
+        missing = []
+        async for (network, members), response in amap_bounded(
+                self._network_lookup, plan.networks, max_workers):
+            missing.extend(LookupPlan.fan_out(members, response, limit,
+                                              answers))
+        async for (key, value), response in amap_bounded(
+                lambda item: self.get(ip=item[1], limit=limit),
+                plan.pending(missing), max_workers):
+            answers[key] = response
+        return plan.results(answers)
@@ -0,0 +1,94 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _call(fn, value):
+    try:
+        return value, fn(value)
+    except Exception as error:
+        return value, error
+
+
+async def _acall(fn, value):
+    try:
+        return value, await fn(value)
+    except Exception as error:
+        return value, error
+
+
+def _next_done(pending: deque, ordered: bool) -> list:
+    if ordered:
+        return [pending.popleft().result()]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return [future.result() for future in done]
+
+
+async def _anext_done(pending: deque, ordered: bool) -> list:
+    if ordered:
+        return [await pending.popleft()]
+    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    for task in done:
+        pending.remove(task)
+    return [task.result() for task in done]
+
+
+def map_bounded(fn, values, max_workers: int, ordered: bool = False):
+    """
+    Apply `fn` to every item of `values` using a pool of threads.
+
+    At most `2 * max_workers` items are taken from `values` ahead of the
+    consumer, so arbitrarily large generators are processed in constant
+    memory.
+
+    :param fn: callable applied to each item
+    :param values: iterable of items
+    :param max_workers: number of worker threads
+    :param ordered: yield results in input order instead of completion order
+    :return: iterator of (item, result or raised exception) tuples
+    """
+    window = 2 * max_workers
+    values = iter(values)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for value in values:
+                pending.append(executor.submit(_call, fn, value))
+                if len(pending) >= window:
+                    yield from _next_done(pending, ordered)
+            while pending:
+                yield from _next_done(pending, ordered)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def amap_bounded(fn, values, max_workers: int, ordered: bool = False):
+    """
+    asyncio counterpart of `map_bounded` for coroutine functions.
+
+    :param fn: coroutine function applied to each item
+    :param values: iterable of items
+    :param max_workers: max number of items processed concurrently
+    :param ordered: yield results in input order instead of completion order
+    :return: async iterator of (item, result or raised exception) tuples
+    """
+    window = 2 * max_workers
+    values = iter(values)
+    pending = deque()
+
+    try:
+        for value in values:
+            pending.append(asyncio.ensure_future(_acall(fn, value)))
+            if len(pending) >= window:
+                for result in await _anext_done(pending, ordered):
+                    yield result
+        while pending:
+            for result in await _anext_done(pending, ordered):
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
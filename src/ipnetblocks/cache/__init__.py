@@ -0,0 +1,6 @@
+__all__ = ['RangeCache', 'ResponseCache', 'MemoryCache', 'SqliteCache',
+           'Snapshot', 'SnapshotRecord']
+
+from .range import RangeCache
+from .response import ResponseCache, MemoryCache, SqliteCache
+from .snapshot import Snapshot, SnapshotRecord
@@ -0,0 +1,255 @@
+from bisect import bisect_right, bisect_left
+from collections import OrderedDict
+import threading
+import time
+
+from ..models.response import Inetnum
+
+
+class RangeCache:
+    """
+    Interval index of the `Inetnum` ranges returned by IP lookups.
+
+    Ranges are kept sorted by `inetnum_first` in buckets of bounded size,
+    with a max segment tree over the largest `inetnum_last` of every
+    bucket, so that the ranges covering an address are found with
+    a binary search and a backward scan skipping the buckets that end
+    before the address. Adding or evicting a range updates its bucket
+    and a path of the tree instead of a pass over the whole index.
+
+    An address is answered locally only when it falls into a range that
+    was the most specific answer of an earlier lookup, so addresses that
+    merely share a large parent block still go to the API.
+    """
+    _BUCKET_SIZE = 512
+    _max_size: int
+    _ttl: float
+
+    def __init__(self, max_size: int = 100000, ttl: float = 3600):
+        """
+        :param max_size: Max number of ranges to keep. Default: 100000
+        :param ttl: Time in seconds a range stays valid. Default: 3600
+        """
+        if not isinstance(max_size, int) or max_size <= 0:
+            raise ValueError("max_size should be a positive int")
+        if ttl is None or ttl <= 0:
+            raise ValueError("ttl should be a positive number")
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._reset()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'size': len(self._entries),
+        }
+
+    def add(self, inetnums: [Inetnum], address: int or None = None):
+        """
+        Index ranges returned by a lookup.
+
+        :param inetnums: Ranges returned by the API.
+        :param address: `IpAddress.mapped` of the looked up address.
+            The most specific range covering it makes later lookups
+            of the addresses within that range local.
+        """
+        expires = time.monotonic() + self._ttl
+        leaf = None
+        if address is not None:
+            covering = [x for x in inetnums
+                        if x.inetnum_first <= address <= x.inetnum_last]
+            if covering:
+                leaf = min(covering,
+                           key=lambda x: x.inetnum_last - x.inetnum_first)
+
+        with self._lock:
+            for inetnum in inetnums:
+                key = (inetnum.inetnum_first, inetnum.inetnum_last,
+                       inetnum.source, inetnum.netname)
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = [inetnum, expires, False]
+                    self._entries[key] = entry
+                    self._insert(key)
+                else:
+                    entry[0] = inetnum
+                    entry[1] = expires
+                    self._entries.move_to_end(key)
+                if inetnum is leaf:
+                    entry[2] = True
+            self._evict()
+
+    def lookup(self, address: int) -> [Inetnum] or None:
+        """
+        Cached ranges covering the address, most specific first.
+
+        :param address: `IpAddress.mapped` of the address.
+        :return: list of `Inetnum` or None if the address can't be
+            answered locally
+        """
+        now = time.monotonic()
+        found = []
+        authoritative = False
+
+        with self._lock:
+            b = bisect_right(self._mins, address) - 1
+            i = bisect_right(self._starts[b], address) if b >= 0 else 0
+            while b >= 0 and self._prefix_max(b) >= address:
+                if self._max_last[b] >= address:
+                    keys = self._keys[b]
+                    for j in range(i - 1, -1, -1):
+                        if keys[j][1] < address:
+                            continue
+                        inetnum, expires, leaf = self._entries[keys[j]]
+                        if expires > now:
+                            found.append(inetnum)
+                            authoritative = authoritative or leaf
+                b -= 1
+                i = len(self._keys[b])
+
+            if not authoritative:
+                self._misses += 1
+                return None
+            self._hits += 1
+
+        found.sort(key=lambda x: x.inetnum_last - x.inetnum_first)
+        return found
+
+    def ranges(self) -> [Inetnum]:
+        """Ranges not expired yet, sorted by `inetnum_first`"""
+        now = time.monotonic()
+        with self._lock:
+            return [self._entries[key][0] for keys in self._keys
+                    for key in keys if self._entries[key][1] > now]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._reset()
+
+    def _reset(self):
+        # Buckets: start and key lists sorted by start, the first start
+        # and the max last of every bucket, and a max segment tree over
+        # the latter, its leaves from `_leaves` on
+        self._starts = [[]]
+        self._keys = [[]]
+        self._mins = [0]
+        self._max_last = [-1]
+        self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        leaves = 1
+        while leaves < len(self._max_last):
+            leaves *= 2
+        tree = [-1] * leaves + self._max_last + \
+            [-1] * (leaves - len(self._max_last))
+        for i in range(leaves - 1, 0, -1):
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+        self._leaves = leaves
+        self._tree = tree
+
+    def _set_max_last(self, b: int, value: int):
+        self._max_last[b] = value
+        i = self._leaves + b
+        tree = self._tree
+        tree[i] = value
+        i //= 2
+        while i:
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+            i //= 2
+
+    def _prefix_max(self, b: int) -> int:
+        # max last of the buckets up to b
+        tree = self._tree
+        result = -1
+        low, high = self._leaves, self._leaves + b + 1
+        while low < high:
+            if low & 1:
+                result = max(result, tree[low])
+                low += 1
+            if high & 1:
+                high -= 1
+                result = max(result, tree[high])
+            low //= 2
+            high //= 2
+        return result
+
+    def _insert(self, key: tuple):
+        b = max(bisect_right(self._mins, key[0]) - 1, 0)
+        starts, keys = self._starts[b], self._keys[b]
+        i = bisect_right(starts, key[0])
+        starts.insert(i, key[0])
+        keys.insert(i, key)
+        self._mins[b] = starts[0]
+        if len(keys) > 2 * self._BUCKET_SIZE:
+            self._split(b)
+        elif key[1] > self._max_last[b]:
+            self._set_max_last(b, key[1])
+
+    def _split(self, b: int):
+        half = len(self._keys[b]) // 2
+        starts, keys = self._starts[b], self._keys[b]
+        self._starts[b:b + 1] = [starts[:half], starts[half:]]
+        self._keys[b:b + 1] = [keys[:half], keys[half:]]
+        self._mins[b:b + 1] = [starts[0], starts[half]]
+        self._max_last[b:b + 1] = [max(k[1] for k in keys[:half]),
+                                   max(k[1] for k in keys[half:])]
+        self._rebuild_tree()
+
+    def _remove(self, key: tuple):
+        # ranges with the same start may span several buckets
+        b = max(bisect_left(self._mins, key[0]) - 1, 0)
+        while True:
+            starts, keys = self._starts[b], self._keys[b]
+            i = bisect_left(starts, key[0])
+            while i < len(keys) and starts[i] == key[0]:
+                if keys[i] == key:
+                    break
+                i += 1
+            if i < len(keys) and keys[i] == key:
+                break
+            b += 1
+
+        del starts[i]
+        del keys[i]
+        if not keys and len(self._keys) > 1:
+            del self._starts[b]
+            del self._keys[b]
+            del self._mins[b]
+            del self._max_last[b]
+            self._rebuild_tree()
+            return
+        if keys:
+            self._mins[b] = starts[0]
+        if key[1] == self._max_last[b]:
+            self._set_max_last(b, max((k[1] for k in keys), default=-1))
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self._max_size and entry[1] > now:
+                break
+            del self._entries[key]
+            self._remove(key)
+            self._evictions += 1
@@ -0,0 +1,273 @@
+from collections import OrderedDict
+from json import dumps
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Base class of raw API response caches.
+
+    Backends implement `_get`, `_get_stale`, `_set` and `_clear`; hit and
+    miss counters are maintained here, evictions are counted by the
+    backends. Counters are updated under `_lock`, which backends also use
+    to guard their storage. Backends doing I/O set `blocking`, so that
+    `AsyncClient` calls them from a thread pool instead of the event loop.
+    """
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+        }
+
+    def get(self, key: str) -> bytes or str or None:
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def get_stale(self, key: str) -> bytes or str or None:
+        """
+        Response kept past its TTL, served while the API is unavailable.
+        See the `stale_ttl` of the backends.
+        """
+        return self._get_stale(key)
+
+    def set(self, key: str, value: bytes or str):
+        self._set(key, value)
+
+    def clear(self):
+        self._clear()
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def make_key(payload: dict) -> str:
+        """
+        Cache key of a request payload. The API key is not a part of it.
+        """
+        return dumps({k: v for (k, v) in payload.items() if k != 'apiKey'},
+                     sort_keys=True, separators=(',', ':'))
+
+    def _get(self, key: str) -> bytes or str or None:
+        raise NotImplementedError()
+
+    def _get_stale(self, key: str) -> bytes or str or None:
+        raise NotImplementedError()
+
+    def _set(self, key: str, value: bytes or str):
+        raise NotImplementedError()
+
+    def _clear(self):
+        raise NotImplementedError()
+
+
+class MemoryCache(ResponseCache):
+    """
+    In-process cache with LRU and TTL eviction.
+    """
+    _max_size: int
+    _ttl: float
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600,
+                 stale_ttl: float = 0):
+        """
+        :param max_size: Max number of responses to keep. Default: 1024
+        :param ttl: Time in seconds a response stays valid. Default: 3600
+        :param stale_ttl: Time in seconds an expired response is kept
+            for `get_stale`. Default: 0
+        """
+        super().__init__()
+        if not isinstance(max_size, int) or max_size <= 0:
+            raise ValueError("max_size should be a positive int")
+        if ttl is None or ttl <= 0:
+            raise ValueError("ttl should be a positive number")
+        if stale_ttl is None or stale_ttl < 0:
+            raise ValueError("stale_ttl should be a non-negative number")
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def stale_ttl(self) -> float:
+        return self._stale_ttl
+
+    def _get(self, key: str) -> bytes or str or None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if entry[1] <= now:
+                if entry[1] + self._stale_ttl <= now:
+                    del self._entries[key]
+                    self._evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _get_stale(self, key: str) -> bytes or str or None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or \
+                    entry[1] + self._stale_ttl <= time.monotonic():
+                return None
+            return entry[0]
+
+    def _set(self, key: str, value: bytes or str):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteCache(ResponseCache):
+    """
+    On-disk cache in an SQLite database, shared across process restarts.
+
+    Expired responses are dropped on read; once `max_size` is exceeded
+    the least recently stored responses are evicted. The row count is
+    kept in memory, so a database should be written by a single process
+    at a time.
+    """
+    blocking = True
+    _max_size: int or None
+    _ttl: float
+
+    def __init__(self, path: str, max_size: int = None, ttl: float = 86400,
+                 stale_ttl: float = 0):
+        """
+        :param path: Database file path.
+        :param max_size: Max number of responses to keep or None for
+            unlimited. Default: None
+        :param ttl: Time in seconds a response stays valid. Default: 86400
+        :param stale_ttl: Time in seconds an expired response is kept
+            for `get_stale`. Default: 0
+        """
+        super().__init__()
+        if max_size is not None and \
+                (not isinstance(max_size, int) or max_size <= 0):
+            raise ValueError("max_size should be a positive int or None")
+        if ttl is None or ttl <= 0:
+            raise ValueError("ttl should be a positive number")
+        if stale_ttl is None or stale_ttl < 0:
+            raise ValueError("stale_ttl should be a non-negative number")
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'stored REAL NOT NULL, expires REAL NOT NULL)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS responses_stored '
+                'ON responses (stored)')
+        self._count = self._connection.execute(
+            'SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @property
+    def max_size(self) -> int or None:
+        return self._max_size
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def stale_ttl(self) -> float:
+        return self._stale_ttl
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _get(self, key: str) -> bytes or str or None:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value, expires FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if row[1] <= now:
+                if row[1] + self._stale_ttl <= now:
+                    with self._connection:
+                        self._connection.execute(
+                            'DELETE FROM responses WHERE key = ?', (key,))
+                    self._count -= 1
+                    self._evictions += 1
+                return None
+            return row[0]
+
+    def _get_stale(self, key: str) -> bytes or str or None:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value FROM responses WHERE key = ? AND expires > ?',
+                (key, time.time() - self._stale_ttl)).fetchone()
+            return None if row is None else row[0]
+
+    def _set(self, key: str, value: bytes or str):
+        now = time.time()
+        with self._lock, self._connection:
+            exists = self._connection.execute(
+                'SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone()
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses (key, value, stored, expires) '
+                'VALUES (?, ?, ?, ?)', (key, value, now, now + self._ttl))
+            if exists is None:
+                self._count += 1
+            if self._max_size is not None and self._count > self._max_size:
+                # walks the oldest rows of the `stored` index only
+                evicted = self._connection.execute(
+                    'DELETE FROM responses WHERE key IN ('
+                    'SELECT key FROM responses ORDER BY stored, rowid LIMIT ?)',
+                    (self._count - self._max_size,)).rowcount
+                self._count -= max(evicted, 0)
+                self._evictions += max(evicted, 0)
+
+    def _clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+            self._count = 0
@@ -0,0 +1,291 @@
+from array import array
+from collections import namedtuple
+import mmap
+import os
+import struct
+import sys
+
+from ..address import IpAddress, parse_ip_address
+from ..models.response import Inetnum
+
+SnapshotRecord = namedtuple('SnapshotRecord', [
+    'inetnum_first', 'inetnum_last', 'inetnum', 'netname', 'country',
+    'asn', 'org', 'source', 'parent'])
+SnapshotRecord.__doc__ = """
+Netblock of a `Snapshot`. Bounds are in the IPv6 space of
+`Inetnum.inetnum_first`, `asn` is 0 and `org` is the org name or ''
+when unknown.
+"""
+
+_STRING_FIELDS = ('inetnum', 'netname', 'country', 'org', 'source', 'parent')
+_FIELD_IDS = struct.Struct('<{}I'.format(len(_STRING_FIELDS)))
+_ADDRESS_SPACE = 1 << 128
+
+# magic, format version, field count, records, segments, cover entries,
+# strings, then the offsets of the sections below
+_HEADER = struct.Struct('<8sHHIIII9Q')
+_HEADER_SIZE = 128
+
+
+def _u32_array(values) -> bytes:
+    values = array('I', values)
+    if values.itemsize != 4:
+        values = array('L', values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _u128_array(values) -> bytes:
+    return b''.join(value.to_bytes(16, 'big') for value in values)
+
+
+def _string_of(inetnum: Inetnum, field: str) -> str:
+    if field == 'org':
+        org = inetnum.org
+        return org.name if org else ''
+    return getattr(inetnum, field, '') or ''
+
+
+class Snapshot:
+    """
+    Read-only netblock index memory-mapped from a file.
+
+    `Snapshot.write` dumps `Inetnum` ranges, e.g. those of
+    `RangeCache.ranges`, into a compact binary file, which is then opened
+    with no parsing: lookups binary search the mapped arrays directly, and
+    worker processes opening the same file share its pages.
+
+    The file holds the ranges sorted by start, as fixed-width big-endian
+    128 bit start and end arrays (a pair of uint64 each, high word first)
+    with an ASN array and string ids into a deduplicated string heap.
+    It also holds the ranges flattened into disjoint segments, each
+    pointing to the ranges covering it, most specific first, so that
+    nested and overlapping ranges are resolved by a single binary search.
+    """
+    MAGIC = b'IPNBSNAP'
+    VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        :param path: File written by `Snapshot.write`.
+        :raises ValueError: not a snapshot file or unsupported version
+        """
+        self._path = path
+        with open(path, 'rb') as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mm) < _HEADER_SIZE:
+                raise ValueError("Not a snapshot file")
+            (magic, version, fields, self._count, self._segment_count,
+             covers, strings, self._starts, self._ends, self._asns,
+             self._fields, self._segment_starts, self._segment_covers,
+             self._covers, self._string_offsets, self._heap) = \
+                _HEADER.unpack_from(self._mm, 0)
+            if magic != Snapshot.MAGIC:
+                raise ValueError("Not a snapshot file")
+            if version != Snapshot.VERSION or fields != len(_STRING_FIELDS):
+                raise ValueError(
+                    "Unsupported snapshot version {}".format(version))
+        except ValueError:
+            self._mm.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int) -> SnapshotRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Snapshot index out of range")
+        mm = self._mm
+        first = int.from_bytes(
+            mm[self._starts + index * 16:self._starts + index * 16 + 16],
+            'big')
+        last = int.from_bytes(
+            mm[self._ends + index * 16:self._ends + index * 16 + 16], 'big')
+        asn, = struct.unpack_from('<I', mm, self._asns + index * 4)
+        ids = _FIELD_IDS.unpack_from(mm, self._fields
+                                     + index * _FIELD_IDS.size)
+        inetnum, netname, country, org, source, parent = \
+            (self._string(i) for i in ids)
+        return SnapshotRecord(first, last, inetnum, netname, country, asn,
+                              org, source, parent)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def close(self):
+        self._mm.close()
+
+    def lookup(self, address) -> [SnapshotRecord]:
+        """
+        Ranges covering the address, most specific first.
+
+        :param address: IP address as a str, an `IpAddress` or its
+            `IpAddress.mapped` value.
+        :return: list of `SnapshotRecord`, empty if none covers it
+        :raises ValueError: invalid address
+        """
+        return [self[i] for i in self._covering(address)]
+
+    def longest_match(self, address) -> SnapshotRecord or None:
+        """
+        The most specific range covering the address.
+
+        :param address: See `lookup`.
+        :return: `SnapshotRecord` or None if no range covers it
+        """
+        covering = self._covering(address)
+        return self[covering[0]] if covering else None
+
+    def _covering(self, address) -> tuple:
+        key = Snapshot._mapped(address).to_bytes(16, 'big')
+        mm = self._mm
+        base = self._segment_starts
+        low, high = 0, self._segment_count
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + middle * 16
+            if mm[offset:offset + 16] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return ()
+        start, count = struct.unpack_from(
+            '<II', mm, self._segment_covers + (low - 1) * 8)
+        return struct.unpack_from('<{}I'.format(count), mm,
+                                  self._covers + start * 4)
+
+    def _string(self, index: int) -> str:
+        start, end = struct.unpack_from('<II', self._mm,
+                                        self._string_offsets + index * 4)
+        return self._mm[self._heap + start:self._heap + end].decode('utf-8')
+
+    @staticmethod
+    def _mapped(address) -> int:
+        if isinstance(address, str):
+            address = parse_ip_address(address)
+        if isinstance(address, IpAddress):
+            return address.mapped
+        if isinstance(address, int) and 0 <= address < _ADDRESS_SPACE:
+            return address
+        raise ValueError("Invalid IP address")
+
+    @staticmethod
+    def write(path: str, inetnums) -> int:
+        """
+        Write a snapshot of `Inetnum` ranges.
+
+        Ranges with the same bounds, source and netname are written once.
+        The file is replaced atomically, so processes that still map the
+        previous version keep reading it.
+
+        :param path: Destination file.
+        :param inetnums: Iterable of `Inetnum`.
+        :return: number of ranges written
+        """
+        unique = {}
+        for inetnum in inetnums:
+            key = (inetnum.inetnum_first, inetnum.inetnum_last,
+                   inetnum.source, inetnum.netname)
+            unique[key] = inetnum
+        keys = sorted(unique, key=lambda k: (k[0], -k[1], k[2] or '',
+                                             k[3] or ''))
+        records = [unique[key] for key in keys]
+
+        strings = {'': 0}
+        field_ids = []
+        for inetnum in records:
+            for field in _STRING_FIELDS:
+                value = _string_of(inetnum, field)
+                field_ids.append(strings.setdefault(value, len(strings)))
+        heap = [value.encode('utf-8') for value in strings]
+        string_offsets = [0]
+        for value in heap:
+            string_offsets.append(string_offsets[-1] + len(value))
+
+        segment_starts, segment_covers, covers = Snapshot._segments(records)
+
+        sections = [
+            _u128_array(x.inetnum_first for x in records),
+            _u128_array(x.inetnum_last for x in records),
+            _u32_array(x.AS.asn if x.AS else 0 for x in records),
+            _u32_array(field_ids),
+            _u128_array(segment_starts),
+            _u32_array(segment_covers),
+            _u32_array(covers),
+            _u32_array(string_offsets),
+            b''.join(heap),
+        ]
+        offsets = []
+        position = _HEADER_SIZE
+        for section in sections:
+            offsets.append(position)
+            # sections start on 8 byte boundaries
+            position += (len(section) + 7) // 8 * 8
+        header = _HEADER.pack(
+            Snapshot.MAGIC, Snapshot.VERSION, len(_STRING_FIELDS),
+            len(records), len(segment_starts), len(covers), len(heap),
+            *offsets)
+
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            with open(temporary, 'wb') as file:
+                file.write(header.ljust(_HEADER_SIZE, b'\0'))
+                for section in sections:
+                    file.write(section)
+                    file.write(b'\0' * (-len(section) % 8))
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return len(records)
+
+    @staticmethod
+    def _segments(records: list) -> tuple:
+        # Sweep the range boundaries keeping the ranges covering the
+        # current segment. A segment starts wherever that set changes.
+        events = {}
+        for i, inetnum in enumerate(records):
+            events.setdefault(inetnum.inetnum_first, ([], []))[0].append(i)
+            end = inetnum.inetnum_last + 1
+            if end < _ADDRESS_SPACE:
+                events.setdefault(end, ([], []))[1].append(i)
+
+        active = set()
+        lists = {(): 0}
+        covers = []
+        segment_starts = []
+        segment_covers = []
+        previous = None
+        for boundary in sorted(events):
+            starting, ending = events[boundary]
+            active.difference_update(ending)
+            active.update(starting)
+            cover = tuple(sorted(
+                active, key=lambda i: (records[i].inetnum_last
+                                       - records[i].inetnum_first, i)))
+            if cover == previous:
+                continue
+            previous = cover
+            start = lists.get(cover)
+            if start is None:
+                start = lists[cover] = len(covers)
+                covers.extend(cover)
+            segment_starts.append(boundary)
+            segment_covers.extend((start, len(cover)))
+        return segment_starts, segment_covers, covers
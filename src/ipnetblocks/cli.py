@@ -0,0 +1,387 @@
+import argparse
+from collections import OrderedDict, deque
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from .address import parse_ip_address
+from .cache.range import RangeCache
+from .client import Client
+from .models.response import Response
+from .exceptions.error import IpNetblocksApiError, ApiAuthError, \
+    ParameterError
+
+_API_KEY_ENV = 'IP_NETBLOCKS_API_KEY'
+_FORMATS = ('jsonl', 'csv')
+_FIELDS = ('ip', 'inetnum', 'netname', 'country', 'city', 'asn', 'as_name',
+           'as_route', 'org_name', 'org_country', 'source', 'modified',
+           'error')
+_re_separator = re.compile(r'[\s,;]')
+
+
+class _Checkpoint:
+    """
+    Progress of an `enrich` run: the number of input lines whose rows
+    are all written and the size of the output at that point.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict or None:
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: dict):
+        # the previous checkpoint stays valid until the new one is complete
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _Addresses:
+    """
+    IP addresses of the input lines: the first field of every line,
+    skipping blank lines, comments and recently seen addresses.
+
+    Line numbers of the yielded addresses are queued in `lines`.
+    """
+
+    def __init__(self, file, skip: int, window: int):
+        self._file = file
+        self._skip = skip
+        self._window = window
+        self._seen = OrderedDict()
+        self.lines = deque()
+        self.read = skip
+        self.duplicates = 0
+
+    def __iter__(self):
+        for number, line in enumerate(self._file, 1):
+            if number <= self._skip:
+                continue
+            self.read = number
+            fields = _re_separator.split(line.strip(), 1)
+            if not fields[0] or fields[0].startswith('#'):
+                continue
+            address = _canonical(fields[0])
+            if self._is_duplicate(address):
+                self.duplicates += 1
+                continue
+            self.lines.append(number)
+            yield address
+
+    def _is_duplicate(self, address: str) -> bool:
+        if self._window <= 0:
+            return False
+        if address in self._seen:
+            self._seen.move_to_end(address)
+            return True
+        self._seen[address] = None
+        if len(self._seen) > self._window:
+            self._seen.popitem(last=False)
+        return False
+
+
+def _canonical(value: str) -> str:
+    try:
+        return parse_ip_address(value).text
+    except ValueError:
+        # reported by the lookup
+        return value
+
+
+def _error_message(error: Exception, api_key: str) -> str:
+    if isinstance(error, IpNetblocksApiError):
+        message = str(error.message)
+    else:
+        message = str(error)
+    # connection errors quote the request URL
+    return '{}: {}'.format(type(error).__name__,
+                           message.replace(api_key, '***'))
+
+
+def _row(address: str, result: Response or Exception,
+         api_key: str) -> dict:
+    row = dict.fromkeys(_FIELDS)
+    row['ip'] = address
+    if isinstance(result, Exception):
+        row['error'] = _error_message(result, api_key)
+        return row
+
+    mapped = parse_ip_address(address).mapped
+    covering = [x for x in result.inetnums
+                if x.inetnum_first <= mapped <= x.inetnum_last]
+    if not covering:
+        return row
+    inetnum = min(covering, key=lambda x: x.inetnum_last - x.inetnum_first)
+    row['inetnum'] = inetnum.inetnum
+    row['netname'] = inetnum.netname
+    row['country'] = inetnum.country
+    row['city'] = inetnum.city
+    row['source'] = inetnum.source
+    if inetnum.modified:
+        row['modified'] = inetnum.modified.isoformat()
+    if inetnum.AS:
+        row['asn'] = inetnum.AS.asn
+        row['as_name'] = inetnum.AS.name
+        row['as_route'] = inetnum.AS.route
+    if inetnum.org:
+        row['org_name'] = inetnum.org.name
+        row['org_country'] = inetnum.org.country
+    return row
+
+
+def _format_jsonl(row: dict) -> str:
+    return json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def _csv_formatter():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, _FIELDS, lineterminator='\n')
+
+    def format_row(row: dict) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    return format_row
+
+
+def _csv_header() -> str:
+    return ','.join(_FIELDS) + '\n'
+
+
+def _output_format(args) -> str:
+    if args.format is not None:
+        return args.format
+    if args.output is not None and args.output.lower().endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def _create_client(args) -> Client:
+    kwargs = {}
+    if args.base_url is not None:
+        kwargs['base_url'] = args.base_url
+    range_cache = RangeCache(args.range_cache_size) \
+        if args.range_cache_size > 0 else None
+    return Client(args.api_key, pool_maxsize=args.concurrency, retry=True,
+                  rate_limit=args.rate_limit, range_cache=range_cache,
+                  **kwargs)
+
+
+def enrich(args) -> int:
+    try:
+        client = _create_client(args)
+    except ParameterError as error:
+        print('error: {}'.format(error.message), file=sys.stderr)
+        return 2
+    except ValueError as error:
+        print('error: {}'.format(error), file=sys.stderr)
+        return 2
+
+    output_format = _output_format(args)
+    checkpoint = None
+    if args.output is not None and args.output != '-':
+        checkpoint = _Checkpoint(args.checkpoint
+                                 or args.output + '.checkpoint')
+
+    state = {'input': args.input, 'format': output_format, 'line': 0,
+             'offset': 0}
+    if args.resume and checkpoint is not None:
+        saved = checkpoint.load()
+        if saved is not None:
+            if (saved.get('input'), saved.get('format')) != \
+                    (args.input, output_format):
+                print('error: the checkpoint {} belongs to another run'
+                      .format(checkpoint.path), file=sys.stderr)
+                client.close()
+                return 1
+            state = saved
+
+    if checkpoint is None:
+        output = sys.stdout.buffer
+    elif state['offset'] > 0:
+        # rows written after the checkpoint are written again
+        try:
+            output = open(args.output, 'r+b')
+        except OSError as error:
+            print('error: cannot resume into {}: {}'
+                  .format(args.output, error.strerror), file=sys.stderr)
+            client.close()
+            return 1
+        output.truncate(state['offset'])
+        output.seek(state['offset'])
+    else:
+        output = open(args.output, 'wb')
+    source = sys.stdin if args.input == '-' else \
+        open(args.input, encoding='utf-8', errors='replace')
+
+    format_row = _csv_formatter() if output_format == 'csv' \
+        else _format_jsonl
+    if output_format == 'csv' and state['offset'] == 0:
+        output.write(_csv_header().encode('utf-8'))
+
+    addresses = _Addresses(source, state['line'], args.dedupe_window)
+    started = time.monotonic()
+    written = errors = 0
+    status = 0
+
+    def save():
+        output.flush()
+        if checkpoint is not None:
+            os.fsync(output.fileno())
+            state['offset'] = output.tell()
+            checkpoint.save(state)
+
+    try:
+        for address, result in client.iter_many(
+                addresses, limit=args.limit, max_workers=args.concurrency,
+                ordered=True):
+            if isinstance(result, ApiAuthError):
+                raise result
+            row = _row(address, result, args.api_key)
+            output.write(format_row(row).encode('utf-8'))
+            state['line'] = addresses.lines.popleft()
+            written += 1
+            errors += isinstance(result, Exception)
+            if written % args.checkpoint_every == 0:
+                save()
+        state['line'] = addresses.read
+        output.flush()
+        if checkpoint is not None:
+            checkpoint.remove()
+    except ApiAuthError as error:
+        print('error: {}'.format(_error_message(error, args.api_key)),
+              file=sys.stderr)
+        save()
+        status = 1
+    except KeyboardInterrupt:
+        save()
+        status = 130
+    finally:
+        client.close()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    if not args.quiet:
+        hits = client.range_cache.stats['hits'] if client.range_cache else 0
+        print('{lines} lines, {rows} rows, {duplicates} duplicates, '
+              '{errors} errors, {hits} range cache hits in {elapsed:.1f}s'
+              .format(lines=state['line'], rows=written,
+                      duplicates=addresses.duplicates, errors=errors,
+                      hits=hits,
+                      elapsed=time.monotonic() - started), file=sys.stderr)
+    return status
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("should be a positive int")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("should be a non-negative int")
+    return number
+
+
+def _limit(value: str) -> int:
+    number = int(value)
+    if not 0 < number <= 1000:
+        raise argparse.ArgumentTypeError("should be between 1 and 1000")
+    return number
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='ip-netblocks',
+        description='IP Netblocks API command line client.')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    command = commands.add_parser(
+        'enrich',
+        help='look up the netblocks of IP addresses read line by line',
+        description='Look up the most specific netblock of every IP '
+                    'address of the input, one address per line, the '
+                    'first field of the line. Rows are written in input '
+                    'order as the lookups complete. Progress of a file '
+                    'output is checkpointed, so that an interrupted run '
+                    'can continue with --resume.')
+    command.add_argument('input', nargs='?', default='-',
+                         help='file of IP addresses, default: stdin')
+    command.add_argument('-o', '--output',
+                         help='output file, default: stdout')
+    command.add_argument('-f', '--format', choices=_FORMATS,
+                         help='output format, default: csv for .csv '
+                              'output files, otherwise jsonl')
+    command.add_argument('--api-key', default=os.environ.get(_API_KEY_ENV),
+                         help='default: ${} environment variable'
+                              .format(_API_KEY_ENV))
+    command.add_argument('--base-url', help='API endpoint URL')
+    command.add_argument('-j', '--concurrency', type=_positive_int,
+                         default=10,
+                         help='lookups in flight, default: 10')
+    command.add_argument('--rate-limit', type=float,
+                         help='max number of requests per second')
+    command.add_argument('--limit', type=_limit, default=100,
+                         help='max netblocks per lookup, 1 to 1000, '
+                              'default: 100')
+    command.add_argument('--range-cache-size', type=_non_negative_int,
+                         default=100000,
+                         help='max number of cached netblocks, 0 to look '
+                              'up every address, default: 100000')
+    command.add_argument('--dedupe-window', type=int, default=100000,
+                         help='number of recent addresses skipped when '
+                              'seen again, 0 to keep duplicates, '
+                              'default: 100000')
+    command.add_argument('--checkpoint',
+                         help='checkpoint file, default: the output file '
+                              'name followed by .checkpoint')
+    command.add_argument('--checkpoint-every', type=_positive_int,
+                         default=1000,
+                         help='rows between checkpoints, default: 1000')
+    command.add_argument('--resume', action='store_true',
+                         help='continue from the checkpoint of an '
+                              'interrupted run')
+    command.add_argument('-q', '--quiet', action='store_true',
+                         help='no summary on stderr')
+    command.set_defaults(handler=enrich)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    parser = _create_parser()
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error('an API key is required, pass --api-key or set '
+                     '$' + _API_KEY_ENV)
+    if args.checkpoint is not None and args.output in (None, '-'):
+        parser.error('--checkpoint requires --output')
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,26 @@
+from contextlib import contextmanager
 import datetime
-from json import loads, JSONDecodeError
 import re
+import time
 
+from . import decoder
+from .bulk import map_bounded
+from .address import IpAddress, parse_ip_address
+from .cache.range import RangeCache
+from .cache.response import ResponseCache, MemoryCache
 from .net.http import ApiRequester
-from .models.response import Response
+from .net.ratelimit import RateLimiter
+from .net.retry import RetryPolicy
+from .net.hedge import HedgePolicy
+from .net.circuit import CircuitBreaker
+from .instrumentation import Instrumentation, LookupTrace
+from .planner import LookupPlan
+from .singleflight import SingleFlight
+from .stream import iter_array
+from .models.interning import Interner
+from .models.response import Response, Inetnum, LazyInetnum
 from .exceptions.error import ParameterError, EmptyApiKeyError, \
-    UnparsableApiResponseError
+    UnparsableApiResponseError, CircuitOpenError
 
 
 class Client:
@@ -13,35 +28,23 @@ class Client:
     _api_requester: ApiRequester or None
     _api_key: str
     _last_result: Response or None
+    _range_cache: RangeCache or None
+    _cache: ResponseCache or None
+    _single_flight: SingleFlight or None
+    _lazy: bool
+    _interner: Interner or bool
+    _serve_stale: bool
+    _json_decoder: object
 
     _re_api_key = re.compile(r'^at_[a-z0-9]{29}$', re.IGNORECASE)
     _re_domain_name = re.compile(
         r'^(?:[0-9a-z_](?:[0-9a-z-_]{0,62}(?<=[0-9a-z-_])[0-9a-z_])?\.)+'
         + r'[0-9a-z][0-9a-z-]{0,62}[a-z0-9]$', re.IGNORECASE
     )
-    _re_ipv4 = re.compile(
-        r'^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}'
-        + r'([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$'
-    )
-    _re_ipv6 = re.compile(
-        r'^\s*((([0-9A-Fa-f]{1,4}:){7}([0-9A-Fa-f]{1,4}|:))|(([0-9A-Fa-f]{1,4}:){6}'
-        + r'(:[0-9A-Fa-f]{1,4}|((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3})|:))|'
-        + r'(([0-9A-Fa-f]{1,4}:){5}(((:[0-9A-Fa-f]{1,4}){1,2})|:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
-        + r'(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3})|:))|(([0-9A-Fa-f]{1,4}:){4}'
-        + r'(((:[0-9A-Fa-f]{1,4}){1,3})|((:[0-9A-Fa-f]{1,4})?:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
-        + r'(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){3}(((:[0-9A-Fa-f]{1,4}){1,4})'
-        + r'|((:[0-9A-Fa-f]{1,4}){0,2}:((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
-        + r'(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|(([0-9A-Fa-f]{1,4}:){2}'
-        + r'(((:[0-9A-Fa-f]{1,4}){1,5})|((:[0-9A-Fa-f]{1,4}){0,3}:'
-        + r'((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))'
-        + r'|(([0-9A-Fa-f]{1,4}:){1}(((:[0-9A-Fa-f]{1,4}){1,6})|((:[0-9A-Fa-f]{1,4}){0,4}:'
-        + r'((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:))|'
-        + r'(:(((:[0-9A-Fa-f]{1,4}){1,7})|((:[0-9A-Fa-f]{1,4}){0,5}:'
-        + r'((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(\.(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}))|:)))(%.+)?\s*$'
-    )
-
     _SUPPORTED_FORMATS = ['json', 'xml']
     _PARSABLE_FORMAT = 'json'
+    _BULK_FIELDS = ['ip', 'asn', 'org']
+    _INETNUMS_PATH = ('result', 'inetnums')
 
     JSON_FORMAT = 'json'
     XML_FORMAT = 'xml'
@@ -54,16 +57,81 @@ class Client:
         :param api_key: str: Your API key.
         :key base_url: str: (optional) API endpoint URL.
         :key timeout: float: (optional) API call timeout in seconds
+        :key pool_connections: int: (optional) Number of per-host
+            connection pools to keep. Default: 10
+        :key pool_maxsize: int: (optional) Max number of keep-alive
+            connections per host. Default: 10
+        :key rate_limit: float or RateLimiter: (optional) Max number of
+            requests per second, or a `RateLimiter` shared with other
+            clients. Throttled requests are sent again after the
+            Retry-After delay. Default: None
+        :key retry: RetryPolicy or bool: (optional) Send failed requests
+            again, see `RetryPolicy`. Pass True for a policy retrying
+            GET requests failed with a connection error, a timeout or
+            a 5xx status with default settings. Default: None
+        :key hedge: HedgePolicy or float: (optional) Send a duplicate of
+            lookups still running after a delay and use the first
+            response, see `HedgePolicy`. A number is a fixed delay in
+            seconds. Default: None
+        :key circuit_breaker: CircuitBreaker or bool: (optional) Fail
+            lookups fast with `CircuitOpenError` during upstream outages,
+            see `CircuitBreaker`. Pass True for a breaker with default
+            settings. Default: None
+        :key serve_stale: bool: (optional) While the circuit is open,
+            answer from expired responses still kept by the `cache`,
+            see its `stale_ttl`. Default: False
+        :key range_cache: RangeCache or bool: (optional) Answer IP lookups
+            locally from the netblocks returned by earlier lookups.
+            Pass True for a cache with default settings. Default: None
+        :key cache: ResponseCache or bool: (optional) Cache raw API
+            responses, e.g. `MemoryCache` or `SqliteCache`. Pass True for
+            a `MemoryCache` with default settings. Default: None
+        :key coalesce: bool: (optional) Share one in-flight request among
+            concurrent identical calls. Default: False
+        :key lazy: bool: (optional) Return responses building every
+            `Inetnum` only on first access, see `Response`. Default: False
+        :key interner: Interner or bool: (optional) Share equal strings
+            and equal autonomous systems, contacts, maintainers and orgs
+            between the records of every response (True), or of all
+            responses with a shared `Interner`. Default: None
+        :key json_decoder: str or callable: (optional) JSON decoder of
+            API responses: 'orjson', 'simdjson', 'ujson', 'json' or
+            a callable accepting `bytes`. Default: the fastest installed
+        :key instrumentation: Instrumentation: (optional) Event hooks of
+            the lookups and API calls, e.g. a `MetricsCollector`.
+            Default: None
         """
 
         self._api_key = ''
+        self._last_result = None
 
         self.api_key = api_key
+        self.range_cache = kwargs.pop('range_cache', None)
+        self.cache = kwargs.pop('cache', None)
+        self.coalesce = kwargs.pop('coalesce', False)
+        self.lazy = kwargs.pop('lazy', False)
+        self.interner = kwargs.pop('interner', None)
+        self.serve_stale = kwargs.pop('serve_stale', False)
+        self.json_decoder = kwargs.pop('json_decoder', None)
 
         if 'base_url' not in kwargs:
             kwargs['base_url'] = Client.__default_url
 
-        self.api_requester = ApiRequester(**kwargs)
+        self.api_requester = self._create_api_requester(**kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _create_api_requester(**kwargs) -> ApiRequester:
+        return ApiRequester(**kwargs)
+
+    @staticmethod
+    def _create_single_flight() -> SingleFlight:
+        return SingleFlight()
 
     @property
     def api_key(self) -> str:
@@ -106,6 +174,147 @@ class Client:
             raise ValueError(
                 "Values should be an instance of ipnetblocks.Response or None")
 
+    @property
+    def cache(self) -> ResponseCache or None:
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: ResponseCache or bool or None):
+        if value is None or value is False:
+            self._cache = None
+        elif value is True:
+            self._cache = MemoryCache()
+        elif isinstance(value, ResponseCache):
+            self._cache = value
+        else:
+            raise ValueError(
+                "Value should be an instance of ipnetblocks.ResponseCache, "
+                "bool or None")
+
+    @property
+    def coalesce(self) -> bool:
+        return self._single_flight is not None
+
+    @coalesce.setter
+    def coalesce(self, value: bool):
+        if value:
+            self._single_flight = self._create_single_flight()
+        else:
+            self._single_flight = None
+
+    @property
+    def lazy(self) -> bool:
+        return self._lazy
+
+    @lazy.setter
+    def lazy(self, value: bool):
+        self._lazy = bool(value)
+
+    @property
+    def interner(self) -> Interner or bool:
+        """
+        True for an `Interner` per response, or the `Interner` shared by
+        all responses, False if records are not interned
+        """
+        return self._interner
+
+    @interner.setter
+    def interner(self, value: Interner or bool or None):
+        if value is None or isinstance(value, bool):
+            self._interner = bool(value)
+        elif isinstance(value, Interner):
+            self._interner = value
+        else:
+            raise ValueError(
+                "Value should be an instance of ipnetblocks.Interner, "
+                "bool or None")
+
+    @property
+    def json_decoder(self):
+        """Callable decoding a JSON document from `bytes` or `str`"""
+        return self._json_decoder
+
+    @json_decoder.setter
+    def json_decoder(self, value):
+        if value is None:
+            self._json_decoder = decoder.loads
+        elif isinstance(value, str):
+            self._json_decoder = decoder.get_decoder(value)
+        elif callable(value):
+            self._json_decoder = value
+        else:
+            raise ValueError(
+                "Value should be a decoder name, a callable or None")
+
+    @property
+    def range_cache(self) -> RangeCache or None:
+        return self._range_cache
+
+    @range_cache.setter
+    def range_cache(self, value: RangeCache or bool or None):
+        if value is None or value is False:
+            self._range_cache = None
+        elif value is True:
+            self._range_cache = RangeCache()
+        elif isinstance(value, RangeCache):
+            self._range_cache = value
+        else:
+            raise ValueError(
+                "Value should be an instance of ipnetblocks.RangeCache, "
+                "bool or None")
+
+    @property
+    def rate_limiter(self) -> RateLimiter or None:
+        return self._api_requester.rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, value: RateLimiter or float or None):
+        self._api_requester.rate_limiter = value
+
+    @property
+    def retry_policy(self) -> RetryPolicy or None:
+        return self._api_requester.retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy or bool or None):
+        self._api_requester.retry_policy = value
+
+    @property
+    def hedge_policy(self) -> HedgePolicy or None:
+        return self._api_requester.hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, value: HedgePolicy or float or None):
+        self._api_requester.hedge_policy = value
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker or None:
+        return self._api_requester.circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, value: CircuitBreaker or bool or None):
+        self._api_requester.circuit_breaker = value
+
+    @property
+    def instrumentation(self) -> Instrumentation or None:
+        return self._api_requester.instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, value: Instrumentation or None):
+        self._api_requester.instrumentation = value
+
+    @property
+    def serve_stale(self) -> bool:
+        return self._serve_stale
+
+    @serve_stale.setter
+    def serve_stale(self, value: bool):
+        self._serve_stale = bool(value)
+
+    @property
+    def pool_stats(self) -> dict:
+        return self._api_requester.pool_stats
+
     @property
     def timeout(self) -> float:
         return self._api_requester.timeout
@@ -114,6 +323,12 @@ class Client:
     def timeout(self, value: float):
         self._api_requester.timeout = value
 
+    def close(self):
+        """
+        Close all pooled connections of the underlying `ApiRequester`.
+        """
+        self._api_requester.close()
+
     def get(self, ip: str = None,
             asn: int = None,
             org: str = None,
@@ -144,9 +359,24 @@ class Client:
         :raises ParameterError: invalid parameter's value
         """
 
-        response = self.get_raw(ip=ip, asn=asn, org=org, mask=mask,
-                                limit=limit, output_format=Client._PARSABLE_FORMAT)
-        return self._parse_raw_result(response)
+        with self._lookup() as trace:
+            ip = Client._validate_ip_address(ip)
+            address = self._range_cache_address(ip, asn, org, mask)
+            if address is not None:
+                cached = self._range_cache.lookup(address)
+                if cached is not None:
+                    trace.source = 'range_cache'
+                    self.last_result = Client._cached_response(
+                        ip, cached, limit)
+                    return self.last_result
+
+            response = self._get_content(self._prepare_payload(
+                ip, asn, org, mask, limit, Client._PARSABLE_FORMAT), trace)
+            result = self._parse_raw_result(response, trace)
+
+            if address is not None and result.count <= len(result.inetnums):
+                self._range_cache.add(result.inetnums, address)
+            return result
 
     def get_raw(self, ip: str = None,
                 asn: int = None,
@@ -182,27 +412,51 @@ class Client:
         :raises ParameterError: invalid parameter's value
         """
 
-        if self.api_key == '':
-            raise EmptyApiKeyError('')
-        if ip is None and asn is None and org is None:
-            raise ParameterError("Required one of the following input fields: ip, org, asn.")
+        response = self._get_content(self._prepare_payload(
+            ip, asn, org, mask, limit, output_format))
+        return Client._decode_content(response)
 
-        _ip = Client._validate_ip_address(ip)
-        _mask = Client._validate_mask(mask, ip)
-        _output_format = Client._validate_output_format(output_format)
-        _limit = Client._validate_limit(limit)
-        _asn = Client._validate_asn(asn)
-        _org = Client._validate_org(org)
-
-        return self._api_requester.get(self._build_payload(
-            self.api_key,
-            _ip,
-            _asn,
-            _org,
-            _mask,
-            _limit,
-            _output_format,
-        ))
+    def _get_content(self, payload: dict,
+                     trace: LookupTrace = None) -> bytes or str:
+        started = time.perf_counter()
+        try:
+            if self._cache is None and self._single_flight is None:
+                return self._api_requester.get_content(payload)
+
+            key = ResponseCache.make_key(payload)
+            if self._cache is not None:
+                response = self._cache.get(key)
+                if response is not None:
+                    if trace is not None:
+                        trace.source = 'cache'
+                    return response
+            if self._single_flight is None:
+                return self._fetch(payload, key, trace)
+            return self._single_flight.do(
+                key, lambda: self._fetch(payload, key, trace))
+        finally:
+            if trace is not None:
+                trace.add('fetch', time.perf_counter() - started)
+
+    def _fetch(self, payload: dict, key: str,
+               trace: LookupTrace = None) -> bytes:
+        try:
+            response = self._api_requester.get_content(payload)
+        except CircuitOpenError:
+            stale = self._get_stale(key)
+            if stale is None:
+                raise
+            if trace is not None:
+                trace.source = 'stale'
+            return stale
+        if self._cache is not None:
+            self._cache.set(key, response)
+        return response
+
+    def _get_stale(self, key: str) -> bytes or str or None:
+        if not self._serve_stale or self._cache is None:
+            return None
+        return self._cache.get_stale(key)
 
     def get_by_asn(self, asn: int, limit: int = 100) -> Response:
         """
@@ -220,8 +474,10 @@ class Client:
         :raises HttpApiError: HTTP code >= 300 and not equal to above codes
         :raises ParameterError: invalid parameter's value
         """
-        response = self.get_raw(asn=asn, limit=limit, output_format=Client._PARSABLE_FORMAT)
-        return self._parse_raw_result(response)
+        with self._lookup() as trace:
+            response = self._get_content(self._prepare_payload(
+                None, asn, None, None, limit, Client._PARSABLE_FORMAT), trace)
+            return self._parse_raw_result(response, trace)
 
     def get_by_org(self, org: str, limit: int = 100) -> Response:
         """
@@ -242,19 +498,249 @@ class Client:
         :raises HttpApiError: HTTP code >= 300 and not equal to above codes
         :raises ParameterError: invalid parameter's value
         """
-        response = self.get_raw(org=org, limit=limit, output_format=Client._PARSABLE_FORMAT)
-        return self._parse_raw_result(response)
+        with self._lookup() as trace:
+            response = self._get_content(self._prepare_payload(
+                None, None, org, None, limit, Client._PARSABLE_FORMAT), trace)
+            return self._parse_raw_result(response, trace)
+
+    def iter_inetnums(self, ip: str = None,
+                      asn: int = None,
+                      org: str = None,
+                      mask: int = None,
+                      limit: int = 100):
+        """
+        Stream the netblocks of a lookup.
+
+        The response body is parsed while it is being received and every
+        `Inetnum` is yielded as soon as it is complete, so memory use is
+        bounded by a single record instead of the whole response.
+        Streamed lookups bypass the response and range caches.
+
+        Accepts the same parameters as `get`. Parameters are validated
+        immediately, the request is sent on the first iteration.
 
-    def _parse_raw_result(self, response: str) -> Response:
+        :return: iterator of `Inetnum`
+        :raises UnparsableApiResponseError: while iterating, the response
+            has no `result.inetnums` array or is not valid JSON
+        """
+        payload = self._prepare_payload(
+            ip, asn, org, mask, limit, Client._PARSABLE_FORMAT)
+        return self._iter_inetnums(payload)
+
+    def _iter_inetnums(self, payload: dict):
+        model = LazyInetnum if self._lazy else Inetnum
+        interner = self._stream_interner()
+        chunks = self._api_requester.iter_content(payload)
         try:
-            parsed = loads(str(response))
-            if 'result' in parsed:
-                self.last_result = Response(parsed)
-                return self.last_result
+            for values in iter_array(chunks, Client._INETNUMS_PATH):
+                yield model(values, interner)
+            # read the rest of the body so the connection returns to the pool
+            for _ in chunks:
+                pass
+        except ValueError as error:
             raise UnparsableApiResponseError(
-                "Could not find the correct root element.", None)
-        except JSONDecodeError as error:
+                "Could not parse API response", error)
+        finally:
+            chunks.close()
+
+    def _stream_interner(self) -> Interner or None:
+        if self._interner is True:
+            return Interner()
+        return self._interner or None
+
+    def iter_many(self, values,
+                  field: str = 'ip',
+                  mask: int = None,
+                  limit: int = 100,
+                  max_workers: int = None,
+                  ordered: bool = False):
+        """
+        Look up many search terms concurrently.
+
+        Lookups run on a pool of threads sharing the connection pool of
+        the underlying `ApiRequester`. Items are pulled from `values` only
+        as workers become free, so huge generators are processed
+        in constant memory.
+
+        :param values: Iterable of IP addresses, ASNs or org search terms.
+        :key field: Which search field `values` hold: 'ip', 'asn' or 'org'.
+        :key mask: Optional for 'ip' field only. See `get`.
+        :key limit: Max count of returned records per lookup.
+            Acceptable values: 1 - 1000
+        :key max_workers: Number of worker threads.
+            Default: the `pool_maxsize` of the `ApiRequester`
+        :key ordered: Yield results in input order instead of
+            completion order. Default: False
+        :return: iterator of (value, `Response` or raised exception)
+            tuples. A failed lookup never aborts the batch.
+        :raises ParameterError: invalid `field` or `max_workers`
+        """
+        lookup = self._bulk_lookup(self.get, field, mask, limit)
+        return map_bounded(lookup, values,
+                           self._validate_max_workers(max_workers),
+                           ordered)
+
+    def get_many(self, values,
+                 field: str = 'ip',
+                 mask: int = None,
+                 limit: int = 100,
+                 max_workers: int = None) -> list:
+        """
+        Look up many search terms concurrently.
+
+        Same as `iter_many`, but collects the results in input order.
+
+        :return: list of (value, `Response` or raised exception) tuples
+        """
+        return list(self.iter_many(values, field=field, mask=mask,
+                                   limit=limit, max_workers=max_workers,
+                                   ordered=True))
+
+    def get_many_grouped(self, values,
+                         limit: int = 100,
+                         max_workers: int = None,
+                         ipv4_prefix: int = 24,
+                         ipv6_prefix: int = 48) -> list:
+        """
+        Look up many IP addresses, one API call per network where they
+        are dense.
+
+        The addresses are deduplicated and grouped by network, see
+        `LookupPlan`: each network holding several of them is looked up
+        once with the `mask` parameter and its ranges are fanned out to
+        the addresses they cover, the rest is looked up one by one. Every
+        address gets the ranges covering it, the same as `get` returns.
+        Addresses that none of the ranges of their network cover, and
+        networks with more ranges than `LookupPlan.NETWORK_LIMIT`, fall
+        back to lookups one by one.
+
+        Unlike `iter_many`, the values are all read before the lookups.
+
+        :param values: Iterable of IP addresses.
+        :key limit: Max count of returned records per address.
+            Acceptable values: 1 - 1000
+        :key max_workers: Number of worker threads.
+            Default: the `pool_maxsize` of the `ApiRequester`
+        :key ipv4_prefix: Prefix length of IPv4 networks. Default: 24
+        :key ipv6_prefix: Prefix length of IPv6 networks. Default: 48
+        :return: list of (value, `Response` or raised exception) tuples
+            in input order
+        :raises ParameterError: invalid `max_workers` or prefix length
+        """
+        Client._validate_limit(limit)
+        max_workers = self._validate_max_workers(max_workers)
+        plan = LookupPlan(values, ipv4_prefix, ipv6_prefix)
+        answers = {}
+        missing = []
+        for (network, members), response in map_bounded(
+                self._network_lookup, plan.networks, max_workers):
+            missing.extend(LookupPlan.fan_out(members, response, limit,
+                                              answers))
+        for (key, value), response in map_bounded(
+                lambda item: self.get(ip=item[1], limit=limit),
+                plan.pending(missing), max_workers):
+            answers[key] = response
+        return plan.results(answers)
+
+    def _network_lookup(self, group: tuple) -> Response:
+        network = group[0]
+        return self.get(ip=network.text, mask=network.prefix,
+                        limit=LookupPlan.NETWORK_LIMIT)
+
+    def _bulk_lookup(self, get, field: str, mask: int or None, limit: int):
+        if field not in Client._BULK_FIELDS:
+            raise ParameterError("field should be one of: "
+                                 + ", ".join(Client._BULK_FIELDS))
+        if field == 'ip':
+            return lambda value: get(ip=value, mask=mask, limit=limit)
+        return lambda value: get(**{field: value, 'limit': limit})
+
+    def _validate_max_workers(self, value: int or None) -> int:
+        if value is None:
+            return self._api_requester.pool_maxsize
+        if isinstance(value, int) and value > 0:
+            return value
+
+        raise ParameterError("max_workers should be a positive int or None")
+
+    def _range_cache_address(self, ip: IpAddress or None, asn, org,
+                             mask) -> int or None:
+        if self._range_cache is None or ip is None or mask is not None \
+                or asn is not None or org is not None:
+            return None
+        return ip.mapped
+
+    @staticmethod
+    def _cached_response(ip: IpAddress, inetnums: list, limit: int) -> Response:
+        response = Response(None)
+        response.search = str(ip)
+        response.count = len(inetnums)
+        response.limit = limit
+        response.inetnums = inetnums[:limit]
+        return response
+
+    def _prepare_payload(self, ip, asn, org, mask, limit,
+                         output_format) -> dict:
+        if self.api_key == '':
+            raise EmptyApiKeyError('')
+        if ip is None and asn is None and org is None:
+            raise ParameterError("Required one of the following input fields: ip, org, asn.")
+
+        _ip = Client._validate_ip_address(ip)
+        _mask = Client._validate_mask(mask, _ip)
+        _output_format = Client._validate_output_format(output_format)
+        _limit = Client._validate_limit(limit)
+        _asn = Client._validate_asn(asn)
+        _org = Client._validate_org(org)
+
+        return self._build_payload(
+            self.api_key,
+            None if _ip is None else _ip.text,
+            _asn,
+            _org,
+            _mask,
+            _limit,
+            _output_format,
+        )
+
+    @contextmanager
+    def _lookup(self):
+        trace = LookupTrace()
+        try:
+            yield trace
+        except Exception as error:
+            trace.error = error
+            raise
+        finally:
+            instrumentation = self.instrumentation
+            if instrumentation is not None:
+                instrumentation.emit('lookup', trace.to_dict())
+
+    def _parse_raw_result(self, response: bytes or str,
+                          trace: LookupTrace = None) -> Response:
+        if not isinstance(response, (bytes, str)):
+            response = str(response)
+        started = time.perf_counter()
+        try:
+            parsed = self._json_decoder(response)
+        except ValueError as error:
             raise UnparsableApiResponseError("Could not parse API response", error)
+        if isinstance(parsed, dict) and 'result' in parsed:
+            decoded = time.perf_counter()
+            self.last_result = Response(parsed, lazy=self._lazy,
+                                        interner=self._interner)
+            if trace is not None:
+                trace.add('decode', decoded - started)
+                trace.add('build', time.perf_counter() - decoded)
+            return self.last_result
+        raise UnparsableApiResponseError(
+            "Could not find the correct root element.", None)
+
+    @staticmethod
+    def _decode_content(content: bytes or str) -> str:
+        if isinstance(content, bytes):
+            return content.decode('UTF-8')
+        return content
 
     @staticmethod
     def _validate_api_key(api_key) -> str:
@@ -271,14 +757,13 @@ class Client:
         raise ParameterError("Invalid domain name")
 
     @staticmethod
-    def _validate_ip_address(value) -> str:
-        if value is None:
-            return None
-        if Client._re_ipv4.search(str(value)) or \
-                Client._re_ipv6.search(str(value)):
-            return str(value)
-
-        raise ParameterError("Invalid ip address name")
+    def _validate_ip_address(value) -> IpAddress or None:
+        if value is None or isinstance(value, IpAddress):
+            return value
+        try:
+            return parse_ip_address(str(value))
+        except ValueError:
+            raise ParameterError("Invalid ip address name")
 
     @staticmethod
     def _validate_output_format(value: str):
@@ -297,11 +782,10 @@ class Client:
         raise ParameterError(Client.__DATETIME_OR_NONE_MSG)
 
     @staticmethod
-    def _validate_mask(value: int or None, ip: str):
+    def _validate_mask(value: int or None, ip: IpAddress or None):
         if value is None or \
-                (isinstance(value, int) and
-                 ((0 < value <= 128 and Client._re_ipv6.search(ip)) or
-                  (0 < value <= 32 and Client._re_ipv4.search(ip)))):
+                (isinstance(value, int) and ip is not None and
+                 0 < value <= ip.max_prefix):
             return value
 
         raise ParameterError("mask should be an int between 0 and 32 for IPv4"
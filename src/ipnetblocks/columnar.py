@@ -0,0 +1,149 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_U32 = 'I' if array('I').itemsize == 4 else 'L'
+_U64_MASK = (1 << 64) - 1
+
+
+def _asn_of(record) -> int:
+    # `SnapshotRecord` holds the number, `Inetnum` the AS object
+    asn = getattr(record, 'asn', None)
+    if asn is None:
+        autonomous_system = record.AS
+        return autonomous_system.asn if autonomous_system else 0
+    return asn
+
+
+def _numpy_array(values: array, dtype):
+    if not values:
+        return numpy.empty(0, dtype)
+    return numpy.frombuffer(values, dtype)
+
+
+class InetnumColumns:
+    """
+    Columnar copy of netblock records for vectorized analytics.
+
+    Range bounds, in the IPv6 space of `Inetnum.inetnum_first`, are split
+    into uint64 arrays of their high and low 64 bits: `first_hi`,
+    `first_lo`, `last_hi` and `last_lo`, so that IPv4 ranges have high
+    words of 0. `asn` is a uint32 array, 0 when unknown. `country`,
+    `netname` and `source` are dictionary encoded: int32 arrays of codes
+    into the lists of `categories`.
+
+    Columns are stdlib `array.array` objects. `to_numpy` wraps them into
+    NumPy arrays without copying them.
+    """
+    BOUNDS = ('first_hi', 'first_lo', 'last_hi', 'last_lo')
+    CATEGORICAL = ('country', 'netname', 'source')
+
+    def __init__(self, records=()):
+        """
+        :param records: Iterable of `Inetnum` or `SnapshotRecord`, e.g.
+            `Response.inetnums`, `RangeCache.ranges()` or a `Snapshot`.
+        """
+        for name in InetnumColumns.BOUNDS:
+            setattr(self, name, array('Q'))
+        self.asn = array(_U32)
+        for name in InetnumColumns.CATEGORICAL:
+            setattr(self, name, array('i'))
+        self.categories = {name: [] for name in InetnumColumns.CATEGORICAL}
+        self.result = None
+        self._codes = {name: {} for name in InetnumColumns.CATEGORICAL}
+        self._extend(records)
+
+    @classmethod
+    def from_results(cls, results) -> 'InetnumColumns':
+        """
+        Columns of the records of a bulk lookup.
+
+        :param results: Iterable of (value, `Response` or exception)
+            tuples, as returned by `Client.get_many`.
+        :return: `InetnumColumns` with a `result` uint32 array holding
+            the index of the result of every record. Exceptions hold no
+            records.
+        """
+        columns = cls()
+        columns.result = array(_U32)
+        for index, (_, response) in enumerate(results):
+            if isinstance(response, Exception):
+                continue
+            added = columns._extend(response.inetnums)
+            columns.result.extend([index] * added)
+        return columns
+
+    def __len__(self):
+        return len(self.asn)
+
+    def _extend(self, records) -> int:
+        count = len(self)
+        first_hi, first_lo = self.first_hi.append, self.first_lo.append
+        last_hi, last_lo = self.last_hi.append, self.last_lo.append
+        asn = self.asn.append
+        encoders = [(getattr(self, name).append, self._codes[name],
+                     self.categories[name], name)
+                    for name in InetnumColumns.CATEGORICAL]
+        for record in records:
+            first, last = record.inetnum_first, record.inetnum_last
+            first_hi(first >> 64)
+            first_lo(first & _U64_MASK)
+            last_hi(last >> 64)
+            last_lo(last & _U64_MASK)
+            asn(_asn_of(record))
+            for append, codes, categories, name in encoders:
+                value = getattr(record, name) or ''
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(categories)
+                    categories.append(value)
+                append(code)
+        return len(self) - count
+
+    def decode(self, name: str) -> [str]:
+        """
+        :param name: Name of a categorical column.
+        :return: list of the values of the column
+        :raises KeyError: not a categorical column
+        """
+        categories = self.categories[name]
+        return [categories[code] for code in getattr(self, name)]
+
+    def to_numpy(self) -> dict:
+        """
+        :return: dict of NumPy arrays by column name, sharing the memory
+            of the columns. Categorical columns are their codes, the
+            categories being in `categories`.
+        :raises ImportError: NumPy is not installed
+        """
+        if numpy is None:
+            raise ImportError("InetnumColumns.to_numpy requires numpy. "
+                              "Install it with `pip install "
+                              "ip-netblocks[numpy]`")
+        columns = {name: _numpy_array(getattr(self, name), numpy.uint64)
+                   for name in InetnumColumns.BOUNDS}
+        columns['asn'] = _numpy_array(self.asn, numpy.uint32)
+        for name in InetnumColumns.CATEGORICAL:
+            columns[name] = _numpy_array(getattr(self, name), numpy.int32)
+        if self.result is not None:
+            columns['result'] = _numpy_array(self.result, numpy.uint32)
+        return columns
+
+    def to_pandas(self):
+        """
+        :return: pandas DataFrame of the columns, categorical columns
+            being of the category dtype
+        :raises ImportError: pandas is not installed
+        """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("InetnumColumns.to_pandas requires pandas")
+        columns = self.to_numpy()
+        for name in InetnumColumns.CATEGORICAL:
+            columns[name] = pandas.Categorical.from_codes(
+                columns[name], self.categories[name])
+        return pandas.DataFrame(columns)
@@ -0,0 +1,68 @@
+import json
+
+__all__ = ['loads', 'get_decoder', 'available_decoders']
+
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+
+_decoders = {'json': _stdlib_loads}
+
+try:
+    import orjson
+    _decoders['orjson'] = orjson.loads
+except ImportError:
+    pass
+
+try:
+    import ujson
+    _decoders['ujson'] = ujson.loads
+except ImportError:
+    pass
+
+try:
+    import simdjson
+    _decoders['simdjson'] = simdjson.loads
+except ImportError:
+    pass
+
+_PREFERENCE = ['orjson', 'simdjson', 'ujson', 'json']
+
+
+def available_decoders() -> list:
+    """Names of the installed JSON decoders, fastest first"""
+    return [name for name in _PREFERENCE if name in _decoders]
+
+
+def get_decoder(name: str = None):
+    """
+    JSON decoder accepting `bytes` or `str`.
+
+    Third-party decoders fall back to the standard library for documents
+    they reject. Some of them turn integers wider than 64 bits into floats,
+    which is why `Inetnum` reads IPv6 bounds from the string fields.
+
+    :param name: 'orjson', 'simdjson', 'ujson' or 'json'. Default: the
+        fastest installed one
+    :raises ValueError: the decoder is not installed
+    """
+    if name is None:
+        name = available_decoders()[0]
+    if name not in _decoders:
+        raise ValueError("JSON decoder {} is not installed".format(name))
+
+    fast_loads = _decoders[name]
+    if fast_loads is _stdlib_loads:
+        return _stdlib_loads
+
+    def loads_with_fallback(data):
+        try:
+            return fast_loads(data)
+        except ValueError:
+            return json.loads(data)
+
+    return loads_with_fallback
+
+
+loads = get_decoder()
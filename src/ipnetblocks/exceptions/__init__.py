@@ -1,7 +1,9 @@
 __all__ = ['ParameterError', 'HttpApiError', 'IpNetblocksApiError',
            'ApiAuthError', 'ResponseError', 'EmptyApiKeyError',
-           'UnparsableApiResponseError']
+           'UnparsableApiResponseError', 'TooManyRequestsError',
+           'CircuitOpenError']
 
 from .error import ParameterError, HttpApiError, \
     IpNetblocksApiError, ApiAuthError, ResponseError, \
-    EmptyApiKeyError, UnparsableApiResponseError
+    EmptyApiKeyError, UnparsableApiResponseError, TooManyRequestsError, \
+    CircuitOpenError
@@ -69,3 +69,33 @@ class BadRequestError(ResponseError):
 
 class HttpApiError(IpNetblocksApiError):
     pass
+
+
+class TooManyRequestsError(HttpApiError):
+    def __init__(self, message, retry_after=None):
+        self.message = message
+        self.retry_after = retry_after
+
+    @property
+    def retry_after(self):
+        """Seconds to wait given by the Retry-After header or None"""
+        return self._retry_after
+
+    @retry_after.setter
+    def retry_after(self, value):
+        self._retry_after = value
+
+
+class CircuitOpenError(IpNetblocksApiError):
+    def __init__(self, message, retry_after=None):
+        self.message = message
+        self.retry_after = retry_after
+
+    @property
+    def retry_after(self):
+        """Seconds until the circuit lets a trial request through"""
+        return self._retry_after
+
+    @retry_after.setter
+    def retry_after(self, value):
+        self._retry_after = value
@@ -0,0 +1,261 @@
+from bisect import bisect_left
+import logging
+import threading
+import time
+
+
+class Instrumentation:
+    """
+    Event hooks of a `Client` and its requester.
+
+    Callbacks subscribed to an event are called with a dict describing it,
+    synchronously, from the thread or the task that caused it. Exceptions
+    raised by callbacks are logged and otherwise ignored.
+
+    Events:
+
+    - 'response': an API call finished. Keys: `method`, `status` (None
+      if no response was received), `error` (exception or None), `bytes`
+      (size of the body), `attempts`, `reused` (whether the last attempt
+      was sent over an already open connection, None if unknown),
+      `phases` and `total` (seconds). `phases` holds the time spent in
+      `queue` (rate limiter and retry backoff), `dns` (asyncio client
+      only), `connect` (TCP and TLS handshakes, including DNS for
+      the threaded client), `server` (from sending the request to the
+      response headers) and `download` (reading the body).
+    - 'retry': a failed attempt is sent again. Keys: `method`, `attempt`,
+      `delay`, `status`, `error`.
+    - 'throttle': a 429 response paused the rate limiter. Keys:
+      `retry_after`.
+    - 'hedge': a duplicate of a slow request was sent. Keys: `delay`,
+      `won` (whether the duplicate answered first).
+    - 'circuit_open': a request was rejected by the circuit breaker.
+      Keys: `retry_after`.
+    - 'lookup': a `Client` lookup finished. Keys: `source` ('api',
+      'cache', 'stale' or 'range_cache'), `error`, `phases` (`fetch`,
+      `decode` and `build`) and `total`.
+    """
+    EVENTS = ('response', 'retry', 'throttle', 'hedge', 'circuit_open',
+              'lookup')
+    __logger = logging.getLogger("instrumentation")
+
+    def __init__(self):
+        self._hooks = {event: [] for event in Instrumentation.EVENTS}
+
+    def subscribe(self, event: str, callback):
+        """
+        :param event: Event name, see `Instrumentation.EVENTS`.
+        :param callback: Callable receiving the event dict.
+        :raises ValueError: unknown event
+        """
+        self._hooks_of(event).append(callback)
+
+    def unsubscribe(self, event: str, callback):
+        hooks = self._hooks_of(event)
+        if callback in hooks:
+            hooks.remove(callback)
+
+    def wants(self, event: str) -> bool:
+        """Whether anything is subscribed to the event"""
+        return bool(self._hooks[event])
+
+    def emit(self, event: str, data: dict):
+        for callback in list(self._hooks[event]):
+            try:
+                callback(data)
+            except Exception:
+                Instrumentation.__logger.exception(
+                    "Callback of the %s event failed", event)
+
+    def _hooks_of(self, event: str) -> list:
+        if event not in self._hooks:
+            raise ValueError("Unknown event {}, expected one of: {}".format(
+                event, ", ".join(Instrumentation.EVENTS)))
+        return self._hooks[event]
+
+
+class Histogram:
+    """
+    Latency histogram with fixed bucket bounds in seconds.
+    """
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                       0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+        self._max = max(self._max, value)
+
+    def to_dict(self) -> dict:
+        """
+        :return: dict with `count`, `sum`, `max` and `buckets`, the
+            cumulative count of values not above each bound, Prometheus
+            style, with '+Inf' for all of them
+        """
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self._bounds, self._counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self._count
+        return {
+            'count': self._count,
+            'sum': self._sum,
+            'max': self._max,
+            'buckets': buckets,
+        }
+
+
+class MetricsCollector(Instrumentation):
+    """
+    `Instrumentation` aggregating its own events into counters and
+    latency histograms, ready to be exported.
+
+    Other callbacks can still be subscribed to it.
+    """
+
+    def __init__(self, buckets=Histogram.DEFAULT_BUCKETS):
+        """
+        :param buckets: Histogram bucket bounds in seconds.
+        """
+        super().__init__()
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+        self.subscribe('response', self._on_response)
+        self.subscribe('retry', self._count('retries'))
+        self.subscribe('throttle', self._count('throttled'))
+        self.subscribe('hedge', self._count('hedged'))
+        self.subscribe('circuit_open', self._count('circuit_rejections'))
+        self.subscribe('lookup', self._on_lookup)
+
+    def reset(self):
+        with self._lock:
+            self._counters = {
+                'requests': 0,
+                'errors': 0,
+                'bytes_received': 0,
+                'connections_new': 0,
+                'connections_reused': 0,
+                'retries': 0,
+                'throttled': 0,
+                'hedged': 0,
+                'circuit_rejections': 0,
+            }
+            self._status = {}
+            self._sources = {}
+            self._latency = {}
+
+    def snapshot(self) -> dict:
+        """
+        JSON serializable copy of the metrics.
+
+        :return: dict with the counters, `status` (responses per HTTP
+            status code), `lookups` (lookups per source) and `latency`
+            (histogram per phase, plus `request` and `lookup` totals)
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics['status'] = {str(k): v for k, v in self._status.items()}
+            metrics['lookups'] = dict(self._sources)
+            metrics['latency'] = {name: histogram.to_dict()
+                                  for name, histogram in self._latency.items()}
+            return metrics
+
+    def _observe(self, name: str, value: float):
+        histogram = self._latency.get(name)
+        if histogram is None:
+            histogram = self._latency[name] = Histogram(self._buckets)
+        histogram.observe(value)
+
+    def _count(self, counter: str):
+        def callback(data: dict):
+            with self._lock:
+                self._counters[counter] += 1
+        return callback
+
+    def _on_response(self, data: dict):
+        with self._lock:
+            self._counters['requests'] += 1
+            self._counters['bytes_received'] += data['bytes']
+            if data['error'] is not None:
+                self._counters['errors'] += 1
+            if data['status'] is not None:
+                self._status[data['status']] = \
+                    self._status.get(data['status'], 0) + 1
+            if data['reused'] is True:
+                self._counters['connections_reused'] += 1
+            elif data['reused'] is False:
+                self._counters['connections_new'] += 1
+            for phase, seconds in data['phases'].items():
+                self._observe(phase, seconds)
+            self._observe('request', data['total'])
+
+    def _on_lookup(self, data: dict):
+        with self._lock:
+            source = data['source']
+            self._sources[source] = self._sources.get(source, 0) + 1
+            for phase, seconds in data['phases'].items():
+                self._observe(phase, seconds)
+            self._observe('lookup', data['total'])
+
+
+class RequestTrace:
+    """Timings of one API call, filled in by the requesters"""
+    __slots__ = ('method', 'started', 'attempts', 'status', 'bytes',
+                 'reused', 'error', 'phases')
+
+    def __init__(self, method: str):
+        self.method = method
+        self.started = time.perf_counter()
+        self.attempts = 0
+        self.status = None
+        self.bytes = 0
+        self.reused = None
+        self.error = None
+        self.phases = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        return {
+            'method': self.method,
+            'status': self.status,
+            'error': self.error,
+            'bytes': self.bytes,
+            'attempts': self.attempts,
+            'reused': self.reused,
+            'phases': self.phases,
+            'total': time.perf_counter() - self.started,
+        }
+
+
+class LookupTrace:
+    """Timings of one `Client` lookup"""
+    __slots__ = ('source', 'started', 'error', 'phases')
+
+    def __init__(self):
+        self.source = 'api'
+        self.started = time.perf_counter()
+        self.error = None
+        self.phases = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        return {
+            'source': self.source,
+            'error': self.error,
+            'phases': self.phases,
+            'total': time.perf_counter() - self.started,
+        }
@@ -0,0 +1,163 @@
+from array import array
+from bisect import bisect_right
+
+from .address import IpAddress, parse_ip_address
+from .cache.snapshot import Snapshot
+from .columnar import numpy
+
+_IPV4_MAPPED = 0xffff << 32
+_ADDRESS_SPACE = 1 << 128
+
+
+def _mapped(address) -> int:
+    if isinstance(address, str):
+        address = parse_ip_address(address)
+    if isinstance(address, IpAddress):
+        return address.mapped
+    if isinstance(address, int) and 0 <= address < _ADDRESS_SPACE:
+        return address
+    raise ValueError("Invalid IP address")
+
+
+class NetblockMatcher:
+    """
+    Matches IP addresses in bulk to the most specific of a set of
+    netblocks.
+
+    The ranges are flattened once into disjoint segments, the way
+    `Snapshot` indexes them, each holding the most specific range
+    covering it, so that nested and overlapping ranges cost a single
+    search per address. `parents` holds the index of the smallest range
+    containing every range, following the nesting of the bounds.
+
+    Matches are indexes into `records`, -1 for addresses no range covers.
+    Sequences are matched with a binary search per address. NumPy arrays
+    passed to `match_ipv4` and `match_mapped` are sorted and swept
+    against the segments with vectorized operations instead, which
+    scales to tens of millions of addresses.
+    """
+
+    def __init__(self, records):
+        """
+        :param records: Iterable of `Inetnum` or `SnapshotRecord`, e.g.
+            `Response.inetnums`, `RangeCache.ranges()` or a `Snapshot`.
+        """
+        self.records = list(records)
+        self._starts, segment_covers, covers = \
+            Snapshot._segments(self.records)
+        # covers are ordered by size, the first is the most specific
+        self._matches = array('q', (
+            covers[segment_covers[i]] if segment_covers[i + 1] else -1
+            for i in range(0, len(segment_covers), 2)))
+
+        self.parents = array('q', [-1]) * len(self.records)
+        for i, record in enumerate(self.records):
+            segment = bisect_right(self._starts, record.inetnum_first) - 1
+            start, count = segment_covers[2 * segment:2 * segment + 2]
+            cover = covers[start:start + count]
+            for j in cover[cover.index(i) + 1:]:
+                if self.records[j].inetnum_last >= record.inetnum_last:
+                    self.parents[i] = j
+                    break
+        self._numpy_segments = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def chain(self, index: int) -> [int]:
+        """
+        :param index: Index of a record.
+        :return: list of the index followed by those of the ranges
+            containing it, innermost first
+        """
+        chain = []
+        while index >= 0:
+            chain.append(index)
+            index = self.parents[index]
+        return chain
+
+    def match(self, addresses) -> array:
+        """
+        :param addresses: Iterable of IP addresses as str, `IpAddress` or
+            `IpAddress.mapped` values.
+        :return: array('q') of the index of the most specific record
+            covering every address, -1 if none covers it
+        :raises ValueError: invalid address
+        """
+        starts, matches = self._starts, self._matches
+        result = array('q')
+        append = result.append
+        for address in addresses:
+            segment = bisect_right(starts, _mapped(address)) - 1
+            append(matches[segment] if segment >= 0 else -1)
+        return result
+
+    def match_ipv4(self, values):
+        """
+        :param values: IPv4 addresses as ints, e.g. a uint32 NumPy array.
+        :return: indexes as for `match`, an int64 NumPy array for a NumPy
+            input
+        :raises ValueError: value out of the IPv4 range
+        """
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            if values.size and (values.min() < 0
+                                or values.max() > 0xffffffff):
+                raise ValueError("Invalid IPv4 address")
+            low = values.astype(numpy.uint64) | numpy.uint64(_IPV4_MAPPED)
+            return self._match_numpy(numpy.zeros_like(low), low)
+        mapped = []
+        for value in values:
+            if not 0 <= value <= 0xffffffff:
+                raise ValueError("Invalid IPv4 address")
+            mapped.append(_IPV4_MAPPED | int(value))
+        return self.match(mapped)
+
+    def match_mapped(self, hi, lo):
+        """
+        :param hi: High 64 bits of the `IpAddress.mapped` values, e.g.
+            the `first_hi` layout of `InetnumColumns`.
+        :param lo: Low 64 bits of the values.
+        :return: indexes as for `match`, an int64 NumPy array for NumPy
+            inputs
+        """
+        if numpy is not None and isinstance(hi, numpy.ndarray):
+            return self._match_numpy(numpy.asarray(hi, numpy.uint64),
+                                     numpy.asarray(lo, numpy.uint64))
+        return self.match(int(h) << 64 | int(l) for h, l in zip(hi, lo))
+
+    def _segments_numpy(self) -> tuple:
+        if self._numpy_segments is None:
+            mask = (1 << 64) - 1
+            # a leading -1 is the match of addresses before every segment
+            self._numpy_segments = (
+                numpy.array([x >> 64 for x in self._starts], numpy.uint64),
+                numpy.array([x & mask for x in self._starts], numpy.uint64),
+                numpy.concatenate((numpy.array([-1], numpy.int64),
+                                   numpy.array(self._matches, numpy.int64))))
+        return self._numpy_segments
+
+    def _match_numpy(self, hi, lo):
+        if hi.shape != lo.shape:
+            raise ValueError("hi and lo should have the same shape")
+        segment_hi, segment_lo, matches = self._segments_numpy()
+        if not hi.any():
+            # IPv4 and low IPv6 addresses: only the segments of the first
+            # 64 bit block, a prefix of the sorted segments, can cover them
+            count = numpy.searchsorted(segment_hi, numpy.uint64(0), 'right')
+            return matches[numpy.searchsorted(segment_lo[:count], lo,
+                                              'right')]
+
+        # Sort the segment starts and the addresses together, segments
+        # first on ties, then count the segments preceding every address
+        segments = len(segment_hi)
+        order = numpy.lexsort((
+            numpy.concatenate((numpy.zeros(segments, numpy.int8),
+                               numpy.ones(lo.size, numpy.int8))),
+            numpy.concatenate((segment_lo, lo.ravel())),
+            numpy.concatenate((segment_hi, hi.ravel()))))
+        is_segment = order < segments
+        preceding = numpy.cumsum(is_segment)
+        is_address = ~is_segment
+        positions = numpy.empty(lo.size, numpy.int64)
+        positions[order[is_address] - segments] = preceding[is_address]
+        return matches[positions].reshape(lo.shape)
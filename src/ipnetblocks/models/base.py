@@ -1,11 +1,38 @@
 class BaseModel:
+    """
+    Base class of the models.
+
+    Models keep their fields in `__slots__`. Public slot names are the
+    fields used by `__str__`, `__eq__`, `__getitem__` and `vars()`.
+    """
+    __slots__ = ()
+    _field_names = ()
+
     def __init__(self):
         pass
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_names = tuple(
+            name for klass in reversed(cls.__mro__)
+            for name in klass.__dict__.get('__slots__', ())
+            if not name.startswith('_'))
+
+    @property
+    def __dict__(self) -> dict:
+        return {k: getattr(self, k) for k in self._field_names}
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self._field_names}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def __str__(self):
         result = {}
-        for k, v in self.__dict__.items():
-            result[k] = str(v)
+        for k in self._field_names:
+            result[k] = str(getattr(self, k))
         return str(result)
 
     def __repr__(self):
@@ -13,12 +40,13 @@ class BaseModel:
 
     def __eq__(self, other):
         is_equal = isinstance(other, self.__class__)
-        for k, v in self.__dict__.items():
-            is_equal = is_equal and (other.__dict__.get(k) == v)
+        for k in self._field_names:
+            is_equal = is_equal and \
+                (getattr(other, k, None) == getattr(self, k))
 
         return is_equal
 
     def __getitem__(self, item):
-        if type(item) is str and item in self.__dict__:
-            return self.__dict__[item]
+        if type(item) is str and item in self._field_names:
+            return getattr(self, item)
         raise KeyError("Invalid key: {}".format(item))
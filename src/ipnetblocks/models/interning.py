@@ -0,0 +1,100 @@
+import threading
+
+
+def _freeze(value):
+    if type(value) is dict:
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if type(value) is list:
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class Interner:
+    """
+    Shares equal strings and equal nested objects between the records
+    built with it.
+
+    Responses repeat the same contacts, maintainers, orgs and autonomous
+    systems, country codes and sources across many records. Records built
+    with an `Interner` hold a single instance of each, so large result
+    sets kept in memory take a fraction of the space. Shared instances
+    must be treated as read-only: a change shows in every record holding
+    them.
+
+    An `Interner` keeps every value it has seen. Scope it to a response,
+    or call `clear` when sharing it across many of them. It can be shared
+    by the threads of a bulk lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._strings = {}
+        self._objects = {}
+        self._hits = 0
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: dict with the number of distinct `strings` and `objects`
+            kept and the number of `hits`, objects reused instead of
+            built
+        """
+        return {
+            'strings': len(self._strings),
+            'objects': len(self._objects),
+            'hits': self._hits,
+        }
+
+    def clear(self):
+        """
+        Forget the values seen so far. Records built earlier are left
+        unchanged.
+        """
+        with self._lock:
+            self._strings.clear()
+            self._objects.clear()
+
+    def string(self, value: str) -> str:
+        """
+        :return: the first seen str equal to the value
+        """
+        # atomic for str keys, no lock needed
+        return self._strings.setdefault(value, value)
+
+    def model(self, values: dict, cls: type):
+        """
+        :param values: Decoded object of the API response.
+        :param cls: Model of the object, e.g. `Contact`.
+        :return: the instance built for equal values earlier, otherwise
+            a new instance holding interned strings
+        """
+        key = (cls, _freeze(values))
+        with self._lock:
+            instance = self._objects.get(key)
+            if instance is not None:
+                self._hits += 1
+                return instance
+        instance = cls(values)
+        self.intern_fields(instance)
+        with self._lock:
+            # another thread may have built it meanwhile
+            existing = self._objects.setdefault(key, instance)
+            if existing is not instance:
+                self._hits += 1
+            return existing
+
+    def intern_fields(self, instance, names: tuple = None):
+        """
+        Replace the str fields of a model, and those of its lists of str,
+        by their interned values.
+
+        :param instance: Model instance.
+        :param names: Fields to intern. Default: every field
+        """
+        string = self.string
+        for name in names or instance._field_names:
+            value = getattr(instance, name, None)
+            if type(value) is str:
+                setattr(instance, name, string(value))
+            elif type(value) is list and value and type(value[0]) is str:
+                setattr(instance, name, [string(x) for x in value])
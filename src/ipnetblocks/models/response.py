@@ -1,7 +1,10 @@
-import copy
+from collections.abc import Sequence
 from datetime import datetime
+from functools import lru_cache
 
 from .base import BaseModel
+from .interning import Interner
+from ..columnar import InetnumColumns
 import sys
 
 if sys.version_info < (3, 9):
@@ -9,55 +12,96 @@ if sys.version_info < (3, 9):
 
 
 def _datetime_from_int(values: dict, key: str) -> datetime or None:
-    if key in values and values[key]:
-        return datetime.utcfromtimestamp(values[key])
+    value = values.get(key)
+    if value:
+        return datetime.utcfromtimestamp(value)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_datetime(value: str) -> datetime:
+    # Fixed "%Y-%m-%dT%H:%M:%SZ" layout decoded by slicing, strptime is
+    # kept for anything else. Records often share timestamps, hence the memo.
+    # int() would also accept signs, underscores and spaces in the fields
+    if len(value) == 20 and value[4] == '-' and value[7] == '-' \
+            and value[10] == 'T' and value[13] == ':' and value[16] == ':' \
+            and value[19] == 'Z' \
+            and (value[0:4] + value[5:7] + value[8:10] + value[11:13]
+                 + value[14:16] + value[17:19]).isdigit():
+        try:
+            return datetime(int(value[0:4]), int(value[5:7]),
+                            int(value[8:10]), int(value[11:13]),
+                            int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            pass
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+
+
+def _datetime_value(values: dict, key: str) -> datetime or None:
+    value = values.get(key)
+    if value:
+        return _parse_datetime(value)
     return None
 
 
 def _string_value(values: dict, key: str) -> str:
-    if key in values and values[key]:
-        return str(values[key])
+    value = values.get(key)
+    if value:
+        return value if type(value) is str else str(value)
     return ''
 
 
 def _float_value(values: dict, key: str) -> float:
-    if key in values and values[key]:
-        return float(values[key])
+    value = values.get(key)
+    if value:
+        return float(value)
     return 0.0
 
 
 def _int_value(values: dict, key: str) -> int:
-    if key in values and values[key]:
-        return int(values[key])
+    value = values.get(key)
+    if value:
+        return int(value)
     return 0
 
 
 def _list_value(values: dict, key: str) -> list:
-    if key in values and type(values[key]) is list:
-        return copy.deepcopy(values[key])
+    # Lists hold strings only, a shallow copy detaches them from the input.
+    value = values.get(key)
+    if type(value) is list:
+        return value[:]
     return []
 
 
-def _list_of_objects(values: dict, key: str, classname: str) -> list:
-    r = []
-    if key in values and type(values[key]) is list:
-        r = [globals()[classname](x) for x in values[key]]
-    return r
+def _list_of_objects(values: dict, key: str, cls: type,
+                     interner: Interner = None) -> list:
+    value = values.get(key)
+    if type(value) is list:
+        if interner is not None:
+            return [interner.model(x, cls) for x in value]
+        return [cls(x) for x in value]
+    return []
 
 
-def _object_value(values: dict, classname: str) -> object:
+def _object_value(values: dict, cls: type,
+                  interner: Interner = None) -> object:
     if values is not None:
-        return globals()[classname](values)
+        if interner is not None:
+            return interner.model(values, cls)
+        return cls(values)
     return 0
 
 
 def _bool_value(values: dict, key: str) -> bool:
-    if key in values and values[key]:
-        return bool(values[key])
+    value = values.get(key)
+    if value:
+        return bool(value)
     return False
 
 
 class AutonomousSystem(BaseModel):
+    __slots__ = ('asn', 'name', 'type', 'route', 'domain')
+
     asn: int
     name: str
     type: str
@@ -66,21 +110,24 @@ class AutonomousSystem(BaseModel):
 
     def __init__(self, values):
         super().__init__()
-        self.asn = 0
-        self.name = ''
-        self.type = ''
-        self.route = ''
-        self.domain = ''
-
         if values:
             self.asn = _int_value(values, 'asn')
             self.name = _string_value(values, 'name')
             self.type = _string_value(values, 'type')
             self.route = _string_value(values, 'route')
             self.domain = _string_value(values, 'domain')
+        else:
+            self.asn = 0
+            self.name = ''
+            self.type = ''
+            self.route = ''
+            self.domain = ''
 
 
 class Contact(BaseModel):
+    __slots__ = ('id', 'person', 'role', 'email', 'phone', 'country', 'city',
+                 'address')
+
     id: str
     person: str
     role: str
@@ -92,15 +139,6 @@ class Contact(BaseModel):
 
     def __init__(self, values):
         super().__init__()
-        self.id = ''
-        self.person = ''
-        self.role = ''
-        self.email = ''
-        self.phone = ''
-        self.country = ''
-        self.city = ''
-        self.address = []
-
         if values:
             self.id = _string_value(values, 'id')
             self.person = _string_value(values, 'person')
@@ -110,23 +148,37 @@ class Contact(BaseModel):
             self.country = _string_value(values, 'country')
             self.city = _string_value(values, 'city')
             self.address = _list_value(values, 'address')
+        else:
+            self.id = ''
+            self.person = ''
+            self.role = ''
+            self.email = ''
+            self.phone = ''
+            self.country = ''
+            self.city = ''
+            self.address = []
 
 
 class Maintainer(BaseModel):
+    __slots__ = ('mntner', 'email')
+
     mntner: str
     email: str
 
     def __init__(self, values):
         super().__init__()
-        self.mntner = ''
-        self.email = ''
-
         if values:
             self.mntner = _string_value(values, 'mntner')
             self.email = _string_value(values, 'email')
+        else:
+            self.mntner = ''
+            self.email = ''
 
 
 class Org(BaseModel):
+    __slots__ = ('org', 'name', 'email', 'phone', 'country', 'city',
+                 'postal_code', 'address')
+
     org: str
     name: str
     email: str
@@ -138,15 +190,6 @@ class Org(BaseModel):
 
     def __init__(self, values):
         super().__init__()
-        self.org = ''
-        self.name = ''
-        self.email = ''
-        self.phone = ''
-        self.country = ''
-        self.city = ''
-        self.postal_code = ''
-        self.address = []
-
         if values:
             self.org = _string_value(values, 'org')
             self.name = _string_value(values, 'name')
@@ -156,9 +199,25 @@ class Org(BaseModel):
             self.city = _string_value(values, 'city')
             self.postal_code = _string_value(values, 'postalCode')
             self.address = _list_value(values, 'address')
+        else:
+            self.org = ''
+            self.name = ''
+            self.email = ''
+            self.phone = ''
+            self.country = ''
+            self.city = ''
+            self.postal_code = ''
+            self.address = []
 
 
 class Inetnum(BaseModel):
+    __slots__ = ('inetnum', 'inetnum_first', 'inetnum_last', 'parent', 'AS',
+                 'netname', 'nethandle', 'description', 'modified',
+                 'country', 'city', 'address', 'abuse_contact',
+                 'admin_contact', 'tech_contact', 'org', 'mnt_by',
+                 'mnt_domains', 'mnt_lower', 'mnt_routes', 'remarks',
+                 'source')
+
     inetnum: str
     inetnum_first: int
     inetnum_last: int
@@ -191,59 +250,162 @@ class Inetnum(BaseModel):
     remarks: [str]
     source: str
 
-    def __init__(self, values):
-        super().__init__()
-        self.inetnum = ''
-        self.inetnum_first = 0
-        self.inetnum_last = 0
-        self.parent = ''
-        self.AS = None
-        self.netname = ''
-        self.nethandle = ''
-        self.description = []
-        self.modified = None
-        self.country = ''
-        self.city = ''
-        self.address = []
-        self.abuse_contact = None
-        self.admin_contact = None
-        self.tech_contact = None
-        self.org = None
-        self.mnt_by = []
-        self.mnt_domains = []
-        self.mnt_lower = []
-        self.mnt_routes = []
-        self.remarks = []
-        self.source = ''
+    _text_fields = ('inetnum', 'parent', 'netname', 'nethandle',
+                    'description', 'country', 'city', 'address', 'remarks',
+                    'source')
 
+    def __init__(self, values, interner: Interner = None):
+        """
+        :param values: Decoded record of the API response.
+        :param interner: Share equal strings and nested objects with the
+            other records built with it. Default: None
+        """
+        super().__init__()
         if values:
             self.inetnum = _string_value(values, 'inetnum')
-            # self.inetnum_first = _int_value(values, 'inetnumFirst')
-            # self.inetnum_last = _int_value(values, 'inetnumLast')
             self.inetnum_first = int(_string_value(values, 'inetnumFirstString'))
             self.inetnum_last = int(_string_value(values, 'inetnumLastString'))
             self.parent = _string_value(values, 'parent')
-            self.AS = _object_value(values['as'], 'AutonomousSystem')
             self.netname = _string_value(values, 'netname')
             self.nethandle = _string_value(values, 'nethandle')
             self.description = _list_value(values, 'description')
-            self.modified = datetime.strptime(_string_value(values, 'modified'), "%Y-%m-%dT%H:%M:%SZ")
+            self.modified = _datetime_value(values, 'modified')
             self.country = _string_value(values, 'country')
             self.city = _string_value(values, 'city')
             self.address = _list_value(values, 'address')
-            self.abuse_contact = _list_of_objects(values, 'abuseContact', 'Contact')
-            self.admin_contact = _list_of_objects(values, 'adminContact', 'Contact')
-            self.tech_contact = _list_of_objects(values, 'techContact', 'Contact')
-            self.org = _object_value(values['org'], 'Org')
-            self.mnt_by = _list_of_objects(values, 'mntBy', 'Maintainer')
-            self.mnt_domains = _list_of_objects(values, 'mntDomains', 'Maintainer')
-            self.mnt_lower = _list_of_objects(values, 'mntLower', 'Maintainer')
-            self.mnt_routes = _list_of_objects(values, 'mntRoutes', 'Maintainer')
             self.remarks = _list_value(values, 'remarks')
             self.source = _string_value(values, 'source')
+            if interner is not None:
+                interner.intern_fields(self, Inetnum._text_fields)
+            self._set_nested(values, interner)
+        else:
+            self.inetnum = ''
+            self.inetnum_first = 0
+            self.inetnum_last = 0
+            self.parent = ''
+            self.AS = None
+            self.netname = ''
+            self.nethandle = ''
+            self.description = []
+            self.modified = None
+            self.country = ''
+            self.city = ''
+            self.address = []
+            self.abuse_contact = None
+            self.admin_contact = None
+            self.tech_contact = None
+            self.org = None
+            self.mnt_by = []
+            self.mnt_domains = []
+            self.mnt_lower = []
+            self.mnt_routes = []
+            self.remarks = []
+            self.source = ''
+
+    def _set_nested(self, values: dict, interner: Interner = None):
+        self.AS = _object_value(values.get('as'), AutonomousSystem, interner)
+        self.abuse_contact = _list_of_objects(
+            values, 'abuseContact', Contact, interner)
+        self.admin_contact = _list_of_objects(
+            values, 'adminContact', Contact, interner)
+        self.tech_contact = _list_of_objects(
+            values, 'techContact', Contact, interner)
+        self.org = _object_value(values.get('org'), Org, interner)
+        self.mnt_by = _list_of_objects(values, 'mntBy', Maintainer, interner)
+        self.mnt_domains = _list_of_objects(
+            values, 'mntDomains', Maintainer, interner)
+        self.mnt_lower = _list_of_objects(
+            values, 'mntLower', Maintainer, interner)
+        self.mnt_routes = _list_of_objects(
+            values, 'mntRoutes', Maintainer, interner)
+
+
+class LazyInetnum(Inetnum):
+    """
+    `Inetnum` building its nested objects (AS, org, contacts and
+    maintainers) on first access.
+    """
+    __slots__ = ('_values', '_interner')
+
+    _nested_fields = {
+        'AS': lambda v, i: _object_value(v.get('as'), AutonomousSystem, i),
+        'abuse_contact':
+            lambda v, i: _list_of_objects(v, 'abuseContact', Contact, i),
+        'admin_contact':
+            lambda v, i: _list_of_objects(v, 'adminContact', Contact, i),
+        'tech_contact':
+            lambda v, i: _list_of_objects(v, 'techContact', Contact, i),
+        'org': lambda v, i: _object_value(v.get('org'), Org, i),
+        'mnt_by': lambda v, i: _list_of_objects(v, 'mntBy', Maintainer, i),
+        'mnt_domains':
+            lambda v, i: _list_of_objects(v, 'mntDomains', Maintainer, i),
+        'mnt_lower':
+            lambda v, i: _list_of_objects(v, 'mntLower', Maintainer, i),
+        'mnt_routes':
+            lambda v, i: _list_of_objects(v, 'mntRoutes', Maintainer, i),
+    }
+
+    def _set_nested(self, values: dict, interner: Interner = None):
+        self._values = values
+        self._interner = interner
+
+    def __eq__(self, other):
+        return isinstance(other, Inetnum) and BaseModel.__eq__(other, self)
+
+    def __getattr__(self, name):
+        # Called only for slots which are not set yet
+        decode = LazyInetnum._nested_fields.get(name)
+        if decode is None:
+            raise AttributeError(name)
+        value = decode(self._values, self._interner)
+        setattr(self, name, value)
+        return value
+
+
+class LazyInetnumList(Sequence):
+    """
+    Read-only sequence of `LazyInetnum` built from the decoded records
+    on first access and memoized.
+    """
+    __slots__ = ('_values', '_items', '_interner')
+
+    def __init__(self, values: list, interner: Interner = None):
+        self._values = values
+        self._items = [None] * len(values)
+        self._interner = interner
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if item is None:
+            item = LazyInetnum(self._values[index], self._interner)
+            self._items[index] = item
+        return item
+
+    def __iter__(self):
+        for i in range(len(self._items)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyInetnumList)):
+            return len(self) == len(other) and \
+                all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __str__(self):
+        return str(list(self))
+
+    def __repr__(self):
+        return repr(list(self))
 
 
 class Response(BaseModel):
+    __slots__ = ('search', 'count', 'limit', 'inetnums')
+
     search: str
     count: int
     limit: int
@@ -252,7 +414,18 @@ class Response(BaseModel):
     else:
         inetnums: [Inetnum]
 
-    def __init__(self, values):
+    def __init__(self, values, lazy: bool = False,
+                 interner: Interner or bool = None):
+        """
+        :param values: Decoded API response.
+        :param lazy: Build every `Inetnum` and its nested objects only on
+            first access. `inetnums` is then a read-only sequence instead
+            of a list. Default: False
+        :param interner: Share equal strings and equal autonomous systems,
+            contacts, maintainers and orgs between the records: True for
+            an `Interner` of this response, or an `Interner` shared with
+            other responses. Default: None
+        """
         super().__init__()
         self.search = ''
         self.count = 0
@@ -265,10 +438,31 @@ class Response(BaseModel):
                 res = values['result']
                 self.count = _int_value(res, 'count')
                 self.limit = _int_value(res, 'limit')
-                self.inetnums = _list_of_objects(res, 'inetnums', 'Inetnum')
+                if interner is True:
+                    interner = Interner()
+                elif interner is False:
+                    interner = None
+                if lazy:
+                    if type(res.get('inetnums')) is list:
+                        self.inetnums = LazyInetnumList(res['inetnums'],
+                                                        interner)
+                elif interner is not None:
+                    if type(res.get('inetnums')) is list:
+                        self.inetnums = [Inetnum(x, interner)
+                                         for x in res['inetnums']]
+                else:
+                    self.inetnums = _list_of_objects(res, 'inetnums', Inetnum)
+
+    def to_columns(self) -> InetnumColumns:
+        """
+        :return: `InetnumColumns` of `inetnums`
+        """
+        return InetnumColumns(self.inetnums)
 
 
 class ErrorMessage(BaseModel):
+    __slots__ = ('code', 'message')
+
     code: int
     message: str
 
@@ -1,3 +1,10 @@
-__all__ = ['ApiRequester']
+__all__ = ['ApiRequester', 'AsyncApiRequester', 'RateLimiter', 'RetryPolicy',
+           'RetryBudget', 'HedgePolicy',
+           'CircuitBreaker']
 
 from .http import ApiRequester
+from .async_http import AsyncApiRequester
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy, RetryBudget
+from .hedge import HedgePolicy
+from .circuit import CircuitBreaker
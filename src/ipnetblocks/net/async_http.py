@@ -0,0 +1,546 @@
+import asyncio
+import logging
+import time
+
+from .circuit import CircuitBreaker
+from .hedge import HedgePolicy
+from .http import ApiRequester
+from .ratelimit import RateLimiter, parse_retry_after
+from .retry import RetryPolicy
+from ..exceptions.error import CircuitOpenError
+from ..instrumentation import Instrumentation, RequestTrace
+from ..version import VERSION, LIBRARY_NAME
+
+try:
+    import aiohttp
+    # a body cut short raises ClientPayloadError
+    _TRANSIENT_ERRORS = (aiohttp.ClientConnectionError,
+                         aiohttp.ClientPayloadError, asyncio.TimeoutError)
+except ImportError:
+    aiohttp = None
+
+
+class AsyncApiRequester:
+    __logger = logging.getLogger("async-api-requester")
+    __connect_timeout = 10
+    __user_agent = "{name}/{ver}".format(name=LIBRARY_NAME, ver=VERSION)
+    _base_url: str
+    _timeout: float
+
+    def __init__(self, **kwargs):
+        """
+
+        :param kwargs: Supported parameters:
+        - base_url: (optional) API endpoint URL; str
+        - timeout: (optional) API call timeout in seconds; float
+        - pool_maxsize: (optional) max number of keep-alive connections
+          per host; int
+        - max_concurrency: (optional) max number of requests in flight;
+          int
+        - rate_limit: (optional) max number of requests per second or
+          a `RateLimiter` shared with other requesters; float or
+          RateLimiter
+        - retry: (optional) retry policy of failed requests or True for
+          the default `RetryPolicy`; RetryPolicy or bool
+        - hedge: (optional) hedging policy of slow GET requests or a fixed
+          delay in seconds before hedging; HedgePolicy or float
+        - circuit_breaker: (optional) circuit breaker failing requests
+          fast during outages or True for the default `CircuitBreaker`;
+          CircuitBreaker or bool
+        - instrumentation: (optional) event hooks, e.g.
+          a `MetricsCollector`; Instrumentation
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncApiRequester requires aiohttp. "
+                "Install it with `pip install ip-netblocks[async]`")
+
+        self._base_url = ''
+        self.timeout = 30
+        self._pool_maxsize = 100
+        self._max_concurrency = 100
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+        self._rate_limiter = None
+        self._retry_policy = None
+        self._hedge_policy = None
+        self._circuit_breaker = None
+        self._instrumentation = None
+        self._stats = {'connections': 0, 'requests': 0}
+
+        if 'base_url' in kwargs:
+            self.base_url = kwargs['base_url']
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+        if 'pool_maxsize' in kwargs:
+            self._pool_maxsize = ApiRequester._validate_pool_size(
+                kwargs['pool_maxsize'])
+        if 'max_concurrency' in kwargs:
+            self._max_concurrency = ApiRequester._validate_pool_size(
+                kwargs['max_concurrency'])
+        if 'rate_limit' in kwargs:
+            self.rate_limiter = kwargs['rate_limit']
+        if 'retry' in kwargs:
+            self.retry_policy = kwargs['retry']
+        if 'hedge' in kwargs:
+            self.hedge_policy = kwargs['hedge']
+        if 'circuit_breaker' in kwargs:
+            self.circuit_breaker = kwargs['circuit_breaker']
+        if 'instrumentation' in kwargs:
+            self.instrumentation = kwargs['instrumentation']
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, url: str):
+        if url is None or len(url) <= 8 or not url.startswith('http'):
+            raise ValueError("Invalid URL specified.")
+        self._base_url = url
+
+    @property
+    def timeout(self) -> float:
+        """API call timeout in seconds"""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value: float):
+        """API call timeout in seconds"""
+        if value is not None and 1 <= value <= 60:
+            self._timeout = value
+        else:
+            raise ValueError("Timeout value should be in [1, 60]")
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Max number of keep-alive connections per host"""
+        return self._pool_maxsize
+
+    @property
+    def max_concurrency(self) -> int:
+        """Max number of requests in flight"""
+        return self._max_concurrency
+
+    @property
+    def rate_limiter(self) -> RateLimiter or None:
+        """Token bucket every request goes through"""
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, value: RateLimiter or float or None):
+        self._rate_limiter = ApiRequester._validate_rate_limit(value)
+
+    @property
+    def retry_policy(self) -> RetryPolicy or None:
+        """Retry policy of failed requests"""
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy or bool or None):
+        self._retry_policy = ApiRequester._validate_retry_policy(value)
+
+    @property
+    def hedge_policy(self) -> HedgePolicy or None:
+        """Hedging policy of slow GET requests"""
+        return self._hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, value: HedgePolicy or float or None):
+        self._hedge_policy = ApiRequester._validate_hedge_policy(value)
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker or None:
+        """Circuit breaker every request goes through"""
+        return self._circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, value: CircuitBreaker or bool or None):
+        self._circuit_breaker = ApiRequester._validate_circuit_breaker(value)
+
+    @property
+    def instrumentation(self) -> Instrumentation or None:
+        """Event hooks of the requests"""
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, value: Instrumentation or None):
+        self._instrumentation = ApiRequester._validate_instrumentation(value)
+
+    @property
+    def pool_stats(self) -> dict:
+        """
+        Connection reuse statistics of the underlying connector.
+
+        :return: dict with `connections` (new connections opened),
+            `requests` (requests sent) and `reused` (requests sent over
+            an already open connection)
+        """
+        connections = self._stats['connections']
+        requests = self._stats['requests']
+        return {
+            'connections': connections,
+            'requests': requests,
+            'reused': max(requests - connections, 0),
+        }
+
+    async def close(self):
+        """Close all pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    async def get(self, payload: dict) -> str:
+        return (await self.get_content(payload)).decode('UTF-8')
+
+    async def get_content(self, payload: dict) -> bytes:
+        """Same as `get`, but returns the undecoded response body"""
+        if self._hedge_policy is not None:
+            return await self._hedged(lambda: self._get_content(payload))
+        return await self._get_content(payload)
+
+    async def _get_content(self, payload: dict) -> bytes:
+        trace = RequestTrace('GET')
+        try:
+            async with self._get_semaphore():
+                async with self._request(
+                        trace, 'GET',
+                        params=AsyncApiRequester._encode_params(payload)
+                ) as response:
+                    # the body was read and timed with the request
+                    return await AsyncApiRequester._handle_response_content(
+                        response)
+        except Exception as error:
+            trace.error = error
+            raise
+        finally:
+            self._emit('response', trace.to_dict())
+
+    async def iter_content(self, payload: dict, chunk_size: int = 65536):
+        """
+        Same as `get`, but yields the response body in chunks of `bytes`
+        as they arrive. The request is sent on the first iteration.
+        """
+        trace = RequestTrace('GET')
+        try:
+            async with self._get_semaphore():
+                async with self._request(
+                        trace, 'GET', stream=True,
+                        params=AsyncApiRequester._encode_params(payload)
+                ) as response:
+                    if not 200 <= response.status < 300:
+                        await AsyncApiRequester._handle_response_content(
+                            response, trace)
+                    started = time.perf_counter()
+                    try:
+                        async for chunk in response.content.iter_chunked(
+                                chunk_size):
+                            trace.bytes += len(chunk)
+                            yield chunk
+                    except _TRANSIENT_ERRORS:
+                        # the upstream stalled or dropped the download
+                        if self._circuit_breaker is not None:
+                            self._circuit_breaker.failure()
+                        raise
+                    finally:
+                        # includes the time the consumer spends on the chunks
+                        trace.add('download', time.perf_counter() - started)
+        except Exception as error:
+            trace.error = error
+            raise
+        finally:
+            self._emit('response', trace.to_dict())
+
+    async def post(self, data: dict) -> str:
+        headers = {}
+        if 'apiKey' in data:
+            headers['X-Authentication-Token'] = data.pop('apiKey')
+
+        trace = RequestTrace('POST')
+        try:
+            async with self._get_semaphore():
+                async with self._request(
+                        trace, 'POST',
+                        json=data,
+                        headers=headers
+                ) as response:
+                    return await AsyncApiRequester._handle_response(response)
+        except Exception as error:
+            trace.error = error
+            raise
+        finally:
+            self._emit('response', trace.to_dict())
+
+    async def _hedged(self, fn):
+        policy = self._hedge_policy
+        delay = policy.start()
+        started = time.monotonic()
+        if delay is None:
+            result = await fn()
+            policy.record(time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(fn())
+        pending = [primary]
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and policy.allows():
+                pending.append(asyncio.ensure_future(fn()))
+            hedged = len(pending) > 1
+
+            error = None
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.remove(task)
+                    if task.exception() is None:
+                        won = task is not primary
+                        policy.record(time.monotonic() - started, won)
+                        if hedged:
+                            self._emit('hedge', {'delay': delay, 'won': won})
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # the losing request is cancelled and its connection released
+            for task in pending:
+                task.cancel()
+
+    def _request(self, trace: RequestTrace, method: str,
+                 stream: bool = False, **kwargs) -> '_RequestContext':
+        return _RequestContext(self, trace, method, stream, kwargs)
+
+    def _emit(self, event: str, data: dict):
+        if self._instrumentation is not None:
+            self._instrumentation.emit(event, data)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so that it binds to the running event loop, which
+        # the session binds to as well.
+        loop = asyncio.get_event_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError(
+                "AsyncApiRequester is bound to the event loop of its first "
+                "request. Close it before using it in another event loop")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._semaphore
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection)
+            trace_config.on_request_start.append(self._on_request)
+            trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+            trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+            trace_config.on_connection_create_start.append(
+                self._on_connection_start)
+            trace_config.on_connection_reuseconn.append(self._on_reuse)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._max_concurrency,
+                    limit_per_host=self._pool_maxsize),
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=AsyncApiRequester.__connect_timeout,
+                    sock_read=self.timeout),
+                headers={'User-Agent': AsyncApiRequester.__user_agent},
+                trace_configs=[trace_config],
+            )
+        return self._session
+
+    async def _on_connection(self, session, context, params):
+        self._stats['connections'] += 1
+        trace = context.trace_request_ctx
+        if isinstance(trace, RequestTrace):
+            # DNS resolution is part of the connection, reported separately
+            trace.add('connect', time.perf_counter()
+                      - context.connect_started - getattr(context, 'dns', 0))
+            trace.reused = False
+
+    async def _on_connection_start(self, session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def _on_reuse(self, session, context, params):
+        trace = context.trace_request_ctx
+        if isinstance(trace, RequestTrace):
+            trace.reused = True
+
+    async def _on_dns_start(self, session, context, params):
+        context.dns_started = time.perf_counter()
+
+    async def _on_dns_end(self, session, context, params):
+        context.dns = time.perf_counter() - context.dns_started
+        trace = context.trace_request_ctx
+        if isinstance(trace, RequestTrace):
+            trace.add('dns', context.dns)
+
+    async def _on_request(self, session, context, params):
+        self._stats['requests'] += 1
+
+    @staticmethod
+    def _encode_params(payload: dict) -> list:
+        params = []
+        for key, value in payload.items():
+            values = value if isinstance(value, list) else [value]
+            params.extend((key, str(v)) for v in values)
+        return params
+
+    @staticmethod
+    async def _handle_response(response,
+                               trace: RequestTrace = None) -> str:
+        content = await AsyncApiRequester._handle_response_content(
+            response, trace)
+        return content.decode('UTF-8')
+
+    @staticmethod
+    async def _handle_response_content(response,
+                                       trace: RequestTrace = None) -> bytes:
+        started = time.perf_counter()
+        content = await response.read()
+        if trace is not None:
+            trace.bytes = len(content)
+            trace.add('download', time.perf_counter() - started)
+        if 200 <= response.status < 300:
+            return content
+
+        ApiRequester._raise_for_status(
+            response.status, content.decode('UTF-8', errors='replace'),
+            response.headers.get('Retry-After'))
+
+
+class _RequestContext:
+    """
+    Sends a request through the circuit breaker, the rate limiter and the
+    retry policy of an `AsyncApiRequester` and releases the response
+    on exit.
+    """
+
+    def __init__(self, requester: AsyncApiRequester, trace: RequestTrace,
+                 method: str, stream: bool, kwargs: dict):
+        self._requester = requester
+        self._trace = trace
+        self._method = method
+        self._stream = stream
+        self._kwargs = kwargs
+        self._response = None
+
+    async def __aenter__(self):
+        breaker = self._requester.circuit_breaker
+        if breaker is None:
+            self._response = await self._send()
+            return self._response
+
+        try:
+            breaker.before()
+        except CircuitOpenError as error:
+            self._requester._emit('circuit_open',
+                                  {'retry_after': error.retry_after})
+            raise
+        try:
+            self._response = await self._send()
+        except Exception:
+            breaker.failure()
+            raise
+        breaker.record(self._response.status)
+        return self._response
+
+    async def _send(self):
+        limiter = self._requester.rate_limiter
+        retry = self._requester.retry_policy
+        trace = self._trace
+        throttled = 0
+        attempt = 0
+        if retry is not None:
+            retry.budget.deposit()
+        while True:
+            if limiter is not None:
+                started = time.perf_counter()
+                await limiter.acquire_async()
+                trace.add('queue', time.perf_counter() - started)
+
+            trace.attempts += 1
+            trace.reused = None
+            phases = trace.phases
+            connecting = phases.get('dns', 0.0) + phases.get('connect', 0.0)
+            started = time.perf_counter()
+            try:
+                session = self._requester._get_session()
+                response = await session.request(
+                    self._method, self._requester.base_url,
+                    trace_request_ctx=trace, **self._kwargs)
+            except Exception as error:
+                if not await self._retries_error(error, attempt):
+                    raise
+                attempt += 1
+                continue
+
+            connecting = phases.get('dns', 0.0) + phases.get('connect', 0.0) \
+                - connecting
+            trace.add('server', time.perf_counter() - started - connecting)
+            trace.status = response.status
+
+            retry_after = response.headers.get('Retry-After')
+            if limiter is not None and \
+                    limiter.feedback(response.status, retry_after) \
+                    and throttled < limiter.max_retries:
+                response.release()
+                self._requester._emit(
+                    'throttle', {'retry_after': parse_retry_after(retry_after)})
+                throttled += 1
+                continue
+            if retry is not None and retry.retries_status(response.status) \
+                    and retry.allows(self._method, attempt):
+                response.release()
+                await self._backoff(
+                    retry.delay(attempt, parse_retry_after(retry_after)),
+                    attempt, status=response.status)
+                attempt += 1
+                continue
+            if self._stream:
+                return response
+
+            started = time.perf_counter()
+            try:
+                content = await response.read()
+            except Exception as error:
+                # a body cut short is retried like a failed request
+                response.close()
+                if not await self._retries_error(error, attempt):
+                    raise
+                attempt += 1
+                continue
+            trace.bytes = len(content)
+            trace.add('download', time.perf_counter() - started)
+            return response
+
+    async def _retries_error(self, error: Exception, attempt: int) -> bool:
+        retry = self._requester.retry_policy
+        if retry is None or not retry.retries_error(error, _TRANSIENT_ERRORS) \
+                or not retry.allows(self._method, attempt):
+            return False
+        await self._backoff(retry.delay(attempt), attempt, error=error)
+        return True
+
+    async def _backoff(self, delay: float, attempt: int, status: int = None,
+                       error: Exception = None):
+        self._requester._emit('retry', {
+            'method': self._method, 'attempt': attempt + 1, 'delay': delay,
+            'status': status, 'error': error})
+        await asyncio.sleep(delay)
+        self._trace.add('queue', delay)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._response.release()
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from ..exceptions.error import CircuitOpenError
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast while the upstream is down.
+
+    The circuit opens after `failure_threshold` consecutive failures,
+    i.e. connection errors, timeouts and 5xx responses, including stalls
+    and resets while downloading the body, and then rejects every
+    request with `CircuitOpenError`. After `recovery_timeout` seconds it
+    becomes half-open and lets `half_open_max_calls` trial requests
+    through: a success closes it again, a failure reopens it.
+
+    One instance can be shared by several requesters, threads and
+    asyncio tasks.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 5,
+                 recovery_timeout: float = 30,
+                 half_open_max_calls: int = 1):
+        """
+        :param failure_threshold: Consecutive failures opening the
+            circuit. Default: 5
+        :param recovery_timeout: Time in seconds the circuit stays open.
+            Default: 30
+        :param half_open_max_calls: Max number of trial requests while
+            half-open. Default: 1
+        """
+        if not isinstance(failure_threshold, int) or failure_threshold <= 0:
+            raise ValueError("failure_threshold should be a positive int")
+        if recovery_timeout is None or recovery_timeout <= 0:
+            raise ValueError("recovery_timeout should be a positive number")
+        if not isinstance(half_open_max_calls, int) or \
+                half_open_max_calls <= 0:
+            raise ValueError("half_open_max_calls should be a positive int")
+
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._changed = time.monotonic()
+        self._trials = 0
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def failure_threshold(self) -> int:
+        return self._failure_threshold
+
+    @property
+    def recovery_timeout(self) -> float:
+        return self._recovery_timeout
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: dict with `state`, `opened` (times the circuit opened)
+            and `rejected` (requests failed fast)
+        """
+        return {
+            'state': self.state,
+            'opened': self._opened,
+            'rejected': self._rejected,
+        }
+
+    def before(self):
+        """
+        Admit a request.
+
+        :raises CircuitOpenError: the circuit is open
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CircuitBreaker.HALF_OPEN:
+                # trial requests that never reported back don't keep
+                # the circuit half-open forever
+                if self._trials >= self._half_open_max_calls and \
+                        now - self._changed >= self._recovery_timeout:
+                    self._changed = now
+                    self._trials = 0
+                if self._trials < self._half_open_max_calls:
+                    self._trials += 1
+                    return
+            elif state == CircuitBreaker.CLOSED:
+                return
+
+            self._rejected += 1
+            retry_after = max(self._changed + self._recovery_timeout - now, 0)
+        raise CircuitOpenError("Circuit is open", retry_after)
+
+    def success(self):
+        """Report a request that reached a healthy upstream"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CircuitBreaker.HALF_OPEN:
+                self._set_state(CircuitBreaker.CLOSED)
+            if state != CircuitBreaker.OPEN:
+                self._failures = 0
+
+    def failure(self):
+        """Report a failed request"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CircuitBreaker.OPEN:
+                return
+            self._failures += 1
+            if state == CircuitBreaker.HALF_OPEN or \
+                    self._failures >= self._failure_threshold:
+                self._set_state(CircuitBreaker.OPEN)
+                self._opened += 1
+
+    def record(self, status_code: int):
+        """Report a request by the HTTP status code of its response"""
+        if status_code >= 500:
+            self.failure()
+        else:
+            self.success()
+
+    def reset(self):
+        """Close the circuit"""
+        with self._lock:
+            self._set_state(CircuitBreaker.CLOSED)
+
+    def _current_state(self, now: float) -> str:
+        if self._state == CircuitBreaker.OPEN and \
+                now - self._changed >= self._recovery_timeout:
+            self._set_state(CircuitBreaker.HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str):
+        self._state = state
+        self._changed = time.monotonic()
+        self._failures = 0
+        self._trials = 0
@@ -0,0 +1,111 @@
+from collections import deque
+import threading
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate of a slow request.
+
+    A GET request still running after `delay` seconds, or after the given
+    percentile of recently observed latencies, is sent once more and the
+    first response wins. The other request is aborted and its connection
+    closed. Hedges are capped at `max_ratio` of the requests so that they
+    barely count against the quota.
+    """
+    _RECOMPUTE_EVERY = 16
+
+    def __init__(self, delay: float = None,
+                 percentile: float = None,
+                 max_ratio: float = 0.05,
+                 min_samples: int = 20,
+                 window: int = 1000):
+        """
+        :param delay: Fixed delay in seconds before hedging.
+        :param percentile: Hedge after this percentile of the observed
+            latencies instead, e.g. 95. Requests are not hedged until
+            `min_samples` latencies have been observed.
+        :param max_ratio: Max number of hedges per request. Default: 0.05
+        :param min_samples: Default: 20
+        :param window: Number of recent latencies to keep. Default: 1000
+        """
+        if (delay is None) == (percentile is None):
+            raise ValueError("Exactly one of delay and percentile "
+                             "should be given")
+        if delay is not None and delay < 0:
+            raise ValueError("delay should be a non-negative number")
+        if percentile is not None and not 0 < percentile < 100:
+            raise ValueError("percentile should be between 0 and 100")
+        if not isinstance(max_ratio, (int, float)) or not 0 <= max_ratio <= 1:
+            raise ValueError("max_ratio should be between 0 and 1")
+        if not isinstance(min_samples, int) or min_samples <= 0 or \
+                not isinstance(window, int) or window < min_samples:
+            raise ValueError("min_samples should be a positive int "
+                             "not greater than window")
+
+        self._delay = delay
+        self._percentile = percentile
+        self._max_ratio = max_ratio
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._until_recompute = 0
+        self._requests = 0
+        self._hedged = 0
+        self._won = 0
+
+    @property
+    def max_ratio(self) -> float:
+        return self._max_ratio
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: dict with `requests` (requests that could be hedged),
+            `hedged` (duplicates sent) and `won` (duplicates answering
+            first)
+        """
+        return {
+            'requests': self._requests,
+            'hedged': self._hedged,
+            'won': self._won,
+        }
+
+    def start(self) -> float or None:
+        """
+        Account for a new request.
+
+        :return: delay in seconds before hedging it or None if it should
+            not be hedged
+        """
+        with self._lock:
+            self._requests += 1
+            if self._percentile is None or \
+                    len(self._latencies) < self._min_samples:
+                return self._delay
+            if self._until_recompute <= 0:
+                latencies = sorted(self._latencies)
+                index = int(len(latencies) * self._percentile / 100)
+                self._delay = latencies[min(index, len(latencies) - 1)]
+                self._until_recompute = self._RECOMPUTE_EVERY
+            self._until_recompute -= 1
+            return self._delay
+
+    def allows(self) -> bool:
+        """Take a hedge from the budget, False once it is exhausted"""
+        with self._lock:
+            if self._hedged + 1 > self._requests * self._max_ratio:
+                return False
+            self._hedged += 1
+            return True
+
+    def record(self, latency: float, hedge: bool = False):
+        """
+        Account for a successful response.
+
+        :param latency: Time in seconds the request took.
+        :param hedge: Whether the response came from the duplicate.
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            if hedge:
+                self._won += 1
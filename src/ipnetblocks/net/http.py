@@ -1,7 +1,103 @@
-from requests import request, Response
-from ..exceptions.error import ApiAuthError, HttpApiError, BadRequestError
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, \
+    CancelledError
+from contextlib import contextmanager
+from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError, \
+    Timeout, ChunkedEncodingError
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .circuit import CircuitBreaker
+from .hedge import HedgePolicy
+from .ratelimit import RateLimiter, parse_retry_after
+from .retry import RetryPolicy
+from ..exceptions.error import ApiAuthError, HttpApiError, BadRequestError, \
+    TooManyRequestsError, CircuitOpenError
+from ..instrumentation import Instrumentation, RequestTrace
 from ..version import VERSION, LIBRARY_NAME
 import logging
+import threading
+import time
+
+# RequestTrace of the request being sent by the current thread and
+# _HedgedAttempt of the hedged request it belongs to
+_local = threading.local()
+
+
+def _timed_connect(connect):
+    trace = getattr(_local, 'trace', None)
+    started = time.perf_counter()
+    connect()
+    if trace is not None:
+        trace.add('connect', time.perf_counter() - started)
+        trace.reused = False
+
+
+class _TracedHTTPConnection(HTTPConnection):
+    def connect(self):
+        _timed_connect(super().connect)
+
+
+class _TracedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _timed_connect(super().connect)
+
+
+class _TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracedHTTPConnection
+
+
+class _TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracedHTTPSConnection
+
+
+class _TracedHTTPAdapter(HTTPAdapter):
+    """Times the opening of new connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TracedHTTPConnectionPool,
+            'https': _TracedHTTPSConnectionPool,
+        }
+
+
+class _HedgedAttempt:
+    """Response of one of the requests of a hedged GET"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._response = None
+        self.cancelled = False
+
+    def started(self, response: Response):
+        with self._lock:
+            self._response = response
+            cancelled = self.cancelled
+        if cancelled:
+            _HedgedAttempt._abort(response)
+
+    def cancel(self):
+        """Abort the request, also while its body is downloading"""
+        with self._lock:
+            self.cancelled = True
+            response = self._response
+        if response is not None:
+            _HedgedAttempt._abort(response)
+
+    @staticmethod
+    def _abort(response: Response):
+        # shutting the socket down wakes up a read blocked in another
+        # thread, which urllib3 supports since 2.3
+        shutdown = getattr(response.raw, 'shutdown', None)
+        if shutdown is None:
+            response.close()
+            return
+        try:
+            shutdown()
+        except (ValueError, RuntimeError):
+            # the response is closed or its body read already
+            pass
 
 
 class ApiRequester:
@@ -10,6 +106,15 @@ class ApiRequester:
     __user_agent = "{name}/{ver}".format(name=LIBRARY_NAME, ver=VERSION)
     _base_url: str
     _timeout: float
+    _session: Session
+    _rate_limiter: RateLimiter or None
+    _retry_policy: RetryPolicy or None
+    _hedge_policy: HedgePolicy or None
+    _circuit_breaker: CircuitBreaker or None
+    _instrumentation: Instrumentation or None
+    # a body cut short raises ChunkedEncodingError, also without chunks
+    _TRANSIENT_ERRORS = (RequestsConnectionError, Timeout,
+                         ChunkedEncodingError)
 
     def __init__(self, **kwargs):
         """
@@ -17,14 +122,63 @@ class ApiRequester:
         :param kwargs: Supported parameters:
         - base_url: (optional) API endpoint URL; str
         - timeout: (optional) API call timeout in seconds; float
+        - pool_connections: (optional) number of per-host connection
+          pools to keep; int
+        - pool_maxsize: (optional) max number of keep-alive connections
+          per host; int
+        - rate_limit: (optional) max number of requests per second or
+          a `RateLimiter` shared with other requesters; float or
+          RateLimiter
+        - retry: (optional) retry policy of failed requests or True for
+          the default `RetryPolicy`; RetryPolicy or bool
+        - hedge: (optional) hedging policy of slow GET requests or a fixed
+          delay in seconds before hedging; HedgePolicy or float
+        - circuit_breaker: (optional) circuit breaker failing requests
+          fast during outages or True for the default `CircuitBreaker`;
+          CircuitBreaker or bool
+        - instrumentation: (optional) event hooks, e.g.
+          a `MetricsCollector`; Instrumentation
         """
         self._base_url = ''
         self.timeout = 30
+        self._pool_connections = 10
+        self._pool_maxsize = 10
+        self._rate_limiter = None
+        self._retry_policy = None
+        self._hedge_policy = None
+        self._circuit_breaker = None
+        self._instrumentation = None
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
         if 'base_url' in kwargs:
             self.base_url = kwargs['base_url']
         if 'timeout' in kwargs:
             self.timeout = kwargs['timeout']
+        if 'pool_connections' in kwargs:
+            self._pool_connections = ApiRequester._validate_pool_size(
+                kwargs['pool_connections'])
+        if 'pool_maxsize' in kwargs:
+            self._pool_maxsize = ApiRequester._validate_pool_size(
+                kwargs['pool_maxsize'])
+        if 'rate_limit' in kwargs:
+            self.rate_limiter = kwargs['rate_limit']
+        if 'retry' in kwargs:
+            self.retry_policy = kwargs['retry']
+        if 'hedge' in kwargs:
+            self.hedge_policy = kwargs['hedge']
+        if 'circuit_breaker' in kwargs:
+            self.circuit_breaker = kwargs['circuit_breaker']
+        if 'instrumentation' in kwargs:
+            self.instrumentation = kwargs['instrumentation']
+
+        self._session = self._create_session()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     @property
     def base_url(self) -> str:
@@ -49,49 +203,461 @@ class ApiRequester:
         else:
             raise ValueError("Timeout value should be in [1, 60]")
 
-    def get(self, payload: dict) -> str:
-        headers = {
-            'User-Agent': ApiRequester.__user_agent,
-            'Connection': 'close'
+    @property
+    def pool_connections(self) -> int:
+        """Number of per-host connection pools to keep"""
+        return self._pool_connections
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Max number of keep-alive connections per host"""
+        return self._pool_maxsize
+
+    @property
+    def rate_limiter(self) -> RateLimiter or None:
+        """Token bucket every request goes through"""
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, value: RateLimiter or float or None):
+        self._rate_limiter = ApiRequester._validate_rate_limit(value)
+
+    @property
+    def retry_policy(self) -> RetryPolicy or None:
+        """Retry policy of failed requests"""
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy or bool or None):
+        self._retry_policy = ApiRequester._validate_retry_policy(value)
+
+    @property
+    def hedge_policy(self) -> HedgePolicy or None:
+        """Hedging policy of slow GET requests"""
+        return self._hedge_policy
+
+    @hedge_policy.setter
+    def hedge_policy(self, value: HedgePolicy or float or None):
+        self._hedge_policy = ApiRequester._validate_hedge_policy(value)
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker or None:
+        """Circuit breaker every request goes through"""
+        return self._circuit_breaker
+
+    @circuit_breaker.setter
+    def circuit_breaker(self, value: CircuitBreaker or bool or None):
+        self._circuit_breaker = ApiRequester._validate_circuit_breaker(value)
+
+    @property
+    def instrumentation(self) -> Instrumentation or None:
+        """Event hooks of the requests"""
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, value: Instrumentation or None):
+        self._instrumentation = ApiRequester._validate_instrumentation(value)
+
+    @property
+    def pool_stats(self) -> dict:
+        """
+        Connection reuse statistics of the underlying pools.
+
+        :return: dict with `connections` (new connections opened),
+            `requests` (requests sent) and `reused` (requests sent over
+            an already open connection)
+        """
+        connections = 0
+        requests = 0
+        adapters = {id(a): a for a in self._session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                requests += pool.num_requests
+        return {
+            'connections': connections,
+            'requests': requests,
+            'reused': max(requests - connections, 0),
         }
-        response = request(
-            "GET",
-            self.base_url,
-            params=payload,
-            headers=headers,
-            timeout=(ApiRequester.__connect_timeout, self.timeout)
-        )
 
-        return ApiRequester._handle_response(response)
+    @property
+    def session(self) -> Session:
+        """Keep-alive HTTP session shared by all calls"""
+        return self._session
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self._session.close()
+
+    def get(self, payload: dict) -> str:
+        return self.get_content(payload).decode('UTF-8')
+
+    def get_content(self, payload: dict) -> bytes:
+        """Same as `get`, but returns the undecoded response body"""
+        if self._hedge_policy is not None:
+            return self._hedged(lambda: self._get_content(payload))
+        return self._get_content(payload)
+
+    def _get_content(self, payload: dict) -> bytes:
+        with self._traced('GET') as trace:
+            response = self._request(trace, 'GET', params=payload)
+
+            return ApiRequester._handle_response_content(response)
+
+    def _hedged(self, fn):
+        policy = self._hedge_policy
+        delay = policy.start()
+        started = time.monotonic()
+        if delay is None:
+            result = fn()
+            policy.record(time.monotonic() - started)
+            return result
+
+        executor = self._get_executor()
+        attempts = {}
+
+        def submit():
+            attempt = _HedgedAttempt()
+            future = executor.submit(ApiRequester._run_attempt, fn, attempt)
+            attempts[future] = attempt
+            return future
+
+        primary = submit()
+        pending = [primary]
+        if not wait(pending, timeout=delay).done and policy.allows():
+            pending.append(submit())
+        hedged = len(pending) > 1
+
+        error = None
+        while pending:
+            done = wait(pending, return_when=FIRST_COMPLETED).done
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    # the losing request is aborted and its connection
+                    # closed, once its headers arrive if still waiting
+                    for other in pending:
+                        other.cancel()
+                        attempts[other].cancel()
+                    won = future is not primary
+                    policy.record(time.monotonic() - started, won)
+                    if hedged:
+                        self._emit('hedge', {'delay': delay, 'won': won})
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    @staticmethod
+    def _run_attempt(fn, attempt: _HedgedAttempt):
+        _local.hedged = attempt
+        try:
+            return fn()
+        finally:
+            _local.hedged = None
+
+    @staticmethod
+    def _cancelled() -> bool:
+        hedged = getattr(_local, 'hedged', None)
+        return hedged is not None and hedged.cancelled
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2 * self._pool_maxsize,
+                    thread_name_prefix='ip-netblocks-hedge')
+            return self._executor
+
+    def iter_content(self, payload: dict, chunk_size: int = 65536):
+        """
+        Same as `get`, but yields the response body in chunks of `bytes`
+        as they arrive. The request is sent on the first iteration.
+        """
+        with self._traced('GET') as trace:
+            response = self._request(trace, 'GET', stream=True,
+                                     params=payload)
+
+            with response:
+                if not 200 <= response.status_code < 300:
+                    ApiRequester._read(trace, response)
+                    ApiRequester._raise_for_status(
+                        response.status_code, response.text,
+                        response.headers.get('Retry-After'))
+
+                started = time.perf_counter()
+                try:
+                    for chunk in response.iter_content(chunk_size):
+                        trace.bytes += len(chunk)
+                        yield chunk
+                except ApiRequester._TRANSIENT_ERRORS:
+                    # the upstream stalled or dropped the download
+                    if self._circuit_breaker is not None:
+                        self._circuit_breaker.failure()
+                    raise
+                finally:
+                    # includes the time the consumer spends on the chunks
+                    trace.add('download', time.perf_counter() - started)
 
     def post(self, data: dict) -> str:
-        headers = {
-            'User-Agent': ApiRequester.__user_agent,
-            'Connection': 'close'
-        }
+        headers = {}
         if 'apiKey' in data:
             headers['X-Authentication-Token'] = data.pop('apiKey')
 
-        response = request(
-            'POST',
-            self.base_url,
-            json=data,
-            headers=headers,
-            timeout=(ApiRequester.__connect_timeout, self.timeout)
-        )
+        with self._traced('POST') as trace:
+            response = self._request(trace, 'POST', json=data,
+                                     headers=headers)
+
+            return ApiRequester._handle_response(response)
+
+    @contextmanager
+    def _traced(self, method: str):
+        trace = RequestTrace(method)
+        try:
+            yield trace
+        except Exception as error:
+            trace.error = error
+            raise
+        finally:
+            if self._instrumentation is not None:
+                self._instrumentation.emit('response', trace.to_dict())
+
+    def _emit(self, event: str, data: dict):
+        if self._instrumentation is not None:
+            self._instrumentation.emit(event, data)
+
+    def _request(self, trace: RequestTrace, method: str,
+                 stream: bool = False, **kwargs) -> Response:
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return self._send(trace, method, stream, **kwargs)
+
+        try:
+            breaker.before()
+        except CircuitOpenError as error:
+            self._emit('circuit_open', {'retry_after': error.retry_after})
+            raise
+        try:
+            response = self._send(trace, method, stream, **kwargs)
+        except Exception:
+            # an aborted hedged request says nothing of the upstream
+            if not ApiRequester._cancelled():
+                breaker.failure()
+            raise
+        breaker.record(response.status_code)
+        return response
+
+    def _send(self, trace: RequestTrace, method: str, stream: bool,
+              **kwargs) -> Response:
+        limiter = self._rate_limiter
+        retry = self._retry_policy
+        throttled = 0
+        attempt = 0
+        if retry is not None:
+            retry.budget.deposit()
+        while True:
+            if ApiRequester._cancelled():
+                raise CancelledError()
+            if limiter is not None:
+                started = time.perf_counter()
+                limiter.acquire()
+                trace.add('queue', time.perf_counter() - started)
+
+            trace.attempts += 1
+            trace.reused = None
+            connect = trace.phases.get('connect', 0.0)
+            started = time.perf_counter()
+            _local.trace = trace
+            try:
+                # the body is read separately, so that its download is
+                # timed apart from the wait for the headers
+                response = self.session.request(
+                    method,
+                    self.base_url,
+                    stream=True,
+                    timeout=(ApiRequester.__connect_timeout, self.timeout),
+                    **kwargs
+                )
+            except Exception as error:
+                if not self._retries_error(trace, error, method, attempt):
+                    raise
+                attempt += 1
+                continue
+            finally:
+                _local.trace = None
 
-        return ApiRequester._handle_response(response)
+            hedged = getattr(_local, 'hedged', None)
+            if hedged is not None:
+                hedged.started(response)
+            connect = trace.phases.get('connect', 0.0) - connect
+            trace.add('server', time.perf_counter() - started - connect)
+            trace.status = response.status_code
+            if trace.reused is None:
+                trace.reused = True
+
+            retry_after = response.headers.get('Retry-After')
+            if limiter is not None and \
+                    limiter.feedback(response.status_code, retry_after) \
+                    and throttled < limiter.max_retries:
+                # a throttled request is queued again behind the pause
+                ApiRequester._discard(response)
+                self._emit('throttle',
+                           {'retry_after': parse_retry_after(retry_after)})
+                throttled += 1
+                continue
+            if retry is not None and retry.retries_status(
+                    response.status_code) and retry.allows(method, attempt):
+                ApiRequester._discard(response)
+                self._backoff(trace, retry.delay(
+                    attempt, parse_retry_after(retry_after)), method, attempt,
+                    status=response.status_code)
+                attempt += 1
+                continue
+            if stream:
+                return response
+
+            try:
+                ApiRequester._read(trace, response)
+            except Exception as error:
+                # a body cut short is retried like a failed request
+                response.close()
+                if not self._retries_error(trace, error, method, attempt):
+                    raise
+                attempt += 1
+                continue
+            return response
+
+    def _retries_error(self, trace: RequestTrace, error: Exception,
+                       method: str, attempt: int) -> bool:
+        retry = self._retry_policy
+        if ApiRequester._cancelled():
+            return False
+        if retry is None or not retry.retries_error(
+                error, ApiRequester._TRANSIENT_ERRORS) \
+                or not retry.allows(method, attempt):
+            return False
+        self._backoff(trace, retry.delay(attempt), method, attempt,
+                      error=error)
+        return True
+
+    def _backoff(self, trace: RequestTrace, delay: float, method: str,
+                 attempt: int, status: int = None, error: Exception = None):
+        self._emit('retry', {'method': method, 'attempt': attempt + 1,
+                             'delay': delay, 'status': status,
+                             'error': error})
+        time.sleep(delay)
+        trace.add('queue', delay)
+
+    @staticmethod
+    def _discard(response: Response):
+        # reading the body lets the connection go back to the pool, a
+        # body cut short only costs the connection
+        try:
+            response.content
+        except ApiRequester._TRANSIENT_ERRORS:
+            pass
+        finally:
+            response.close()
+
+    @staticmethod
+    def _read(trace: RequestTrace, response: Response):
+        started = time.perf_counter()
+        trace.bytes = len(response.content)
+        trace.add('download', time.perf_counter() - started)
+
+    def _create_session(self) -> Session:
+        session = Session()
+        session.headers['User-Agent'] = ApiRequester.__user_agent
+        adapter = _TracedHTTPAdapter(pool_connections=self._pool_connections,
+                                     pool_maxsize=self._pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     @staticmethod
     def _handle_response(response: Response) -> str:
+        return ApiRequester._handle_response_content(response).decode('UTF-8')
+
+    @staticmethod
+    def _handle_response_content(response: Response) -> bytes:
         if 200 <= response.status_code < 300:
-            return response.content.decode('UTF-8')
+            return response.content
+
+        ApiRequester._raise_for_status(response.status_code, response.text,
+                                       response.headers.get('Retry-After'))
+
+    @staticmethod
+    def _raise_for_status(status_code: int, text: str,
+                          retry_after: str or None = None):
+        if status_code in [401, 402, 403]:
+            raise ApiAuthError(text)
+
+        if status_code in [400, 422]:
+            raise BadRequestError(text)
 
-        if response.status_code in [401, 402, 403]:
-            raise ApiAuthError(response.text)
+        if status_code == 429:
+            raise TooManyRequestsError(text, parse_retry_after(retry_after))
 
-        if response.status_code in [400, 422]:
-            raise BadRequestError(response.text)
+        if status_code >= 300:
+            raise HttpApiError(text)
+
+    @staticmethod
+    def _validate_rate_limit(value) -> RateLimiter or None:
+        if value is None or isinstance(value, RateLimiter):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and value > 0:
+            return RateLimiter(value)
+        raise ValueError(
+            "Rate limit should be a positive number, a RateLimiter or None")
 
-        if response.status_code >= 300:
-            raise HttpApiError(response.text)
+    @staticmethod
+    def _validate_retry_policy(value) -> RetryPolicy or None:
+        if value is None or value is False:
+            return None
+        if value is True:
+            return RetryPolicy()
+        if isinstance(value, RetryPolicy):
+            return value
+        raise ValueError("Retry should be a RetryPolicy, bool or None")
+
+    @staticmethod
+    def _validate_hedge_policy(value) -> HedgePolicy or None:
+        if value is None or isinstance(value, HedgePolicy):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and value >= 0:
+            return HedgePolicy(delay=value)
+        raise ValueError(
+            "Hedge should be a HedgePolicy, a non-negative delay or None")
+
+    @staticmethod
+    def _validate_circuit_breaker(value) -> CircuitBreaker or None:
+        if value is None or value is False:
+            return None
+        if value is True:
+            return CircuitBreaker()
+        if isinstance(value, CircuitBreaker):
+            return value
+        raise ValueError(
+            "Circuit breaker should be a CircuitBreaker, bool or None")
+
+    @staticmethod
+    def _validate_instrumentation(value) -> Instrumentation or None:
+        if value is None or isinstance(value, Instrumentation):
+            return value
+        raise ValueError("Instrumentation should be an instance of "
+                         "ipnetblocks.Instrumentation or None")
+
+    @staticmethod
+    def _validate_pool_size(value: int) -> int:
+        if isinstance(value, int) and value > 0:
+            return value
+        raise ValueError("Pool size should be a positive int")
@@ -0,0 +1,160 @@
+import asyncio
+from email.utils import parsedate_to_datetime
+import datetime
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket smoothing requests to at most `rate` per second.
+
+    One instance can be shared by several requesters and is safe to use
+    from many threads and asyncio tasks at once. Every request reserves
+    a token and waits until its turn, so bursts are spread out before
+    they reach the server.
+
+    The limiter adapts to throttling: a 429 response pauses all requests
+    for the Retry-After delay and halves the rate, which then recovers
+    by 1% of `rate` per successful response.
+    """
+    _DEFAULT_PAUSE = 1.0
+    _MIN_RATE_FACTOR = 0.1
+    _RECOVERY_FACTOR = 0.01
+
+    def __init__(self, rate: float, burst: int = None, max_retries: int = 3):
+        """
+        :param rate: Max number of requests per second.
+        :param burst: Max number of requests sent at once after a quiet
+            period. Default: `rate` rounded down, at least 1
+        :param max_retries: How many times a throttled request is sent
+            again before `TooManyRequestsError` is raised. Default: 3
+        """
+        if not isinstance(rate, (int, float)) or rate <= 0:
+            raise ValueError("rate should be a positive number")
+        if burst is None:
+            burst = max(int(rate), 1)
+        if not isinstance(burst, int) or burst <= 0:
+            raise ValueError("burst should be a positive int")
+        if not isinstance(max_retries, int) or max_retries < 0:
+            raise ValueError("max_retries should be a non-negative int")
+
+        self._max_rate = rate
+        self._rate = rate
+        self._burst = burst
+        self._max_retries = max_retries
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._acquired = 0
+        self._delayed = 0
+        self._throttled = 0
+
+    @property
+    def rate(self) -> float:
+        """Current rate in requests per second"""
+        return self._rate
+
+    @property
+    def max_rate(self) -> float:
+        return self._max_rate
+
+    @property
+    def burst(self) -> int:
+        return self._burst
+
+    @property
+    def max_retries(self) -> int:
+        return self._max_retries
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'acquired': self._acquired,
+            'delayed': self._delayed,
+            'throttled': self._throttled,
+            'rate': self._rate,
+        }
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        :return: time in seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(
+                    self._burst,
+                    self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+            self._tokens -= 1
+            wait = self._updated - now + max(-self._tokens, 0) / self._rate
+            self._acquired += 1
+            if wait > 0:
+                self._delayed += 1
+            return wait
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Suspend the calling task until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def feedback(self, status_code: int, retry_after: str = None) -> bool:
+        """
+        Adapt to the outcome of a request.
+
+        :param status_code: HTTP status code of the response.
+        :param retry_after: Value of its Retry-After header, if any.
+        :return: True if the request was throttled
+        """
+        with self._lock:
+            if status_code != 429:
+                self._rate = min(
+                    self._max_rate,
+                    self._rate + self._max_rate * self._RECOVERY_FACTOR)
+                return False
+
+            pause = parse_retry_after(retry_after)
+            if pause is None:
+                pause = self._DEFAULT_PAUSE
+            self._rate = max(self._rate / 2,
+                             self._max_rate * self._MIN_RATE_FACTOR)
+            resume = time.monotonic() + pause
+            if resume > self._updated:
+                self._updated = resume
+                self._tokens = min(self._tokens, 1)
+            self._throttled += 1
+            return True
+
+
+def parse_retry_after(value: str or None) -> float or None:
+    """
+    Delay in seconds given by a Retry-After header, either as a number of
+    seconds or as an HTTP date.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date is None:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max((date - now).total_seconds(), 0.0)
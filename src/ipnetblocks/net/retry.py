@@ -0,0 +1,179 @@
+import random
+import threading
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of the requests, so that retrying cannot
+    multiply the load on an upstream that is already failing.
+
+    Every request deposits `ratio` of a token, every retry withdraws
+    a whole one. At most `min_retries` tokens are kept, which is also
+    the initial balance, so a few retries are possible on low traffic.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_retries: int = 10):
+        """
+        :param ratio: Retries allowed per request. Default: 0.1
+        :param min_retries: Max number of retries saved up. Default: 10
+        """
+        if not isinstance(ratio, (int, float)) or ratio < 0:
+            raise ValueError("ratio should be a non-negative number")
+        if not isinstance(min_retries, int) or min_retries < 0:
+            raise ValueError("min_retries should be a non-negative int")
+
+        self._ratio = ratio
+        self._min_retries = min_retries
+        self._lock = threading.Lock()
+        self._balance = float(min_retries)
+        self._exhausted = 0
+
+    @property
+    def ratio(self) -> float:
+        return self._ratio
+
+    @property
+    def min_retries(self) -> int:
+        return self._min_retries
+
+    @property
+    def stats(self) -> dict:
+        return {'balance': self._balance, 'exhausted': self._exhausted}
+
+    def deposit(self):
+        """Account for a new request"""
+        with self._lock:
+            self._balance = min(self._balance + self._ratio,
+                                max(self._min_retries, 1))
+
+    def withdraw(self) -> bool:
+        """
+        Take the token of a retry.
+
+        :return: False if the budget is exhausted
+        """
+        with self._lock:
+            if self._balance < 1:
+                self._exhausted += 1
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Which failed requests are sent again and when.
+
+    Only idempotent methods are retried, GET by default. Retries wait for
+    an exponentially growing delay with full jitter, or for the
+    Retry-After delay of the response if that is longer.
+    """
+
+    def __init__(self, max_attempts: int = 3,
+                 backoff: float = 0.1,
+                 max_backoff: float = 10,
+                 jitter: bool = True,
+                 status_codes=(500, 502, 503, 504),
+                 exceptions: tuple = None,
+                 methods=('GET',),
+                 budget: RetryBudget or None = None):
+        """
+        :param max_attempts: Max number of times a request is sent,
+            including the first one. Default: 3
+        :param backoff: Delay in seconds before the first retry, doubled
+            for every next one. Default: 0.1
+        :param max_backoff: Max delay in seconds. Default: 10
+        :param jitter: Wait for a random delay between zero and the
+            backoff, so that clients failing together don't retry
+            together. Default: True
+        :param status_codes: HTTP status codes to retry.
+            Default: 500, 502, 503, 504
+        :param exceptions: Exception classes to retry or None for the
+            connection errors, timeouts and bodies cut short of the
+            transport. Default: None
+        :param methods: HTTP methods safe to retry. Add 'POST' to retry
+            `ApiRequester.post`. Default: ('GET',)
+        :param budget: `RetryBudget` shared by all requests using the
+            policy. Default: a `RetryBudget` with default settings
+        """
+        if not isinstance(max_attempts, int) or max_attempts < 1:
+            raise ValueError("max_attempts should be a positive int")
+        if backoff is None or backoff < 0 or max_backoff is None \
+                or max_backoff < 0:
+            raise ValueError("backoff and max_backoff should be "
+                             "non-negative numbers")
+
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._status_codes = frozenset(status_codes)
+        self._exceptions = None if exceptions is None else tuple(exceptions)
+        self._methods = frozenset(m.upper() for m in methods)
+        self._budget = RetryBudget() if budget is None else budget
+        self._retries = 0
+
+    @property
+    def max_attempts(self) -> int:
+        return self._max_attempts
+
+    @property
+    def status_codes(self) -> frozenset:
+        return self._status_codes
+
+    @property
+    def methods(self) -> frozenset:
+        return self._methods
+
+    @property
+    def budget(self) -> RetryBudget:
+        return self._budget
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'retries': self._retries,
+            'budget_exhausted': self._budget.stats['exhausted'],
+        }
+
+    def retries_status(self, status_code: int) -> bool:
+        return status_code in self._status_codes
+
+    def retries_error(self, error: BaseException, transient: tuple) -> bool:
+        """
+        :param error: Exception raised while sending the request.
+        :param transient: Exception classes the transport considers
+            transient, used when the policy has no `exceptions` of its own.
+        """
+        classes = transient if self._exceptions is None else self._exceptions
+        return isinstance(error, classes)
+
+    def allows(self, method: str, attempt: int) -> bool:
+        """
+        Whether a failed request may be sent again. Takes a token from the
+        budget when it may.
+
+        :param method: HTTP method of the request.
+        :param attempt: Number of retries already made.
+        """
+        if method.upper() not in self._methods or \
+                attempt + 1 >= self._max_attempts:
+            return False
+        if not self._budget.withdraw():
+            return False
+        self._retries += 1
+        return True
+
+    def delay(self, attempt: int, retry_after: float or None = None) -> float:
+        """
+        Time in seconds to wait before a retry.
+
+        :param attempt: Number of retries already made.
+        :param retry_after: Delay requested by the server, if any.
+        """
+        delay = min(self._max_backoff, self._backoff * (2 ** attempt))
+        if self._jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self._max_backoff))
+        return delay
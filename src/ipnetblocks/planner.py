@@ -0,0 +1,140 @@
+from .address import IpAddress, parse_ip_address
+from .models.response import Response
+from .exceptions.error import ParameterError
+
+
+class LookupPlan:
+    """
+    Groups the IP addresses of a bulk lookup by network.
+
+    Addresses are deduplicated and sorted by value. Every network of
+    `ipv4_prefix` or `ipv6_prefix` bits holding at least `min_group`
+    distinct addresses is looked up once, as a CIDR, and the ranges it
+    returns are fanned out to its addresses. The other addresses, and
+    those that no returned range covers, are looked up one by one.
+
+    The answer of an address is built from the returned ranges that
+    cover it, most specific first, the way `RangeCache` answers lookups.
+    A network whose lookup returned fewer ranges than it matched,
+    because of the `NETWORK_LIMIT`, is looked up address by address.
+    """
+    NETWORK_LIMIT = 1000
+
+    def __init__(self, values, ipv4_prefix: int = 24, ipv6_prefix: int = 48,
+                 min_group: int = 2):
+        """
+        :param values: Iterable of IP addresses.
+        :param ipv4_prefix: Prefix length of IPv4 networks. Default: 24
+        :param ipv6_prefix: Prefix length of IPv6 networks. Default: 48
+        :param min_group: Min number of distinct addresses looked up as
+            a network. Default: 2
+        :raises ParameterError: invalid prefix length or `min_group`
+        """
+        if not isinstance(ipv4_prefix, int) or not 0 < ipv4_prefix <= 32:
+            raise ParameterError("ipv4_prefix should be an int between "
+                                 "1 and 32")
+        if not isinstance(ipv6_prefix, int) or not 0 < ipv6_prefix <= 128:
+            raise ParameterError("ipv6_prefix should be an int between "
+                                 "1 and 128")
+        if not isinstance(min_group, int) or min_group < 2:
+            raise ParameterError("min_group should be an int greater than 1")
+
+        self.values = list(values)
+        self._keys = {}
+        addresses = {}
+        self.invalid = []
+        for value in self.values:
+            if value in self._keys:
+                continue
+            try:
+                ip = parse_ip_address(value)
+            except (TypeError, ValueError):
+                self._keys[value] = (None, value)
+                self.invalid.append(value)
+                continue
+            self._keys[value] = ip.mapped
+            addresses.setdefault(ip.mapped, ip)
+
+        groups = {}
+        for mapped in sorted(addresses):
+            ip = addresses[mapped]
+            prefix = ipv4_prefix if ip.version == 4 else ipv6_prefix
+            shift = ip.max_prefix - prefix
+            network = IpAddress(ip.version, ip.value >> shift << shift, prefix)
+            groups.setdefault(network, []).append(ip)
+
+        self.networks = []
+        self.singles = []
+        for network, members in groups.items():
+            if len(members) >= min_group:
+                self.networks.append((network, members))
+            else:
+                self.singles.extend(members)
+        self._unique = len(addresses)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: dict with `values`, `unique` (distinct valid addresses),
+            `networks` and `singles` (addresses looked up alone) and
+            `invalid`
+        """
+        return {
+            'values': len(self.values),
+            'unique': self._unique,
+            'networks': len(self.networks),
+            'singles': len(self.singles),
+            'invalid': len(self.invalid),
+        }
+
+    @staticmethod
+    def fan_out(members: [IpAddress], response: Response or Exception,
+                limit: int, answers: dict) -> [IpAddress]:
+        """
+        Answer the addresses of a network from the response of its lookup.
+
+        :param members: Addresses of the network.
+        :param response: Response of the network lookup or the exception
+            it raised.
+        :param limit: Max count of returned records per address.
+        :param answers: dict the answers are stored into, by
+            `IpAddress.mapped`.
+        :return: addresses still to be looked up one by one
+        """
+        if isinstance(response, Exception) or \
+                response.count > len(response.inetnums):
+            return list(members)
+
+        missing = []
+        for ip in members:
+            mapped = ip.mapped
+            covering = [x for x in response.inetnums
+                        if x.inetnum_first <= mapped <= x.inetnum_last]
+            if not covering:
+                missing.append(ip)
+                continue
+            covering.sort(key=lambda x: x.inetnum_last - x.inetnum_first)
+            answer = Response(None)
+            answer.search = ip.text
+            answer.count = len(covering)
+            answer.limit = limit
+            answer.inetnums = covering[:limit]
+            answers[mapped] = answer
+        return missing
+
+    def pending(self, missing: [IpAddress]) -> list:
+        """
+        :param missing: Addresses of networks that could not be answered.
+        :return: list of (key, value) to be looked up one by one, the
+            value being the text of an address or an invalid input
+        """
+        return [(ip.mapped, ip.text) for ip in self.singles + missing] + \
+            [((None, value), value) for value in self.invalid]
+
+    def results(self, answers: dict) -> list:
+        """
+        :param answers: `Response` or exception by key.
+        :return: list of (value, `Response` or exception) tuples in input
+            order
+        """
+        return [(value, answers[self._keys[value]]) for value in self.values]
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls made from several threads.
+
+    While a call for a key is in flight, other callers asking for the same
+    key wait for it and share its result or its exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = 0
+        self._shared = 0
+
+    @property
+    def stats(self) -> dict:
+        return {'executed': self._executed, 'shared': self._shared}
+
+    def do(self, key, fn):
+        """
+        :param key: Hashable key identifying identical calls.
+        :param fn: Callable without arguments making the actual call.
+        :return: result of `fn`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent identical coroutine calls within an event loop.
+
+    The call runs as a separate task, so cancelling one of the waiting
+    callers does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._executed = 0
+        self._shared = 0
+
+    @property
+    def stats(self) -> dict:
+        return {'executed': self._executed, 'shared': self._shared}
+
+    async def do(self, key, fn):
+        """
+        :param key: Hashable key identifying identical calls.
+        :param fn: Coroutine function without arguments making
+            the actual call.
+        :return: result of `fn`
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self._executed += 1
+        else:
+            self._shared += 1
+        return await asyncio.shield(task)
@@ -0,0 +1,166 @@
+import codecs
+from json import JSONDecoder, JSONDecodeError
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = JSONDecoder()
+# Yielded by the parser when the buffer has to be refilled.
+_MORE = object()
+# Longest data a truncated token leaves after the position of the decoding
+# error, e.g. '-Infinity' or a '\uXXXX' escape. Errors further from the
+# end of the data aren't fixed by more data.
+_MAX_PARTIAL_TOKEN = 16
+
+
+class _Buffer:
+    _COMPACT_SIZE = 65536
+
+    def __init__(self):
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = codecs.getincrementaldecoder('UTF-8')()
+
+    def feed(self, chunk: bytes or None):
+        if self.pos > self._COMPACT_SIZE or self.pos * 2 > len(self.text):
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        if chunk is None:
+            self.eof = True
+            self.text += self._decoder.decode(b'', True)
+        else:
+            self.text += self._decoder.decode(chunk)
+
+
+def _char(buf: _Buffer):
+    """Next non-whitespace character, not consumed"""
+    while True:
+        buf.pos = _WHITESPACE.match(buf.text, buf.pos).end()
+        if buf.pos < len(buf.text):
+            return buf.text[buf.pos]
+        if buf.eof:
+            raise JSONDecodeError("Unexpected end of data", buf.text, buf.pos)
+        yield _MORE
+
+
+def _expect(buf: _Buffer, char: str):
+    if (yield from _char(buf)) != char:
+        raise JSONDecodeError("Expecting '{}'".format(char), buf.text, buf.pos)
+    buf.pos += 1
+
+
+def _truncated(buf: _Buffer, error: JSONDecodeError) -> bool:
+    return error.msg.startswith('Unterminated string') or \
+        len(buf.text) - error.pos <= _MAX_PARTIAL_TOKEN
+
+
+def _value(buf: _Buffer):
+    while True:
+        yield from _char(buf)
+        try:
+            value, end = _DECODER.raw_decode(buf.text, buf.pos)
+        except JSONDecodeError as error:
+            if buf.eof or not _truncated(buf, error):
+                raise
+            # decoded again once its data doubled, so that a large value
+            # is decoded a logarithmic number of times
+            size = len(buf.text) - buf.pos
+            while len(buf.text) - buf.pos < 2 * size and not buf.eof:
+                yield _MORE
+            continue
+        # a number at the end of the buffer may continue in the next chunk
+        if end == len(buf.text) and not buf.eof and \
+                isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield _MORE
+            continue
+        buf.pos = end
+        return value
+
+
+def _separator(buf: _Buffer, end: str):
+    """Consume the ',' before the next member, False at the end instead"""
+    char = yield from _char(buf)
+    if char == end:
+        return False
+    if char != ',':
+        raise JSONDecodeError("Expecting ',' delimiter", buf.text, buf.pos)
+    buf.pos += 1
+    return True
+
+
+def _check_name(buf: _Buffer):
+    if (yield from _char(buf)) != '"':
+        raise JSONDecodeError(
+            "Expecting property name enclosed in double quotes",
+            buf.text, buf.pos)
+
+
+def _check_value(buf: _Buffer):
+    # a separator would otherwise wait for the end of the data to fail
+    if (yield from _char(buf)) in ',]}':
+        raise JSONDecodeError("Expecting value", buf.text, buf.pos)
+
+
+def _items(buf: _Buffer, path: tuple):
+    for key in path:
+        yield from _expect(buf, '{')
+        more = (yield from _char(buf)) != '}'
+        while more:
+            yield from _check_name(buf)
+            name = yield from _value(buf)
+            yield from _expect(buf, ':')
+            if name == key:
+                break
+            yield from _value(buf)
+            more = yield from _separator(buf, '}')
+        else:
+            raise ValueError("Could not find the '{}' key".format(key))
+
+    yield from _expect(buf, '[')
+    if (yield from _char(buf)) == ']':
+        return
+    while True:
+        yield from _check_value(buf)
+        yield (yield from _value(buf))
+        if not (yield from _separator(buf, ']')):
+            return
+
+
+def iter_array(chunks, path: tuple):
+    """
+    Incrementally parse a JSON document and yield the items of the array
+    found under `path` as soon as each of them is complete.
+
+    Only the current item and the unparsed part of the current chunk are
+    kept in memory. Members before the array are skipped, the rest of the
+    document after it is not validated.
+
+    :param chunks: Iterable of `bytes` chunks of an UTF-8 JSON document.
+    :param path: Keys of the nested objects leading to the array,
+        e.g. ('result', 'inetnums').
+    :raises ValueError: the document is not valid JSON or has no array
+        under `path`
+    """
+    buf = _Buffer()
+    chunks = iter(chunks)
+    for item in _items(buf, path):
+        if item is _MORE:
+            buf.feed(next(chunks, None))
+        else:
+            yield item
+
+
+async def aiter_array(chunks, path: tuple):
+    """
+    Same as `iter_array`, but consumes an async iterable of chunks.
+    """
+    buf = _Buffer()
+    chunks = chunks.__aiter__()
+    for item in _items(buf, path):
+        if item is _MORE:
+            try:
+                buf.feed(await chunks.__anext__())
+            except StopAsyncIteration:
+                buf.feed(None)
+        else:
+            yield item
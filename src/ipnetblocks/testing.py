@@ -0,0 +1,85 @@
+"""
+Helpers to test code using the library without reaching the API.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubServer:
+    """
+    Local keep-alive HTTP server replaying canned API responses.
+
+    `handler` receives the parsed query string and returns a
+    (status, body) or a (status, body, headers) tuple. The body is a str,
+    bytes, or a list of them sent one by one, numbers in the list being
+    pauses in seconds. A `Content-Length` header not matching the body
+    makes the server drop the connection once the body is sent. Every
+    received query is recorded in `requests`, and every response the
+    client stopped reading is counted in `dropped`.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.dropped = 0
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # the body must not wait for the ACK of the headers
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                stub.requests.append(query)
+                status, body, *headers = stub.handler(query)
+                headers = dict(headers[0]) if headers else {}
+                if isinstance(body, (str, bytes)):
+                    body = [body]
+                body = [x.encode('utf-8') if isinstance(x, str) else x
+                        for x in body]
+                length = sum(len(x) for x in body if isinstance(x, bytes))
+                if 'Content-Length' not in headers:
+                    headers['Content-Length'] = str(length)
+                elif int(headers['Content-Length']) != length:
+                    self.close_connection = True
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    for chunk in body:
+                        if isinstance(chunk, bytes):
+                            self.wfile.write(chunk)
+                        else:
+                            time.sleep(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    stub.dropped += 1
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    @property
+    def url(self) -> str:
+        return 'http://127.0.0.1:{}/api/v2'.format(self._server.server_port)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,44 @@
+import unittest
+from ipnetblocks import Client, ParameterError
+from ipnetblocks.address import parse_ip_address
+
+
+class TestAddress(unittest.TestCase):
+
+    def test_ipv4(self):
+        address = parse_ip_address('1.1.1.1')
+        self.assertEqual(address.version, 4)
+        self.assertEqual(address.value, 0x01010101)
+        self.assertEqual(address.prefix, 32)
+        self.assertEqual(address.mapped, 281470698586369)
+
+    def test_ipv6_is_normalized(self):
+        address = parse_ip_address('2001:0DB8:0000:0000:0000:0000:0000:0001')
+        self.assertEqual(address.version, 6)
+        self.assertEqual(address.text, '2001:db8::1')
+        self.assertEqual(address.prefix, 128)
+        self.assertEqual(parse_ip_address('::ffff:1.1.1.1').mapped,
+                         parse_ip_address('1.1.1.1').mapped)
+
+    def test_invalid_addresses(self):
+        for value in ['345.567.890.12', '01.1.1.1', '1.1.1', ' 1.1.1.1',
+                      '1.1.1.1 ', 'fe80::1%eth0', '1::2::3', '12345::',
+                      '0x1::', '1:2:3:4:5:6:7:8:9', '', '::1.2.3']:
+            with self.assertRaises(ValueError, msg=value):
+                parse_ip_address(value)
+
+    def test_client_validation(self):
+        self.assertEqual(Client._validate_ip_address('2001:DB8::1').text,
+                         '2001:db8::1')
+        ip = Client._validate_ip_address('1.1.1.1')
+        self.assertEqual(Client._validate_mask(24, ip), 24)
+        with self.assertRaises(ParameterError):
+            Client._validate_mask(33, ip)
+        with self.assertRaises(ParameterError):
+            Client._validate_mask(24, None)
+        with self.assertRaises(ParameterError):
+            Client._validate_ip_address('fe80::1%eth0')
+
+
+if __name__ == '__main__':
+    unittest.main()
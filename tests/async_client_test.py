@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import unittest
+from ipnetblocks import AsyncClient, Response, ApiAuthError, \
+    ParameterError, MemoryCache
+from ipnetblocks.net import async_http
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+class _BlockingCache(MemoryCache):
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def _get(self, key: str):
+        self.threads.add(threading.get_ident())
+        return super()._get(key)
+
+    def _set(self, key: str, value):
+        self.threads.add(threading.get_ident())
+        super()._set(key, value)
+
+
+@unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+class TestAsyncClient(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self) -> None:
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_get(self):
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url) as client:
+                return await client.get('1.1.1.1', limit=10)
+
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            response = self.run_async(lookup(server.url))
+            self.assertIsInstance(response, Response)
+            self.assertEqual(response.inetnums[0].AS.asn, 13335)
+            self.assertEqual(server.requests[0]['ip'], ['1.1.1.1'])
+            self.assertEqual(server.requests[0]['limit'], ['10'])
+
+    def test_get_by_org_sends_every_term(self):
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url) as client:
+                return await client.get_by_org(['google', 'cloud'])
+
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            self.run_async(lookup(server.url))
+            self.assertEqual(server.requests[0]['org[]'], ['google', 'cloud'])
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+        release = threading.Event()
+
+        def handler(query):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            release.wait(0.2)
+            with lock:
+                state['active'] -= 1
+            return 200, _json_response_ok
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   max_concurrency=3) as client:
+                results = await asyncio.gather(
+                    *[client.get_by_asn(13335) for _ in range(9)])
+                return results, client.pool_stats
+
+        with StubServer(handler) as server:
+            results, stats = self.run_async(lookup(server.url))
+        self.assertEqual(len(results), 9)
+        self.assertLessEqual(state['peak'], 3)
+        self.assertEqual(stats['requests'], 9)
+        self.assertLessEqual(stats['connections'], 3)
+
+    def test_get_many(self):
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url) as client:
+                return await client.get_many(
+                    ['1.1.1.1', 'bad', '1.1.1.2'], max_workers=2)
+
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            results = self.run_async(lookup(server.url))
+        self.assertEqual([value for value, _ in results],
+                         ['1.1.1.1', 'bad', '1.1.1.2'])
+        self.assertIsInstance(results[0][1], Response)
+        self.assertIsInstance(results[1][1], ParameterError)
+
+    def test_errors(self):
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url) as client:
+                with self.assertRaises(ParameterError):
+                    await client.get('345.567.890.12')
+                with self.assertRaises(ApiAuthError):
+                    await client.get('1.1.1.1')
+
+        with StubServer(lambda query: (403, '{"code": 403}')) as server:
+            self.run_async(lookup(server.url))
+
+    def test_blocking_cache_leaves_event_loop(self):
+        cache = _BlockingCache()
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   cache=cache) as client:
+                await client.get_by_asn(13335)
+                return await client.get_by_asn(13335)
+
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            response = self.run_async(lookup(server.url))
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(cache.stats['hits'], 1)
+        self.assertTrue(cache.threads)
+        self.assertNotIn(threading.get_ident(), cache.threads)
+
+    def test_event_loop_change(self):
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            client = AsyncClient(api_key, base_url=server.url)
+            self.run_async(client.get('1.1.1.1'))
+            other = asyncio.new_event_loop()
+            try:
+                with self.assertRaises(RuntimeError):
+                    other.run_until_complete(client.get('1.1.1.1'))
+                self.run_async(client.close())
+                response = other.run_until_complete(client.get('1.1.1.1'))
+                other.run_until_complete(client.close())
+            finally:
+                other.close()
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import threading
+import unittest
+from ipnetblocks import Client, Response, ParameterError, HttpApiError
+from ipnetblocks.bulk import map_bounded
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+def _handler(query):
+    if query.get('ip') == ['2.2.2.2']:
+        return 500, 'upstream failure'
+    return 200, _json_response_ok
+
+
+class TestBulkLookup(unittest.TestCase):
+
+    def test_get_many_keeps_input_order(self):
+        ips = ['1.1.1.1', '2.2.2.2', 'not-an-ip', '1.1.1.2']
+        with StubServer(_handler) as server, \
+                Client(api_key, base_url=server.url) as client:
+            results = client.get_many(ips, max_workers=4)
+
+        self.assertEqual([value for value, _ in results], ips)
+        self.assertIsInstance(results[0][1], Response)
+        self.assertIsInstance(results[1][1], HttpApiError)
+        self.assertIsInstance(results[2][1], ParameterError)
+        self.assertIsInstance(results[3][1], Response)
+
+    def test_iter_many_by_asn(self):
+        with StubServer(_handler) as server, \
+                Client(api_key, base_url=server.url) as client:
+            results = dict(client.iter_many(range(1, 11), field='asn'))
+            stats = client.pool_stats
+
+        self.assertEqual(sorted(results), list(range(1, 11)))
+        self.assertLessEqual(stats['connections'], 10)
+        self.assertEqual(stats['requests'], 10)
+
+    def test_invalid_field(self):
+        client = Client(api_key)
+        with self.assertRaises(ParameterError):
+            client.iter_many(['1.1.1.1'], field='domain')
+
+    def test_input_is_consumed_lazily(self):
+        lock = threading.Lock()
+        state = {'taken': 0, 'max_ahead': 0, 'yielded': 0}
+
+        def values():
+            for i in range(1000):
+                with lock:
+                    state['taken'] += 1
+                    state['max_ahead'] = max(
+                        state['max_ahead'], state['taken'] - state['yielded'])
+                yield i
+
+        for _ in map_bounded(lambda x: x, values(), max_workers=4):
+            with lock:
+                state['yielded'] += 1
+
+        self.assertEqual(state['yielded'], 1000)
+        self.assertLessEqual(state['max_ahead'], 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
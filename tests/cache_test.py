@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import unittest
+from json import loads
+from ipnetblocks import Client, RangeCache, Response, MemoryCache, \
+    SqliteCache, ResponseCache, Inetnum
+from ipnetblocks.address import parse_ip_address
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+def _inetnum(first: int, last: int) -> Inetnum:
+    return Inetnum({'inetnumFirstString': str(first),
+                    'inetnumLastString': str(last),
+                    'netname': 'NET-{}-{}'.format(first, last),
+                    'source': 'TEST'})
+
+
+class _SmallBucketRangeCache(RangeCache):
+    _BUCKET_SIZE = 2
+
+
+class TestRangeCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.inetnums = Response(loads(_json_response_ok)).inetnums
+
+    def test_lookup_most_specific_first(self):
+        cache = RangeCache()
+        cache.add(self.inetnums, parse_ip_address('1.1.1.1').mapped)
+        found = cache.lookup(parse_ip_address('1.1.1.200').mapped)
+        self.assertEqual([x.netname for x in found],
+                         ['APNIC-LABS', 'APNIC-AP',
+                          'NON-RIPE-NCC-MANAGED-ADDRESS-BLOCK'])
+
+    def test_parent_block_is_not_authoritative(self):
+        cache = RangeCache()
+        cache.add(self.inetnums, parse_ip_address('1.1.1.1').mapped)
+        self.assertIsNone(cache.lookup(parse_ip_address('1.1.2.1').mapped))
+        self.assertIsNone(cache.lookup(parse_ip_address('2.2.2.2').mapped))
+        self.assertEqual(cache.stats['misses'], 2)
+
+    def test_ttl(self):
+        cache = RangeCache(ttl=0.05)
+        cache.add(self.inetnums, parse_ip_address('1.1.1.1').mapped)
+        self.assertIsNotNone(cache.lookup(parse_ip_address('1.1.1.2').mapped))
+        time.sleep(0.1)
+        self.assertIsNone(cache.lookup(parse_ip_address('1.1.1.2').mapped))
+
+    def test_size_bound(self):
+        cache = RangeCache(max_size=2)
+        cache.add(self.inetnums, parse_ip_address('1.1.1.1').mapped)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats['evictions'], 1)
+        # the oldest range, the most specific one, was evicted
+        self.assertIsNone(cache.lookup(parse_ip_address('1.1.1.2').mapped))
+
+    def test_matches_linear_scan(self):
+        generator = random.Random(3)
+        cache = _SmallBucketRangeCache(max_size=40)
+        kept = OrderedDict()
+        for _ in range(300):
+            first = generator.randrange(1000)
+            last = first + generator.choice([0, 3, 30, 300])
+            cache.add([_inetnum(first, last)], first)
+            kept[first, last] = None
+            kept.move_to_end((first, last))
+            if len(kept) > 40:
+                kept.popitem(last=False)
+            for address in generator.sample(range(1400), 20):
+                found = cache.lookup(address)
+                expected = sorted((x for x in kept
+                                   if x[0] <= address <= x[1]),
+                                  key=lambda x: (x[1] - x[0], x))
+                found = sorted(((x.inetnum_first, x.inetnum_last)
+                                for x in found or ()),
+                               key=lambda x: (x[1] - x[0], x))
+                # addresses covered by a range are answered locally
+                self.assertEqual(found, expected)
+        self.assertEqual(len(cache), 40)
+        ranges = [(x.inetnum_first, x.inetnum_last) for x in cache.ranges()]
+        self.assertEqual(sorted(ranges), sorted(kept))
+        self.assertEqual([x[0] for x in ranges], sorted(x[0] for x in kept))
+
+    def test_fill_default_size(self):
+        cache = RangeCache()
+        started = time.monotonic()
+        for i in range(cache.max_size + 1000):
+            first = i * 256
+            cache.add([_inetnum(first, first + 255),
+                       _inetnum(first & ~0xffff, first | 0xffff)], first)
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(len(cache), cache.max_size)
+        self.assertIsNotNone(cache.lookup(cache.max_size * 256 + 1))
+        self.assertIsNone(cache.lookup(1))
+
+    def test_client_answers_covered_addresses_locally(self):
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url,
+                       range_cache=True) as client:
+            first = client.get('1.1.1.1')
+            second = client.get('1.1.1.2')
+            client.get('1.1.1.3', mask=32)
+            client.get('1.1.2.1')
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(second.search, '1.1.1.2')
+        self.assertEqual(second.inetnums, first.inetnums)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_key_ignores_api_key(self):
+        self.assertEqual(
+            ResponseCache.make_key({'apiKey': 'a', 'ip': '1.1.1.1'}),
+            ResponseCache.make_key({'ip': '1.1.1.1', 'apiKey': 'b'}))
+
+    def test_memory_lru(self):
+        cache = MemoryCache(max_size=2)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '1')
+        self.assertEqual(cache.stats,
+                         {'hits': 2, 'misses': 1, 'evictions': 1})
+
+    def test_memory_ttl(self):
+        cache = MemoryCache(ttl=0.05)
+        cache.set('a', '1')
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_sqlite_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            cache = SqliteCache(path, max_size=2)
+            for key in ['a', 'b', 'c']:
+                cache.set(key, key.upper())
+            cache.close()
+
+            cache = SqliteCache(path, max_size=2)
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get('c'), 'C')
+            self.assertEqual(len(cache), 2)
+            cache.close()
+
+    def test_sqlite_stores_bytes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            cache = SqliteCache(path)
+            cache.set('a', b'\xff{}')
+            self.assertEqual(cache.get('a'), b'\xff{}')
+            cache.close()
+
+            connection = sqlite3.connect(path)
+            columns = {row[1]: row[2] for row in connection.execute(
+                'PRAGMA table_info(responses)')}
+            connection.close()
+        self.assertEqual(columns['value'], 'BLOB')
+
+    def test_sqlite_size_bound(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SqliteCache(os.path.join(directory, 'cache.db'),
+                                max_size=3)
+            for key in ['a', 'b', 'a', 'c', 'a', 'd', 'e']:
+                cache.set(key, key.upper())
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(cache.stats['evictions'], 2)
+            self.assertEqual([cache.get(key) for key in 'abcde'],
+                             ['A', None, None, 'D', 'E'])
+            cache.close()
+
+    def test_stats_under_threads(self):
+        cache = MemoryCache()
+        cache.set('a', 'A')
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(lambda i: cache.get('ab'[i % 2]), range(4000)))
+        self.assertEqual(cache.stats['hits'], 2000)
+        self.assertEqual(cache.stats['misses'], 2000)
+
+    def test_client_serves_repeated_queries_from_cache(self):
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url, cache=True) as client:
+            client.get_by_asn(13335)
+            client.get_by_asn(13335)
+            client.get_by_asn(13335, limit=10)
+            client.get_by_org('apnic')
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(client.cache.stats['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
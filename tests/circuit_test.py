@@ -0,0 +1,204 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from ipnetblocks import Client, AsyncClient, CircuitBreaker, CircuitOpenError, \
+    MemoryCache, SqliteCache, HttpApiError, BadRequestError
+from ipnetblocks.net import async_http
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key, counting_handler
+
+
+class _Upstream:
+    def __init__(self):
+        self.status = 200
+
+    def __call__(self, query):
+        if self.status == 200:
+            return 200, _json_response_ok
+        return self.status, 'Upstream error'
+
+
+def _stalling_handler():
+    # the body stalls past the read timeout of the client
+    return counting_handler(1, 200, [_json_response_ok[:100], 1.5,
+                                     _json_response_ok[100:]])
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError) as context:
+            breaker.before()
+        self.assertGreater(context.exception.retry_after, 29)
+
+    def test_half_open_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        breaker.failure()
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.before()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before()
+        breaker.failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        time.sleep(0.06)
+        breaker.before()
+        breaker.success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.stats,
+                         {'state': 'closed', 'opened': 2, 'rejected': 1})
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+        with self.assertRaises(ValueError):
+            Client(api_key, circuit_breaker=3)
+
+
+class TestClientCircuitBreaker(unittest.TestCase):
+
+    def test_fails_fast_while_open(self):
+        upstream = _Upstream()
+        upstream.status = 503
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.1)
+        with StubServer(upstream) as server, \
+                Client(api_key, base_url=server.url,
+                       circuit_breaker=breaker) as client:
+            for _ in range(2):
+                with self.assertRaises(HttpApiError):
+                    client.get('1.1.1.1')
+            with self.assertRaises(CircuitOpenError):
+                client.get('1.1.1.1')
+            self.assertEqual(len(server.requests), 2)
+
+            upstream.status = 200
+            time.sleep(0.15)
+            client.get('1.1.1.1')
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_client_errors_keep_circuit_closed(self):
+        upstream = _Upstream()
+        upstream.status = 400
+        with StubServer(upstream) as server, \
+                Client(api_key, base_url=server.url,
+                       circuit_breaker=CircuitBreaker(1)) as client:
+            for _ in range(3):
+                with self.assertRaises(BadRequestError):
+                    client.get('1.1.1.1')
+            self.assertEqual(client.circuit_breaker.state,
+                             CircuitBreaker.CLOSED)
+
+    def test_serves_stale_responses(self):
+        upstream = _Upstream()
+        cache = MemoryCache(ttl=0.05, stale_ttl=60)
+        with StubServer(upstream) as server, \
+                Client(api_key, base_url=server.url, cache=cache,
+                       circuit_breaker=CircuitBreaker(1),
+                       serve_stale=True) as client:
+            client.get_by_asn(13335)
+            time.sleep(0.06)
+            upstream.status = 500
+            with self.assertRaises(HttpApiError):
+                client.get_by_asn(13335)
+            response = client.get_by_asn(13335)
+            with self.assertRaises(CircuitOpenError):
+                client.get_by_asn(15169)
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_stalled_body_opens_circuit(self):
+        with StubServer(_stalling_handler()) as server, \
+                Client(api_key, base_url=server.url, timeout=1,
+                       circuit_breaker=CircuitBreaker(1)) as client:
+            with self.assertRaises(RequestsConnectionError):
+                client.get('1.1.1.1')
+            with self.assertRaises(CircuitOpenError):
+                client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 1)
+
+    def test_stalled_stream_opens_circuit(self):
+        with StubServer(_stalling_handler()) as server, \
+                Client(api_key, base_url=server.url, timeout=1,
+                       circuit_breaker=CircuitBreaker(1)) as client:
+            with self.assertRaises(RequestsConnectionError):
+                list(client.iter_inetnums('1.1.1.1'))
+            with self.assertRaises(CircuitOpenError):
+                client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 1)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async_stalled_body_opens_circuit(self):
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url, timeout=1,
+                                   circuit_breaker=CircuitBreaker(1)) as client:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await client.get('1.1.1.1')
+                with self.assertRaises(CircuitOpenError):
+                    await client.get('1.1.1.1')
+
+        loop = asyncio.new_event_loop()
+        with StubServer(_stalling_handler()) as server:
+            try:
+                loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+        self.assertEqual(len(server.requests), 1)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async(self):
+        upstream = _Upstream()
+        upstream.status = 502
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   circuit_breaker=CircuitBreaker(1)) as client:
+                with self.assertRaises(HttpApiError):
+                    await client.get('1.1.1.1')
+                with self.assertRaises(CircuitOpenError):
+                    await client.get('1.1.1.1')
+
+        loop = asyncio.new_event_loop()
+        with StubServer(upstream) as server:
+            try:
+                loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+        self.assertEqual(len(server.requests), 1)
+
+
+class TestStaleCache(unittest.TestCase):
+
+    def test_memory_cache_keeps_stale_responses(self):
+        cache = MemoryCache(ttl=0.05, stale_ttl=0.1)
+        cache.set('a', '1')
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_stale('a'), '1')
+        time.sleep(0.1)
+        self.assertIsNone(cache.get_stale('a'))
+
+    def test_sqlite_cache_keeps_stale_responses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SqliteCache(os.path.join(directory, 'cache.db'),
+                                ttl=0.05, stale_ttl=60)
+            cache.set('a', b'1')
+            time.sleep(0.06)
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get_stale('a'), b'1')
+            self.assertIsNone(cache.get_stale('b'))
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
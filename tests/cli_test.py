@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from ipnetblocks.cli import main
+from tests.stub_server import StubServer, api_key, counting_handler
+
+
+def _handler(fail_after: int = None):
+    if fail_after is None:
+        return counting_handler(0)
+    return counting_handler(
+        fail_after, 403, '{"code": 403, "messages": "Access restricted"}',
+        after=True)
+
+
+class TestEnrich(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.input = self._path('ips.txt')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._directory.name, name)
+
+    def _write_input(self, lines: list):
+        with open(self.input, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def _enrich(self, url: str, output: str, *args) -> int:
+        return main(['enrich', self.input, '-o', output, '--api-key', api_key,
+                     '--base-url', url, '-j', '1', '-q'] + list(args))
+
+    def test_jsonl(self):
+        self._write_input(['1.1.1.1 GET /', '# comment', '', '1.1.1.1',
+                           '1.1.1.2', '8.8.8.8', 'nonsense'])
+        output = self._path('out.jsonl')
+        with StubServer(_handler()) as server:
+            self.assertEqual(self._enrich(server.url, output), 0)
+
+        with open(output) as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual([row['ip'] for row in rows],
+                         ['1.1.1.1', '1.1.1.2', '8.8.8.8', 'nonsense'])
+        self.assertEqual(rows[0]['netname'], 'APNIC-LABS')
+        self.assertEqual(rows[0]['asn'], 13335)
+        self.assertIsNone(rows[0]['error'])
+        self.assertIsNone(rows[2]['inetnum'])
+        self.assertTrue(rows[3]['error'].startswith('ParameterError'))
+        # 1.1.1.2 is answered by the range cache
+        self.assertEqual(len(server.requests), 2)
+        self.assertFalse(os.path.exists(output + '.checkpoint'))
+
+    def test_csv(self):
+        self._write_input(['1.1.1.1', '1.1.1.1'])
+        output = self._path('out.csv')
+        with StubServer(_handler()) as server:
+            self.assertEqual(self._enrich(server.url, output,
+                                          '--dedupe-window', '0'), 0)
+
+        with open(output, newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['inetnum'], '1.1.1.0 - 1.1.1.255')
+        self.assertEqual(rows[0]['error'], '')
+
+    def test_without_range_cache(self):
+        self._write_input(['1.1.1.1', '1.1.1.2'])
+        output = self._path('out.jsonl')
+        with StubServer(_handler()) as server:
+            self.assertEqual(self._enrich(server.url, output,
+                                          '--range-cache-size', '0'), 0)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_resume(self):
+        self._write_input(['8.0.0.{}'.format(i) for i in range(1, 6)]
+                          + ['9.0.0.{}'.format(i) for i in range(1, 6)])
+        output = self._path('out.csv')
+        with StubServer(_handler(fail_after=7)) as server:
+            self.assertEqual(self._enrich(server.url, output,
+                                          '--checkpoint-every', '3'), 1)
+        with open(output + '.checkpoint') as file:
+            self.assertEqual(json.load(file)['line'], 7)
+
+        with StubServer(_handler()) as server:
+            self.assertEqual(self._enrich(server.url, output, '--resume'), 0)
+        self.assertEqual(len(server.requests), 3)
+
+        with open(output, newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual([row['ip'] for row in rows],
+                         ['8.0.0.{}'.format(i) for i in range(1, 6)]
+                         + ['9.0.0.{}'.format(i) for i in range(1, 6)])
+        self.assertFalse(os.path.exists(output + '.checkpoint'))
+
+    def test_resume_without_output(self):
+        self._write_input(['8.0.0.{}'.format(i) for i in range(1, 6)])
+        output = self._path('out.csv')
+        with StubServer(_handler(fail_after=3)) as server:
+            self.assertEqual(self._enrich(server.url, output,
+                                          '--checkpoint-every', '2'), 1)
+        os.remove(output)
+
+        with StubServer(_handler()) as server, \
+                mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            self.assertEqual(self._enrich(server.url, output, '--resume'), 1)
+        self.assertEqual(len(server.requests), 0)
+        self.assertIn('error: cannot resume into', stderr.getvalue())
+
+    def test_invalid_limit(self):
+        for limit in ('0', '1001'):
+            with mock.patch('sys.stderr', new_callable=io.StringIO), \
+                    self.assertRaises(SystemExit):
+                main(['enrich', self.input, '--api-key', api_key,
+                      '--limit', limit])
+
+    def test_missing_api_key(self):
+        with mock.patch.dict(os.environ, clear=True), \
+                self.assertRaises(SystemExit):
+            main(['enrich', self.input])
+
+
+if __name__ == '__main__':
+    unittest.main()
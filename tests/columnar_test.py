@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from json import loads
+from ipnetblocks import InetnumColumns, Response, Snapshot, \
+    ParameterError
+from ipnetblocks import columnar
+from tests.model_test import _json_response_ok
+
+
+def _lists(columns: InetnumColumns) -> dict:
+    return {name: list(getattr(columns, name))
+            for name in InetnumColumns.BOUNDS + ('asn',)
+            + InetnumColumns.CATEGORICAL}
+
+
+class TestInetnumColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.response = Response(loads(_json_response_ok))
+
+    def test_columns(self):
+        columns = self.response.to_columns()
+        inetnums = self.response.inetnums
+        self.assertEqual(len(columns), 3)
+        for i, inetnum in enumerate(inetnums):
+            self.assertEqual(columns.first_hi[i] << 64 | columns.first_lo[i],
+                             inetnum.inetnum_first)
+            self.assertEqual(columns.last_hi[i] << 64 | columns.last_lo[i],
+                             inetnum.inetnum_last)
+        self.assertEqual(list(columns.asn), [13335, 0, 0])
+        self.assertEqual(columns.decode('netname'),
+                         [x.netname for x in inetnums])
+        self.assertEqual(columns.decode('country'),
+                         [x.country for x in inetnums])
+        self.assertEqual(columns.categories['source'], ['APNIC', 'RIPE'])
+        self.assertEqual(list(columns.source), [0, 0, 1])
+        self.assertIsNone(columns.result)
+
+    def test_lazy(self):
+        lazy = Response(loads(_json_response_ok), lazy=True)
+        self.assertEqual(_lists(lazy.to_columns()),
+                         _lists(self.response.to_columns()))
+
+    def test_ipv6(self):
+        inetnum = self.response.inetnums[0]
+        inetnum.inetnum_first = 0x20010db8 << 96
+        inetnum.inetnum_last = (0x20010db8 << 96) + (1 << 80) - 1
+        columns = InetnumColumns([inetnum])
+        self.assertEqual(columns.first_hi[0], 0x20010db8 << 32)
+        self.assertEqual(columns.first_lo[0], 0)
+        self.assertEqual(columns.last_hi[0], (0x20010db8 << 32) + 0xffff)
+        self.assertEqual(columns.last_lo[0], (1 << 64) - 1)
+
+    def test_from_results(self):
+        results = [('1.1.1.1', self.response), ('x', ParameterError('x')),
+                   ('1.1.1.2', self.response)]
+        columns = InetnumColumns.from_results(results)
+        self.assertEqual(len(columns), 6)
+        self.assertEqual(list(columns.result), [0, 0, 0, 2, 2, 2])
+        self.assertEqual(len(columns.categories['netname']), 3)
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'netblocks.snap')
+            Snapshot.write(path, self.response.inetnums)
+            with Snapshot(path) as snapshot:
+                columns = InetnumColumns(snapshot)
+                self.assertEqual(sorted(columns.asn), [0, 0, 13335])
+                self.assertEqual(sorted(columns.decode('netname')),
+                                 sorted(x.netname
+                                        for x in self.response.inetnums))
+
+    @unittest.skipIf(columnar.numpy is None, "numpy is not installed")
+    def test_to_numpy(self):
+        arrays = self.response.to_columns().to_numpy()
+        self.assertEqual(arrays['first_lo'].dtype, columnar.numpy.uint64)
+        self.assertEqual(arrays['asn'].tolist(), [13335, 0, 0])
+        self.assertEqual(arrays['source'].tolist(), [0, 0, 1])
+        self.assertNotIn('result', arrays)
+        self.assertEqual(len(InetnumColumns().to_numpy()['first_hi']), 0)
+
+    @unittest.skipIf(columnar.numpy is not None, "numpy is installed")
+    def test_to_numpy_missing(self):
+        with self.assertRaises(ImportError):
+            self.response.to_columns().to_numpy()
+
+
+if __name__ == '__main__':
+    unittest.main()
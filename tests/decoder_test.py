@@ -0,0 +1,65 @@
+import json
+import unittest
+from ipnetblocks import Client, Inetnum, UnparsableApiResponseError
+from ipnetblocks import decoder
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+# inetnumLast of ::/0 does not fit into 64 bits
+_ipv6_document = b'{"inetnumFirst": 0, ' \
+                 b'"inetnumLast": 340282366920938463463374607431768211455, ' \
+                 b'"inetnumFirstString": "0", ' \
+                 b'"inetnumLastString": "340282366920938463463374607431768211455"}'
+
+
+class TestDecoder(unittest.TestCase):
+
+    def test_decoders_agree(self):
+        expected = json.loads(_json_response_ok)
+        for name in decoder.available_decoders():
+            loads = decoder.get_decoder(name)
+            self.assertEqual(loads(_json_response_ok.encode('UTF-8')),
+                             expected, name)
+
+    def test_wide_integers(self):
+        for name in decoder.available_decoders():
+            inetnum = Inetnum(decoder.get_decoder(name)(_ipv6_document))
+            self.assertEqual(inetnum.inetnum_last, 2 ** 128 - 1, name)
+
+    def test_invalid_document(self):
+        for name in decoder.available_decoders():
+            with self.assertRaises(ValueError):
+                decoder.get_decoder(name)(b'{"result": ')
+
+    def test_unknown_decoder(self):
+        with self.assertRaises(ValueError):
+            decoder.get_decoder('yaml')
+        with self.assertRaises(ValueError):
+            Client(api_key, json_decoder=42)
+
+    def test_client_decodes_bytes(self):
+        received = []
+
+        def loads(data):
+            received.append(data)
+            return json.loads(data)
+
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url,
+                       json_decoder=loads) as client:
+            response = client.get('1.1.1.1')
+            raw = client.get_raw('1.1.1.1')
+        self.assertIsInstance(received[0], bytes)
+        self.assertEqual(len(received), 1)
+        self.assertIsInstance(raw, str)
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+
+    def test_client_unparsable_response(self):
+        with StubServer(lambda query: (200, '{"result": ')) as server, \
+                Client(api_key, base_url=server.url) as client:
+            with self.assertRaises(UnparsableApiResponseError):
+                client.get('1.1.1.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
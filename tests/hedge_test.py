@@ -0,0 +1,118 @@
+import asyncio
+import time
+import unittest
+from ipnetblocks import Client, AsyncClient, HedgePolicy
+from ipnetblocks.net import async_http
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key, counting_handler
+
+
+def _slow_first_handler(delay: float = 1.0):
+    return counting_handler(1, delay=delay)
+
+
+def _stalling_first_handler():
+    # the first body trickles in for seconds after its headers
+    chunks = [_json_response_ok[:100]]
+    for i in range(100, len(_json_response_ok), 100):
+        chunks += [0.05, _json_response_ok[i:i + 100]]
+    return counting_handler(1, body=chunks)
+
+
+class TestHedgePolicy(unittest.TestCase):
+
+    def test_hedges_are_capped(self):
+        policy = HedgePolicy(delay=0.1, max_ratio=0.1)
+        allowed = 0
+        for _ in range(100):
+            policy.start()
+            allowed += policy.allows()
+        self.assertEqual(allowed, 10)
+        self.assertEqual(policy.stats['hedged'], 10)
+
+    def test_percentile_delay(self):
+        policy = HedgePolicy(percentile=90, min_samples=10)
+        self.assertIsNone(policy.start())
+        for i in range(1, 11):
+            policy.record(i / 100)
+        self.assertEqual(policy.start(), 0.1)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            HedgePolicy()
+        with self.assertRaises(ValueError):
+            HedgePolicy(delay=1, percentile=99)
+        with self.assertRaises(ValueError):
+            HedgePolicy(percentile=100)
+        with self.assertRaises(ValueError):
+            Client(api_key, hedge='later')
+
+
+class TestClientHedging(unittest.TestCase):
+
+    def test_slow_request_is_hedged(self):
+        policy = HedgePolicy(delay=0.05, max_ratio=1)
+        with StubServer(_slow_first_handler()) as server, \
+                Client(api_key, base_url=server.url, hedge=policy) as client:
+            started = time.monotonic()
+            response = client.get('1.1.1.1')
+            elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(policy.stats,
+                         {'requests': 1, 'hedged': 1, 'won': 1})
+
+    def test_losing_download_is_aborted(self):
+        policy = HedgePolicy(delay=0.05, max_ratio=1)
+        with StubServer(_stalling_first_handler()) as server, \
+                Client(api_key, base_url=server.url, hedge=policy) as client:
+            started = time.monotonic()
+            response = client.get('1.1.1.1')
+            while not server.dropped and time.monotonic() - started < 2:
+                time.sleep(0.01)
+            elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 2)
+        self.assertEqual(server.dropped, 1)
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(policy.stats['won'], 1)
+
+    def test_fast_request_is_not_hedged(self):
+        policy = HedgePolicy(delay=0.5, max_ratio=1)
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url, hedge=policy) as client:
+            client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(policy.stats['hedged'], 0)
+
+    def test_exhausted_budget(self):
+        policy = HedgePolicy(delay=0.05, max_ratio=0)
+        with StubServer(_slow_first_handler(0.2)) as server, \
+                Client(api_key, base_url=server.url, hedge=policy) as client:
+            client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 1)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async(self):
+        policy = HedgePolicy(delay=0.05, max_ratio=1)
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   hedge=policy) as client:
+                return await client.get('1.1.1.1')
+
+        loop = asyncio.new_event_loop()
+        with StubServer(_slow_first_handler()) as server:
+            try:
+                started = time.monotonic()
+                response = loop.run_until_complete(lookup(server.url))
+                elapsed = time.monotonic() - started
+            finally:
+                loop.close()
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(policy.stats['won'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
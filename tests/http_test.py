@@ -0,0 +1,48 @@
+import unittest
+from ipnetblocks import Client, ApiRequester, HttpApiError
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+class TestApiRequester(unittest.TestCase):
+
+    def test_connections_are_reused(self):
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url) as client:
+            for _ in range(5):
+                client.get('1.1.1.1')
+            stats = client.pool_stats
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused'], 4)
+
+    def test_close_releases_pool(self):
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            requester = ApiRequester(base_url=server.url)
+            requester.get({'ip': '1.1.1.1'})
+            requester.close()
+            self.assertEqual(requester.pool_stats['requests'], 0)
+            # the requester stays usable after close
+            requester.get({'ip': '1.1.1.1'})
+            self.assertEqual(requester.pool_stats['connections'], 1)
+
+    def test_lazy_responses(self):
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url, lazy=True) as client:
+            response = client.get('1.1.1.1')
+        self.assertNotIsInstance(response.inetnums, list)
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+
+    def test_http_error(self):
+        with StubServer(lambda query: (500, 'oops')) as server, \
+                ApiRequester(base_url=server.url) as requester:
+            with self.assertRaises(HttpApiError):
+                requester.get({'ip': '1.1.1.1'})
+
+    def test_invalid_pool_size(self):
+        with self.assertRaises(ValueError):
+            ApiRequester(pool_maxsize=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import unittest
+from ipnetblocks import Client, AsyncClient, Instrumentation, \
+    MetricsCollector, MemoryCache, RetryPolicy, HttpApiError
+from ipnetblocks.instrumentation import Histogram
+from ipnetblocks.net import async_http
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+def _flaky_handler(failures: int):
+    calls = [0]
+
+    def handler(query):
+        calls[0] += 1
+        if calls[0] <= failures:
+            return 503, 'Unavailable'
+        return 200, _json_response_ok
+
+    return handler
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            Instrumentation().subscribe('request', print)
+
+    def test_failing_callback_is_ignored(self):
+        instrumentation = Instrumentation()
+        events = []
+        instrumentation.subscribe('retry', lambda data: 1 / 0)
+        instrumentation.subscribe('retry', events.append)
+        instrumentation.emit('retry', {'attempt': 1})
+        self.assertEqual(events, [{'attempt': 1}])
+
+    def test_histogram(self):
+        histogram = Histogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+        self.assertEqual(histogram.to_dict(), {
+            'count': 4, 'sum': 2.65, 'max': 2,
+            'buckets': {'0.1': 2, '1': 3, '+Inf': 4}})
+
+
+class TestClientInstrumentation(unittest.TestCase):
+
+    def test_response_and_lookup_events(self):
+        instrumentation = Instrumentation()
+        responses = []
+        lookups = []
+        instrumentation.subscribe('response', responses.append)
+        instrumentation.subscribe('lookup', lookups.append)
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url, cache=True,
+                       instrumentation=instrumentation) as client:
+            client.get('1.1.1.1')
+            client.get('1.1.1.1')
+            client.get('1.1.1.2')
+
+        self.assertEqual(len(responses), 2)
+        first, second = responses
+        self.assertEqual(first['status'], 200)
+        self.assertEqual(first['bytes'], len(_json_response_ok.encode()))
+        self.assertEqual(first['attempts'], 1)
+        self.assertIs(first['reused'], False)
+        self.assertIs(second['reused'], True)
+        self.assertEqual(set(first['phases']),
+                         {'connect', 'server', 'download'})
+        self.assertNotIn('connect', second['phases'])
+        self.assertGreaterEqual(first['total'], sum(first['phases'].values()))
+
+        self.assertEqual([lookup['source'] for lookup in lookups],
+                         ['api', 'cache', 'api'])
+        self.assertEqual(set(lookups[0]['phases']),
+                         {'fetch', 'decode', 'build'})
+
+    def test_metrics_collector(self):
+        metrics = MetricsCollector()
+        with StubServer(_flaky_handler(1)) as server, \
+                Client(api_key, base_url=server.url, range_cache=True,
+                       retry=RetryPolicy(backoff=0.01),
+                       instrumentation=metrics) as client:
+            client.get('1.1.1.1')
+            client.get('1.1.1.1')
+
+        snapshot = json.loads(json.dumps(metrics.snapshot()))
+        self.assertEqual(snapshot['requests'], 1)
+        self.assertEqual(snapshot['retries'], 1)
+        self.assertEqual(snapshot['errors'], 0)
+        self.assertEqual(snapshot['status'], {'200': 1})
+        self.assertEqual(snapshot['lookups'], {'api': 1, 'range_cache': 1})
+        self.assertEqual(snapshot['latency']['request']['count'], 1)
+        self.assertEqual(snapshot['latency']['lookup']['count'], 2)
+        self.assertGreater(snapshot['latency']['queue']['sum'], 0)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['requests'], 0)
+
+    def test_failed_request(self):
+        metrics = MetricsCollector()
+        with StubServer(_flaky_handler(1)) as server, \
+                Client(api_key, base_url=server.url,
+                       instrumentation=metrics) as client:
+            with self.assertRaises(HttpApiError):
+                client.get_by_asn(13335)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['errors'], 1)
+        self.assertEqual(snapshot['status'], {'503': 1})
+        self.assertEqual(snapshot['lookups'], {'api': 1})
+
+    def test_invalid_instrumentation(self):
+        with self.assertRaises(ValueError):
+            Client(api_key, instrumentation=print)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async(self):
+        metrics = MetricsCollector()
+        responses = []
+        metrics.subscribe('response', responses.append)
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   cache=MemoryCache(),
+                                   instrumentation=metrics) as client:
+                await client.get('1.1.1.1')
+                await client.get('1.1.1.1')
+                await client.get_by_asn(13335)
+
+        loop = asyncio.new_event_loop()
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            try:
+                loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['requests'], 2)
+        self.assertEqual(snapshot['connections_new'], 1)
+        self.assertEqual(snapshot['connections_reused'], 1)
+        self.assertEqual(snapshot['lookups'], {'api': 2, 'cache': 1})
+        self.assertEqual(responses[0]['bytes'], len(_json_response_ok.encode()))
+        self.assertIn('connect', responses[0]['phases'])
+        self.assertIn('server', responses[0]['phases'])
+
+
+if __name__ == '__main__':
+    unittest.main()
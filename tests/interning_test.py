@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import unittest
+from json import loads
+from ipnetblocks import Client, Interner, Response, Contact
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+def _values() -> dict:
+    # the records twice, so that every nested object is repeated
+    values = loads(_json_response_ok)
+    values['result']['inetnums'] += loads(_json_response_ok)['result'][
+        'inetnums']
+    return values
+
+
+class TestInterner(unittest.TestCase):
+
+    def test_response(self):
+        expected = Response(_values())
+        response = Response(_values(), interner=True)
+        self.assertEqual(response, expected)
+
+        first, copy = response.inetnums[0], response.inetnums[3]
+        self.assertIsNot(first, copy)
+        self.assertIs(first.org, copy.org)
+        self.assertIs(first.AS, copy.AS)
+        self.assertIs(first.abuse_contact[0], copy.abuse_contact[0])
+        self.assertIs(first.mnt_by[0], response.inetnums[1].mnt_by[0])
+        self.assertIs(first.source, copy.source)
+        self.assertIs(first.description[0], copy.description[0])
+        self.assertIs(first.netname, copy.netname)
+        self.assertEqual(first.abuse_contact, expected.inetnums[0]
+                         .abuse_contact)
+
+    def test_lazy(self):
+        expected = Response(_values())
+        response = Response(_values(), lazy=True, interner=True)
+        self.assertEqual(response, expected)
+        self.assertIs(response.inetnums[0].org, response.inetnums[3].org)
+
+    def test_shared(self):
+        interner = Interner()
+        first = Response(loads(_json_response_ok), interner=interner)
+        objects = interner.stats['objects']
+        second = Response(loads(_json_response_ok), interner=interner)
+        self.assertIs(first.inetnums[0].org, second.inetnums[0].org)
+        self.assertEqual(interner.stats['objects'], objects)
+        self.assertGreaterEqual(interner.stats['hits'], objects)
+
+        interner.clear()
+        self.assertEqual(interner.stats['strings'], 0)
+        third = Response(loads(_json_response_ok), interner=interner)
+        self.assertIsNot(first.inetnums[0].org, third.inetnums[0].org)
+        self.assertEqual(first, third)
+
+    def test_model(self):
+        interner = Interner()
+        values = {'id': 'X1', 'address': ['Street'], 'country': 'ZZ'}
+        contact = interner.model(values, Contact)
+        self.assertIs(interner.model(dict(values), Contact), contact)
+        self.assertIsNot(interner.model({'id': 'X2'}, Contact), contact)
+        self.assertIs(interner.string('ZZ'), contact.country)
+
+    def test_threads(self):
+        interner = Interner()
+        values = {'id': 'X1', 'address': ['Street'], 'country': 'ZZ'}
+        with ThreadPoolExecutor(8) as executor:
+            contacts = list(executor.map(
+                lambda _: interner.model(dict(values), Contact), range(2000)))
+        self.assertTrue(all(x is contacts[0] for x in contacts))
+        self.assertEqual(interner.stats['objects'], 1)
+        self.assertEqual(interner.stats['hits'], 1999)
+
+    def test_pickle(self):
+        response = Response(_values(), interner=True)
+        self.assertEqual(pickle.loads(pickle.dumps(response)), response)
+
+    def test_client(self):
+        with self.assertRaises(ValueError):
+            Client(api_key, interner='yes')
+        interner = Interner()
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url,
+                       interner=interner) as client:
+            self.assertIs(client.interner, interner)
+            first = client.get('1.1.1.1')
+            second = client.get('1.1.1.2')
+            streamed = list(client.iter_inetnums('1.1.1.1'))
+        self.assertIs(first.inetnums[0].org, second.inetnums[0].org)
+        self.assertIs(first.inetnums[0].org, streamed[0].org)
+
+        client = Client(api_key, interner=True)
+        self.assertIs(client.interner, True)
+        client.interner = None
+        self.assertIs(client.interner, False)
+
+
+if __name__ == '__main__':
+    unittest.main()
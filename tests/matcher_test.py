@@ -0,0 +1,113 @@
+import random
+import unittest
+from json import loads
+from ipnetblocks import NetblockMatcher, InetnumColumns, Response, Inetnum
+from ipnetblocks import columnar
+from ipnetblocks.address import parse_ip_address
+from tests.model_test import _json_response_ok
+
+
+def _inetnum(first: int, last: int, netname: str) -> Inetnum:
+    return Inetnum({'inetnumFirstString': str(first),
+                    'inetnumLastString': str(last),
+                    'netname': netname, 'source': 'TEST'})
+
+
+def _most_specific(inetnums: list, mapped: int) -> int:
+    covering = [i for i, x in enumerate(inetnums)
+                if x.inetnum_first <= mapped <= x.inetnum_last]
+    if not covering:
+        return -1
+    return min(covering, key=lambda i: (inetnums[i].inetnum_last
+                                        - inetnums[i].inetnum_first, i))
+
+
+def _random_ranges(generator: random.Random, count: int) -> list:
+    inetnums = []
+    for i in range(count):
+        size = 1 << generator.randrange(4, 20)
+        first = (0xffff << 32) + generator.randrange(1 << 22) // size * size
+        if i % 4 == 0:
+            first = (0x2001 << 112) + generator.randrange(1 << 70)
+        inetnums.append(_inetnum(first, first + size - 1, str(i)))
+    return inetnums
+
+
+class TestNetblockMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.inetnums = Response(loads(_json_response_ok)).inetnums
+        self.matcher = NetblockMatcher(self.inetnums)
+
+    def test_match(self):
+        self.assertEqual(
+            list(self.matcher.match(['1.1.1.1', '1.2.3.4', '1.200.0.1',
+                                     '8.8.8.8', '::1', '0.0.0.1'])),
+            [0, 1, 1, -1, -1, 2])
+        self.assertEqual(
+            list(self.matcher.match([parse_ip_address('1.1.1.255')])), [0])
+        with self.assertRaises(ValueError):
+            self.matcher.match(['nonsense'])
+
+    def test_parents(self):
+        # 1.0.0.0/8 overlaps 0.0.0.0 - 1.178.223.255 without nesting
+        self.assertEqual(list(self.matcher.parents), [1, -1, -1])
+        self.assertEqual(self.matcher.chain(0), [0, 1])
+
+        inetnums = [_inetnum(0, 255, 'a'), _inetnum(0, 15, 'b'),
+                    _inetnum(8, 31, 'c'), _inetnum(8, 15, 'd'),
+                    _inetnum(0, 255, 'e')]
+        matcher = NetblockMatcher(inetnums)
+        self.assertEqual(list(matcher.parents), [4, 0, 0, 1, -1])
+        self.assertEqual(list(matcher.match([0, 9, 20, 100, 256])),
+                         [1, 3, 2, 0, -1])
+
+    def test_match_ipv4(self):
+        self.assertEqual(
+            list(self.matcher.match_ipv4([0x01010101, 0x08080808])), [0, -1])
+        with self.assertRaises(ValueError):
+            self.matcher.match_ipv4([1 << 32])
+
+    def test_match_mapped(self):
+        columns = InetnumColumns(self.inetnums)
+        self.assertEqual(
+            list(self.matcher.match_mapped(columns.last_hi,
+                                           columns.last_lo)),
+            [0, 1, 1])
+
+    def test_random(self):
+        generator = random.Random(7)
+        inetnums = _random_ranges(generator, 200)
+        matcher = NetblockMatcher(inetnums)
+        addresses = [x.inetnum_first + generator.randrange(1 << 10)
+                     for x in inetnums for _ in range(5)]
+        self.assertEqual(list(matcher.match(addresses)),
+                         [_most_specific(inetnums, x) for x in addresses])
+
+    @unittest.skipIf(columnar.numpy is None, "numpy is not installed")
+    def test_numpy(self):
+        numpy = columnar.numpy
+        generator = random.Random(7)
+        inetnums = _random_ranges(generator, 200)
+        matcher = NetblockMatcher(inetnums)
+        addresses = [x.inetnum_first + generator.randrange(1 << 10)
+                     for x in inetnums for _ in range(5)] + [0]
+        expected = [_most_specific(inetnums, x) for x in addresses]
+        mask = (1 << 64) - 1
+        hi = numpy.array([x >> 64 for x in addresses], numpy.uint64)
+        lo = numpy.array([x & mask for x in addresses], numpy.uint64)
+        self.assertEqual(matcher.match_mapped(hi, lo).tolist(), expected)
+
+        ipv4 = [x for x in addresses if x >> 32 == 0xffff]
+        self.assertEqual(
+            matcher.match_ipv4(numpy.array(ipv4, numpy.uint64)
+                               & numpy.uint64(0xffffffff)).tolist(),
+            [_most_specific(inetnums, x) for x in ipv4])
+        self.assertEqual(
+            matcher.match_ipv4(numpy.array([], numpy.uint32)).tolist(), [])
+        with self.assertRaises(ValueError):
+            matcher.match_ipv4(numpy.array([-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
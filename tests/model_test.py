@@ -1,7 +1,11 @@
+import datetime
 import json
+import pickle
 import unittest
+from unittest import mock
 from json import loads
-from ipnetblocks import Response, ErrorMessage
+from ipnetblocks import Response, ErrorMessage, Inetnum
+from ipnetblocks.models.response import LazyInetnum
 
 _json_response_ok = r'''{
     "search": "1.1.1.1",
@@ -286,3 +290,64 @@ class TestModel(unittest.TestCase):
         model1 = Response(json.loads(_json_response_ok))
         model2 = Response(json.loads(_json_response_ok))
         self.assertEqual(model1, model2)
+
+    def test_models_are_slotted(self):
+        parsed = Response(json.loads(_json_response_ok))
+        inetnum = parsed.inetnums[0]
+        with self.assertRaises(AttributeError):
+            inetnum.unknown_field = 1
+        self.assertEqual(inetnum['netname'], 'APNIC-LABS')
+        with self.assertRaises(KeyError):
+            inetnum['_field_names']
+        self.assertEqual(list(vars(inetnum.org))[-1], 'address')
+        self.assertEqual(pickle.loads(pickle.dumps(parsed)), parsed)
+
+    def test_parsing_fast_path(self):
+        payload = json.loads(_json_response_ok)
+        inetnums = payload['result']['inetnums']
+        payload['result']['inetnums'] = inetnums * 334
+        with mock.patch('copy.deepcopy', side_effect=AssertionError):
+            parsed = Response(payload)
+        self.assertEqual(len(parsed.inetnums), 1002)
+        self.assertEqual(parsed.inetnums[1001], parsed.inetnums[2])
+        # parsed lists are detached from the input
+        inetnums[0]['remarks'].append('changed')
+        self.assertEqual(len(parsed.inetnums[0].remarks), 4)
+
+    def test_lazy_response(self):
+        eager = Response(json.loads(_json_response_ok))
+        lazy = Response(json.loads(_json_response_ok), lazy=True)
+        self.assertEqual(len(lazy.inetnums), 3)
+        self.assertEqual(lazy.inetnums._items, [None] * 3)
+
+        first = lazy.inetnums[0]
+        self.assertIsInstance(first, LazyInetnum)
+        self.assertIs(lazy.inetnums[0], first)
+        self.assertEqual(lazy.inetnums._items[1:], [None] * 2)
+        with self.assertRaises(AttributeError):
+            object.__getattribute__(first, 'admin_contact')
+        self.assertEqual(first.admin_contact, eager.inetnums[0].admin_contact)
+
+        self.assertEqual(lazy, eager)
+        self.assertEqual(eager, lazy)
+        self.assertEqual(str(lazy), str(eager))
+        self.assertEqual(lazy.inetnums[-1].netname, eager.inetnums[-1].netname)
+        self.assertEqual(lazy.inetnums[1:], eager.inetnums[1:])
+        self.assertEqual(pickle.loads(pickle.dumps(lazy.inetnums[1])),
+                         eager.inetnums[1])
+
+    def test_modified_decoding(self):
+        values = json.loads(_json_response_ok)['result']['inetnums'][0]
+        self.assertEqual(Inetnum(values).modified,
+                         datetime.datetime(2020, 7, 15, 13, 10, 57))
+        for modified in ['', None]:
+            values['modified'] = modified
+            self.assertIsNone(Inetnum(values).modified)
+        del values['modified']
+        self.assertIsNone(Inetnum(values).modified)
+        for modified in ['2020-07-15T25:10:57Z', '2020-+1-01T00:00:00Z',
+                         '2020-01-01T 1:00:00Z', '2020-01-01T00:00:1_Z',
+                         '+020-01-01T00:00:00Z']:
+            values['modified'] = modified
+            with self.assertRaises(ValueError, msg=modified):
+                Inetnum(values)
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import unittest
+from ipnetblocks import Client, AsyncClient, ParameterError
+from ipnetblocks.net import async_http
+from ipnetblocks.planner import LookupPlan
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+def _truncated_response() -> str:
+    response = json.loads(_json_response_ok)
+    response['result']['count'] = 5000
+    return json.dumps(response)
+
+
+def _handler(network_response: str = _json_response_ok):
+    def handler(query):
+        if 'mask' in query:
+            return 200, network_response
+        return 200, _json_response_ok
+
+    return handler
+
+
+class TestLookupPlan(unittest.TestCase):
+
+    def test_groups_by_network(self):
+        plan = LookupPlan(['1.1.1.9', '1.1.1.1', '1.1.1.1', '8.8.8.8',
+                           '2001:db8:1::1', '2001:DB8:1:ffff::1', 'nonsense'])
+        self.assertEqual(
+            [(str(network), network.prefix, [str(ip) for ip in members])
+             for network, members in plan.networks],
+            [('1.1.1.0', 24, ['1.1.1.1', '1.1.1.9']),
+             ('2001:db8:1::', 48, ['2001:db8:1::1', '2001:db8:1:ffff::1'])])
+        self.assertEqual([str(ip) for ip in plan.singles], ['8.8.8.8'])
+        self.assertEqual(plan.invalid, ['nonsense'])
+        self.assertEqual(plan.stats, {'values': 7, 'unique': 5,
+                                      'networks': 2, 'singles': 1,
+                                      'invalid': 1})
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ParameterError):
+            LookupPlan([], ipv4_prefix=33)
+        with self.assertRaises(ParameterError):
+            LookupPlan([], min_group=1)
+
+
+class TestGetManyGrouped(unittest.TestCase):
+
+    def test_fans_out_network_lookups(self):
+        values = ['1.1.1.1', '1.1.1.9', '1.1.1.1', '8.8.8.8', 'nonsense']
+        with StubServer(_handler()) as server, \
+                Client(api_key, base_url=server.url) as client:
+            results = client.get_many_grouped(values)
+            expected = client.get('1.1.1.9')
+
+        self.assertEqual([value for value, _ in results], values)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.requests[0]['mask'], ['24'])
+        self.assertEqual(server.requests[0]['ip'], ['1.1.1.0'])
+
+        answer = results[1][1]
+        self.assertEqual(answer.search, '1.1.1.9')
+        self.assertEqual([x.inetnum for x in answer.inetnums],
+                         [x.inetnum for x in expected.inetnums])
+        self.assertIs(results[0][1], results[2][1])
+        self.assertIsInstance(results[4][1], ParameterError)
+
+    def test_truncated_network_falls_back(self):
+        with StubServer(_handler(_truncated_response())) as server, \
+                Client(api_key, base_url=server.url) as client:
+            results = client.get_many_grouped(['1.1.1.1', '1.1.1.2'],
+                                              max_workers=1)
+
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(results[1][1].search, '1.1.1.1')
+        self.assertEqual(results[1][1].inetnums[0].netname, 'APNIC-LABS')
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async(self):
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url) as client:
+                return await client.get_many_grouped(
+                    ['1.1.1.1', '1.1.1.2', '8.8.8.8'])
+
+        loop = asyncio.new_event_loop()
+        with StubServer(_handler()) as server:
+            try:
+                results = loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(results[1][1].inetnums[0].netname, 'APNIC-LABS')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+import unittest
+from ipnetblocks import Client, AsyncClient, RateLimiter, TooManyRequestsError
+from ipnetblocks.net import async_http
+from ipnetblocks.net.ratelimit import parse_retry_after
+from tests.stub_server import StubServer, api_key, counting_handler
+
+
+def _throttling_handler(throttled: int, retry_after: str = '0.05'):
+    return counting_handler(throttled, 429, 'Too many requests',
+                            {'Retry-After': retry_after})
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_requests_are_spaced(self):
+        limiter = RateLimiter(20, burst=2)
+        waits = [limiter.reserve() for _ in range(6)]
+        self.assertEqual(waits[:2], [0, 0])
+        for i, wait in enumerate(waits[2:], 1):
+            self.assertAlmostEqual(wait, i / 20, delta=0.01)
+        self.assertEqual(limiter.stats['delayed'], 4)
+
+    def test_shared_across_threads(self):
+        limiter = RateLimiter(100, burst=1)
+        started = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire)
+                   for _ in range(21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_throttling_pauses_and_slows_down(self):
+        limiter = RateLimiter(10)
+        self.assertTrue(limiter.feedback(429, '2'))
+        self.assertEqual(limiter.rate, 5)
+        self.assertGreater(limiter.reserve(), 1.9)
+        self.assertFalse(limiter.feedback(200))
+        self.assertAlmostEqual(limiter.rate, 5.1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('3'), 3)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+        with self.assertRaises(ValueError):
+            RateLimiter(1, burst=0)
+        with self.assertRaises(ValueError):
+            Client(api_key, rate_limit='fast')
+
+
+class TestClientRateLimit(unittest.TestCase):
+
+    def test_throttled_request_is_sent_again(self):
+        with StubServer(_throttling_handler(2)) as server, \
+                Client(api_key, base_url=server.url, rate_limit=50) as client:
+            response = client.get('1.1.1.1')
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(client.rate_limiter.stats['throttled'], 2)
+
+    def test_retries_are_bounded(self):
+        limiter = RateLimiter(50, max_retries=1)
+        with StubServer(_throttling_handler(5, '0.01')) as server, \
+                Client(api_key, base_url=server.url,
+                       rate_limit=limiter) as client:
+            with self.assertRaises(TooManyRequestsError) as context:
+                client.get('1.1.1.1')
+        self.assertEqual(context.exception.retry_after, 0.01)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_without_limiter(self):
+        with StubServer(_throttling_handler(1)) as server, \
+                Client(api_key, base_url=server.url) as client:
+            with self.assertRaises(TooManyRequestsError):
+                client.get('1.1.1.1')
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async_shared_limiter(self):
+        limiter = RateLimiter(50, burst=1)
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   rate_limit=limiter) as client:
+                return await asyncio.gather(
+                    *[client.get('1.1.1.1') for _ in range(5)])
+
+        loop = asyncio.new_event_loop()
+        with StubServer(_throttling_handler(1)) as server:
+            try:
+                responses = loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+        self.assertEqual(len(responses), 5)
+        self.assertEqual(len(server.requests), 6)
+        self.assertEqual(limiter.stats['throttled'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
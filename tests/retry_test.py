@@ -0,0 +1,173 @@
+import asyncio
+import socket
+import unittest
+from requests.exceptions import ConnectionError as RequestsConnectionError, \
+    ChunkedEncodingError
+from ipnetblocks import Client, AsyncClient, RetryPolicy, RetryBudget, \
+    HttpApiError, BadRequestError, RateLimiter
+from ipnetblocks.net import async_http
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key, counting_handler
+
+
+def _failing_handler(failures: int, status: int = 503):
+    return counting_handler(failures, status, 'Service unavailable')
+
+
+def _truncating_handler(failures: int):
+    # the headers announce the whole body, then the connection drops
+    return counting_handler(failures, 200, _json_response_ok[:100],
+                            {'Content-Length': str(len(_json_response_ok))})
+
+
+def _unused_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_exponential_backoff(self):
+        policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+        self.assertEqual([policy.delay(i) for i in range(4)],
+                         [0.5, 1, 2, 3])
+        self.assertEqual(policy.delay(0, retry_after=2), 2)
+        self.assertEqual(policy.delay(0, retry_after=60), 3)
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff=1)
+        delays = [policy.delay(2) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= 4 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_idempotent_methods_only(self):
+        self.assertFalse(RetryPolicy().allows('POST', 0))
+        self.assertTrue(RetryPolicy(methods=['GET', 'POST']).allows('post', 0))
+
+    def test_max_attempts(self):
+        policy = RetryPolicy(max_attempts=2)
+        self.assertTrue(policy.allows('GET', 0))
+        self.assertFalse(policy.allows('GET', 1))
+
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_retries=1)
+        policy = RetryPolicy(budget=budget)
+        self.assertTrue(policy.allows('GET', 0))
+        self.assertFalse(policy.allows('GET', 0))
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(policy.allows('GET', 0))
+        self.assertEqual(policy.stats,
+                         {'retries': 2, 'budget_exhausted': 1})
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+        with self.assertRaises(ValueError):
+            RetryBudget(ratio=-1)
+        with self.assertRaises(ValueError):
+            Client(api_key, retry='always')
+
+
+class TestClientRetry(unittest.TestCase):
+
+    def test_server_errors_are_retried(self):
+        policy = RetryPolicy(backoff=0.01)
+        with StubServer(_failing_handler(2)) as server, \
+                Client(api_key, base_url=server.url, retry=policy) as client:
+            response = client.get('1.1.1.1')
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(policy.stats['retries'], 2)
+
+    def test_attempts_are_bounded(self):
+        with StubServer(_failing_handler(5)) as server, \
+                Client(api_key, base_url=server.url,
+                       retry=RetryPolicy(backoff=0.01)) as client:
+            with self.assertRaises(HttpApiError):
+                client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with StubServer(_failing_handler(1, 400)) as server, \
+                Client(api_key, base_url=server.url, retry=True) as client:
+            with self.assertRaises(BadRequestError):
+                client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 1)
+
+    def test_connection_errors_are_retried(self):
+        policy = RetryPolicy(backoff=0.01)
+        url = 'http://127.0.0.1:{}/api/v2'.format(_unused_port())
+        with Client(api_key, base_url=url, retry=policy) as client:
+            with self.assertRaises(RequestsConnectionError):
+                client.get('1.1.1.1')
+        self.assertEqual(policy.stats['retries'], 2)
+
+    def test_truncated_bodies_are_retried(self):
+        policy = RetryPolicy(backoff=0.01)
+        with StubServer(_truncating_handler(1)) as server, \
+                Client(api_key, base_url=server.url, retry=policy) as client:
+            response = client.get('1.1.1.1')
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(policy.stats['retries'], 1)
+
+    def test_truncated_throttled_body_is_discarded(self):
+        handler = counting_handler(1, 429, 'Too many requests', {
+            'Retry-After': '0.01', 'Content-Length': '100'})
+        with StubServer(handler) as server, \
+                Client(api_key, base_url=server.url,
+                       rate_limit=RateLimiter(100)) as client:
+            response = client.get('1.1.1.1')
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_truncated_bodies_are_bounded(self):
+        with StubServer(_truncating_handler(5)) as server, \
+                Client(api_key, base_url=server.url,
+                       retry=RetryPolicy(backoff=0.01)) as client:
+            with self.assertRaises(ChunkedEncodingError):
+                client.get('1.1.1.1')
+        self.assertEqual(len(server.requests), 3)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async_truncated_body(self):
+        policy = RetryPolicy(backoff=0.01)
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   retry=policy) as client:
+                return await client.get('1.1.1.1')
+
+        loop = asyncio.new_event_loop()
+        with StubServer(_truncating_handler(1)) as server:
+            try:
+                response = loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(policy.stats['retries'], 1)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async(self):
+        policy = RetryPolicy(backoff=0.01)
+
+        async def lookup(url):
+            async with AsyncClient(api_key, base_url=url,
+                                   retry=policy) as client:
+                return await client.get('1.1.1.1')
+
+        loop = asyncio.new_event_loop()
+        with StubServer(_failing_handler(1, 502)) as server:
+            try:
+                response = loop.run_until_complete(lookup(server.url))
+            finally:
+                loop.close()
+        self.assertEqual(response.inetnums[0].AS.asn, 13335)
+        self.assertEqual(policy.stats['retries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
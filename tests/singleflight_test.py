@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+import unittest
+from ipnetblocks import Client, HttpApiError
+from ipnetblocks.singleflight import SingleFlight, AsyncSingleFlight
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+
+def _slow(status, body):
+    def handler(query):
+        time.sleep(0.2)
+        return status, body
+    return handler
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+        barrier = threading.Barrier(5)
+
+        def work():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(flight.do('key', work))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats, {'executed': 1, 'shared': 4})
+
+    def test_client_coalesces_identical_requests(self):
+        with StubServer(_slow(200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url, coalesce=True) as client:
+            results = client.get_many([13335] * 8, field='asn', max_workers=8)
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertTrue(all(r.count == 3 for _, r in results))
+
+    def test_errors_are_shared(self):
+        with StubServer(_slow(500, 'failure')) as server, \
+                Client(api_key, base_url=server.url, coalesce=True) as client:
+            results = client.get_many([13335] * 4, field='asn', max_workers=4)
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertTrue(all(isinstance(r, HttpApiError) for _, r in results))
+
+    def test_async_calls_share_one_execution(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def run():
+            return await asyncio.gather(
+                *[flight.do('key', work) for _ in range(5)])
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(loop.run_until_complete(run()), [42] * 5)
+        finally:
+            loop.close()
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import random
+import tempfile
+import unittest
+from json import loads
+from ipnetblocks import Snapshot, RangeCache, Response, Inetnum
+from ipnetblocks.address import parse_ip_address
+from tests.model_test import _json_response_ok
+
+
+def _inetnum(first: int, last: int, netname: str) -> Inetnum:
+    return Inetnum({'inetnumFirstString': str(first),
+                    'inetnumLastString': str(last),
+                    'netname': netname, 'source': 'TEST'})
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, 'netblocks.snap')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_lookup(self):
+        inetnums = Response(loads(_json_response_ok)).inetnums
+        self.assertEqual(Snapshot.write(self.path, inetnums + inetnums), 3)
+
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 3)
+            records = snapshot.lookup('1.1.1.1')
+            self.assertEqual([x.netname for x in records],
+                             ['APNIC-LABS', 'APNIC-AP',
+                              'NON-RIPE-NCC-MANAGED-ADDRESS-BLOCK'])
+            best = snapshot.longest_match(parse_ip_address('1.1.1.200'))
+            self.assertEqual(best.inetnum, '1.1.1.0 - 1.1.1.255')
+            self.assertEqual(best.asn, 13335)
+            self.assertEqual(best.country, inetnums[0].country)
+            self.assertEqual(best.inetnum_first, inetnums[0].inetnum_first)
+            self.assertEqual([x.netname for x in snapshot.lookup('1.200.0.1')],
+                             ['APNIC-AP'])
+            self.assertEqual(snapshot.lookup('8.8.8.8'), [])
+            self.assertIsNone(snapshot.longest_match('2001:db8::1'))
+            with self.assertRaises(ValueError):
+                snapshot.lookup('nonsense')
+
+    def test_matches_brute_force(self):
+        generator = random.Random(7)
+        inetnums = [_inetnum(0, (1 << 128) - 1, 'ALL')]
+        for i in range(300):
+            first = generator.randrange(1 << 20)
+            last = first + generator.choice([0, 15, 255, 4095, 65535])
+            inetnums.append(_inetnum(first, last, 'NET-{}'.format(i)))
+        Snapshot.write(self.path, inetnums)
+
+        with Snapshot(self.path) as snapshot:
+            for _ in range(2000):
+                address = generator.randrange(1 << 21)
+                expected = sorted(
+                    (x for x in inetnums
+                     if x.inetnum_first <= address <= x.inetnum_last),
+                    key=lambda x: x.inetnum_last - x.inetnum_first)
+                found = snapshot.lookup(address)
+                self.assertEqual(
+                    [(x.inetnum_last - x.inetnum_first) for x in found],
+                    [(x.inetnum_last - x.inetnum_first) for x in expected])
+                self.assertEqual({x.netname for x in found},
+                                 {x.netname for x in expected})
+
+    def test_export_range_cache(self):
+        cache = RangeCache()
+        cache.add(Response(loads(_json_response_ok)).inetnums)
+        Snapshot.write(self.path, cache.ranges())
+        with Snapshot(self.path) as snapshot:
+            self.assertEqual([x.netname for x in snapshot],
+                             [x.netname for x in cache.ranges()])
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'{}' * 100)
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import unittest
+from ipnetblocks import Client, AsyncClient, Response, Inetnum, \
+    UnparsableApiResponseError
+from ipnetblocks.net import async_http
+from ipnetblocks.stream import iter_array, aiter_array
+from tests.model_test import _json_response_ok
+from tests.stub_server import StubServer, api_key
+
+_path = ('result', 'inetnums')
+
+
+def _chunks(document: str, size: int):
+    data = document.encode('UTF-8')
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class TestIterArray(unittest.TestCase):
+
+    def test_any_chunk_size(self):
+        expected = json.loads(_json_response_ok)['result']['inetnums']
+        for size in [1, 2, 3, 7, 64, 1 << 20]:
+            items = list(iter_array(_chunks(_json_response_ok, size), _path))
+            self.assertEqual(items, expected, size)
+
+    def test_members_in_any_order(self):
+        document = '{"result": {"inetnums": [1, 23, {"a": "é"}], ' \
+                   '"count": 3}, "search": "x"}'
+        for size in [1, 5, 100]:
+            self.assertEqual(list(iter_array(_chunks(document, size), _path)),
+                             [1, 23, {'a': 'é'}])
+
+    def test_empty_array(self):
+        document = '{"search": "x", "result": {"count": 0, "inetnums": []}}'
+        self.assertEqual(list(iter_array(_chunks(document, 4), _path)), [])
+
+    def test_missing_array(self):
+        document = '{"code": 403, "messages": "Access restricted"}'
+        with self.assertRaises(ValueError):
+            list(iter_array(_chunks(document, 4), _path))
+
+    def test_missing_or_doubled_comma(self):
+        for document in ['{"a": [1 2]}', '{"a": [1,, 2]}', '{"a": [1, 2,]}',
+                         '{"a": [, 1]}', '{"b": 1 "a": [1]}',
+                         '{"b": 1,, "a": [1]}']:
+            for size in [1, 100]:
+                with self.assertRaises(json.JSONDecodeError, msg=document):
+                    list(iter_array(_chunks(document, size), ('a',)))
+
+    def test_malformed_item_fails_fast(self):
+        consumed = []
+
+        def chunks():
+            yield b'{"a": [{"b": 1}, {"b": 2 "c": 3}, '
+            for _ in range(1000):
+                consumed.append(1)
+                yield b'{"b": 1, "c": "' + b'x' * 1000 + b'"}, '
+            yield b'{}]}'
+
+        items = iter_array(chunks(), ('a',))
+        self.assertEqual(next(items), {'b': 1})
+        with self.assertRaises(json.JSONDecodeError):
+            next(items)
+        self.assertLessEqual(len(consumed), 1)
+
+    def test_malformed_item_across_chunks(self):
+        document = '{"a": [{"b": 1 "c": 3}' + ', {}' * 1000 + ']}'
+        for size in [1, 3]:
+            chunks = _chunks(document, size)
+            with self.assertRaises(json.JSONDecodeError):
+                list(iter_array(chunks, ('a',)))
+            # the rest of the document is left unread
+            self.assertGreater(len(list(chunks)), 1000 // size)
+
+    def test_truncated_document(self):
+        items = iter_array(_chunks(_json_response_ok[:1000], 64), _path)
+        with self.assertRaises(ValueError):
+            list(items)
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async(self):
+        async def chunks():
+            for chunk in _chunks(_json_response_ok, 10):
+                yield chunk
+
+        async def collect():
+            return [x async for x in aiter_array(chunks(), _path)]
+
+        loop = asyncio.new_event_loop()
+        try:
+            items = loop.run_until_complete(collect())
+        finally:
+            loop.close()
+        self.assertEqual(items,
+                         json.loads(_json_response_ok)['result']['inetnums'])
+
+
+class TestIterInetnums(unittest.TestCase):
+
+    def test_iter_inetnums(self):
+        expected = Response(json.loads(_json_response_ok)).inetnums
+        with StubServer(lambda query: (200, _json_response_ok)) as server, \
+                Client(api_key, base_url=server.url) as client:
+            inetnums = client.iter_inetnums('1.1.1.1', limit=10)
+            self.assertEqual(server.requests, [])
+            self.assertEqual(list(inetnums), expected)
+            self.assertEqual(server.requests[0]['limit'], ['10'])
+            list(client.iter_inetnums('1.1.1.1'))
+            self.assertEqual(client.pool_stats['reused'], 1)
+
+    def test_unparsable_response(self):
+        with StubServer(lambda query: (200, '{"code": 1}')) as server, \
+                Client(api_key, base_url=server.url) as client:
+            with self.assertRaises(UnparsableApiResponseError):
+                list(client.iter_inetnums('1.1.1.1'))
+
+    @unittest.skipIf(async_http.aiohttp is None, 'aiohttp is not installed')
+    def test_async_iter_inetnums(self):
+        async def collect(url):
+            async with AsyncClient(api_key, base_url=url) as client:
+                return [x async for x in client.iter_inetnums(asn=13335)]
+
+        loop = asyncio.new_event_loop()
+        with StubServer(lambda query: (200, _json_response_ok)) as server:
+            try:
+                inetnums = loop.run_until_complete(collect(server.url))
+            finally:
+                loop.close()
+        self.assertIsInstance(inetnums[0], Inetnum)
+        self.assertEqual(inetnums,
+                         Response(json.loads(_json_response_ok)).inetnums)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import threading
+import time
+from ipnetblocks.testing import StubServer  # noqa: F401
+from tests.model_test import _json_response_ok
+
+api_key = 'at_' + 'a' * 29
+
+
+def counting_handler(count: int, status: int = 200, body: str = None,
+                     headers: dict = None, delay: float = 0,
+                     after: bool = False):
+    """
+    Handler answering the first `count` requests, or those following
+    them if `after`, with the given response, and the other requests
+    with `_json_response_ok`.
+
+    :param body: Default: `_json_response_ok`
+    :param delay: Seconds to wait before the given response.
+    """
+    lock = threading.Lock()
+    calls = [0]
+
+    def handler(query):
+        with lock:
+            calls[0] += 1
+            scripted = (calls[0] > count) if after else (calls[0] <= count)
+        if not scripted:
+            return 200, _json_response_ok
+        time.sleep(delay)
+        return status, _json_response_ok if body is None else body, \
+            headers or {}
+
+    return handler